@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Append-only time series of what each poll of Applications.aspx showed.
+
+One JSON line per poll:
+
+    {"attempt": 3, "fetched_at": "2025-07-29T14:00:03.120+03:00", "server_date": "...",
+     "latency_ms": 84.2, "logged_in": true,
+     "applications": [{"number": 1234, "status": "ΝΕΑ ΑΙΤΗΣΗ", "submitted_at": "29/07/2025 14:00:03",
+                       "cells": {...}}]}
+
+first_appearance() answers "when did our number first show up" without re-parsing
+any saved HTML.
+
+Usage:  python applications_timeseries.py [applications_timeseries.jsonl]
+"""
+import json
+import re
+import sys
+import threading
+
+TIMESERIES_FILE = "applications_timeseries.jsonl"
+
+# Grid header keywords (lower-cased, accents kept as the portal renders them) → record field
+HEADER_FIELDS = (
+    ("number", ("αριθμός", "αριθμος", "αρ.")),
+    ("status", ("κατάσταση", "κατασταση")),
+    ("submitted_at", ("ημ/νία", "ημερομηνία", "ημερομηνια", "ημ.")),
+)
+
+_NUMBER_RE = re.compile(r"\d+")
+
+def parse_application_row(cells):
+    """Turns one grid row ({header: text}) into a typed record; unknown columns stay in "cells"."""
+    record = {"number": None, "status": None, "submitted_at": None, "cells": cells}
+    for header, value in cells.items():
+        header_lower = header.lower()
+        for field, keywords in HEADER_FIELDS:
+            if record[field] is None and any(keyword in header_lower for keyword in keywords):
+                if field == "number":
+                    match = _NUMBER_RE.search(value)
+                    record[field] = int(match.group(0)) if match else None
+                else:
+                    record[field] = value or None
+                break
+    return record
+
+def build_poll_row(attempt, fetched_at, server_date, latency_ms, logged_in, grid_rows):
+    """One time-series row. grid_rows is the extractor's applications list (None if no grid)."""
+    return {
+        "attempt": attempt,
+        "fetched_at": fetched_at,
+        "server_date": server_date,
+        "latency_ms": None if latency_ms is None else round(latency_ms, 1),
+        "logged_in": logged_in,
+        "applications": None if grid_rows is None else [parse_application_row(row) for row in grid_rows],
+    }
+
+class ApplicationTimeSeries:
+    """Appends poll rows to a JSONL file; safe to call from the pipeline's worker thread."""
+
+    def __init__(self, path=TIMESERIES_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def append(self, row):
+        line = json.dumps(row, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()  # Each poll is durable on its own; a crash loses at most one line
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+def read_rows(path=TIMESERIES_FILE):
+    """Yields the rows of a time-series file in order (skips a torn last line)."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+def first_appearance(path=TIMESERIES_FILE, number=None):
+    """
+    Returns (row, record) for the first poll where an application number appeared
+    (a specific one if number is given), or None if it never did.
+    """
+    for row in read_rows(path):
+        for record in row.get("applications") or []:
+            if record.get("number") is None:
+                continue
+            if number is None or record["number"] == number:
+                return row, record
+    return None
+
+if __name__ == "__main__":
+    series_path = sys.argv[1] if len(sys.argv) > 1 else TIMESERIES_FILE
+    found = first_appearance(series_path)
+    if found:
+        row, record = found
+        print(f"✅ Application number {record['number']} ({record['status']}) first seen on attempt {row['attempt']} "
+              f"at {row['fetched_at']} (server Date: {row['server_date']}, latency {row['latency_ms']} ms)")
+    else:
+        print(f"No application number found in {series_path} yet.")
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent, content-addressed asset cache.
+
+Assets are stored once per distinct body under objects/<sha256><ext>, and
+manifest.json maps each URL to its object plus the validators the server sent
+(ETag / Last-Modified):
+
+    application_assets/
+        manifest.json
+        objects/3f5a...c1.png
+
+The next request for a known URL is a conditional GET (If-None-Match /
+If-Modified-Since), so an unchanged asset costs one 304 round-trip; within the
+same run it is not requested again at all.
+
+Several processes may share one cache (coordinated workers, see coordination.py):
+objects are content-addressed and moved into place atomically, and save() merges the
+manifest on disk under a lock file instead of overwriting it.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, the merge still avoids most lost entries
+    fcntl = None
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_LOCK_NAME = ".manifest.lock"
+OBJECTS_DIR_NAME = "objects"
+
+@contextmanager
+def _manifest_lock(cache_dir):
+    """Exclusive cross-process lock on the cache's manifest."""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(cache_dir, MANIFEST_LOCK_NAME), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+class AssetCache:
+    """URL → content-hash manifest with conditional-GET validators. Thread-safe."""
+
+    def __init__(self, cache_dir="application_assets"):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, OBJECTS_DIR_NAME)
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._validated_this_run = set()
+        self._dirty = False
+        self.entries = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read asset manifest {self.manifest_path} ({e}); starting an empty cache.")
+            return {}
+
+    def save(self):
+        """
+        Writes the manifest atomically if anything changed. Entries other processes saved in
+        the meantime are merged in (the more recently checked entry wins), not overwritten.
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+        with _manifest_lock(self.cache_dir):
+            on_disk = self._load_manifest()
+            with self._lock:
+                for url, entry in on_disk.items():
+                    mine = self.entries.get(url)
+                    if mine is None or entry.get("checked_at", 0) > mine.get("checked_at", 0):
+                        self.entries[url] = entry
+                data = json.dumps(self.entries, ensure_ascii=False, indent=2, sort_keys=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".manifest-", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.manifest_path)
+
+    # --- Lookups ---
+
+    def validated_this_run(self, url):
+        """True if this URL was already fetched or revalidated during this run (no request needed)."""
+        with self._lock:
+            return url in self._validated_this_run and self._object_exists(url)
+
+    def _object_exists(self, url):
+        entry = self.entries.get(url)
+        return bool(entry) and os.path.exists(os.path.join(self.cache_dir, entry["object"]))
+
+    def object_path(self, url):
+        """Local path of the cached body for url, or None."""
+        with self._lock:
+            if not self._object_exists(url):
+                return None
+            return os.path.join(self.cache_dir, self.entries[url]["object"])
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since headers for a revalidation request (empty if unknown)."""
+        with self._lock:
+            if not self._object_exists(url):
+                return {}
+            entry = self.entries[url]
+            headers = {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            return headers
+
+    # --- Updates ---
+
+    def mark_not_modified(self, url):
+        """Records a 304 answer: the cached object is still current."""
+        with self._lock:
+            self.entries[url]["checked_at"] = time.time()
+            self._validated_this_run.add(url)
+            self._dirty = True
+
+    def new_temp_file(self):
+        """An open binary temp file inside the cache directory (same filesystem as objects/)."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".download-", suffix=".part")
+        return os.fdopen(fd, "wb"), tmp_path
+
+    def commit(self, url, tmp_path, sha256_hex, size, headers):
+        """
+        Moves a fully downloaded temp file into objects/ under its content hash (dropping it
+        if identical bytes are already stored) and points the URL's manifest entry at it.
+        Returns the object path.
+        """
+        ext = os.path.splitext(url.split("?")[0].split("#")[0])[1].lower()[:10]
+        object_name = os.path.join(OBJECTS_DIR_NAME, sha256_hex + ext)
+        object_path = os.path.join(self.cache_dir, object_name)
+        if os.path.exists(object_path):
+            os.remove(tmp_path)  # Same bytes already stored once
+        else:
+            os.replace(tmp_path, object_path)
+
+        with self._lock:
+            self.entries[url] = {
+                "object": object_name,
+                "sha256": sha256_hex,
+                "size": size,
+                "etag": headers.get("ETag") or headers.get("etag"),
+                "last_modified": headers.get("Last-Modified") or headers.get("last-modified"),
+                "fetched_at": time.time(),
+                "checked_at": time.time(),
+            }
+            self._validated_this_run.add(url)
+            self._dirty = True
+        return object_path
+
+    def store_bytes(self, url, body, headers):
+        """Convenience for callers that already hold the whole body (e.g. Playwright's response.body())."""
+        f, tmp_path = self.new_temp_file()
+        with f:
+            f.write(body)
+        return self.commit(url, tmp_path, hashlib.sha256(body).hexdigest(), len(body), headers)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded-concurrency asset downloader.
+
+All downloads share one requests.Session (the portal cookies plus one keep-alive
+connection pool), bodies are streamed to disk in chunks,
+and every asset has its own deadline on top of a deadline for the whole batch.
+A page with N PDFs then costs roughly one round-trip instead of N serial ones.
+Bodies land in an AssetCache, so repeated assets are revalidated, not re-downloaded.
+
+Hand the downloader a session of its own (HttpPortalSession.detached_session(),
+session_from_browser_cookies()) rather than the one the poller uses: downloads and polls
+would otherwise share, and wait on, the same pool. With own_pool=True the downloader also
+mounts a pool sized to its worker count on that session.
+"""
+import hashlib
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from asset_cache import AssetCache
+from tracing import TRACER
+
+ASSET_DOWNLOAD_WORKERS = 6
+ASSET_TIMEOUT_SECONDS = 15          # Per asset, connect + full body
+ASSET_BATCH_DEADLINE_SECONDS = 30   # For all assets of one page
+ASSET_CHUNK_SIZE = 64 * 1024
+
+# status is the HTTP status, or "cached" when the asset was already validated earlier in this run
+DownloadResult = namedtuple("DownloadResult", "url path status size seconds error")
+
+class AssetDeadlineExceeded(Exception):
+    """Raised when an asset body is still streaming past its deadline."""
+
+class AssetDownloader:
+    """Downloads many assets at once over one shared, authenticated connection pool."""
+
+    def __init__(self, session, asset_dir="application_assets", workers=ASSET_DOWNLOAD_WORKERS,
+                 per_asset_timeout=ASSET_TIMEOUT_SECONDS, batch_deadline=ASSET_BATCH_DEADLINE_SECONDS, cache=None,
+                 throttle=None, own_pool=False):
+        self.session = session
+        self.asset_dir = asset_dir
+        self.cache = cache or AssetCache(asset_dir)
+        self.workers = workers
+        self.per_asset_timeout = per_asset_timeout
+        self.batch_deadline = batch_deadline
+        self.throttle = throttle  # Optional callable(url), called before each network request (rate limiting)
+        if own_pool:
+            # One keep-alive pool per host, big enough that no worker waits for a connection.
+            # Mounting replaces the session's pool, so only do it on a session nobody else polls with
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset-download")
+
+    def _download_one(self, url, batch_deadline):
+        traced_from = time.perf_counter()
+        result = self._fetch_one(url, batch_deadline)
+        TRACER.record("asset", traced_from, url=url, status=result.status, size=result.size, error=result.error)
+        return result
+
+    def _fetch_one(self, url, batch_deadline):
+        started = time.monotonic()
+        if self.cache.validated_this_run(url):
+            return DownloadResult(url, self.cache.object_path(url), "cached", 0, 0.0, None)
+        if self.throttle is not None:
+            self.throttle(url)
+            started = time.monotonic()  # Time spent waiting for the rate limit doesn't count against the asset
+
+        deadline = min(started + self.per_asset_timeout, batch_deadline)
+        size = 0
+        status = None
+        tmp_path = None
+        try:
+            remaining = max(deadline - time.monotonic(), 0.1)
+            headers = self.cache.conditional_headers(url)
+            with self.session.get(url, headers=headers, stream=True, timeout=(remaining, remaining)) as response:
+                status = response.status_code
+                if status == 304:
+                    self.cache.mark_not_modified(url)
+                    return DownloadResult(url, self.cache.object_path(url), status, 0, time.monotonic() - started, None)
+                if not response.ok:
+                    raise requests.HTTPError(f"HTTP {response.status_code} {response.reason}")
+
+                digest = hashlib.sha256()
+                af, tmp_path = self.cache.new_temp_file()
+                with af:
+                    for chunk in response.iter_content(ASSET_CHUNK_SIZE):
+                        if time.monotonic() > deadline:
+                            raise AssetDeadlineExceeded(f"deadline exceeded after {size} bytes")
+                        af.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+                path = self.cache.commit(url, tmp_path, digest.hexdigest(), size, response.headers)
+            return DownloadResult(url, path, status, size, time.monotonic() - started, None)
+        except (requests.RequestException, AssetDeadlineExceeded, OSError) as e:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)  # Don't leave truncated downloads behind
+            return DownloadResult(url, None, status, size, time.monotonic() - started, str(e))
+
+    def download_all(self, urls):
+        """
+        Downloads every URL concurrently. Returns a DownloadResult per URL; assets still
+        running when the batch deadline passes are reported as failed.
+        """
+        urls = list(urls)
+        if not urls:
+            return []
+        started = time.monotonic()
+        batch_deadline = started + self.batch_deadline
+        futures = {self._executor.submit(self._download_one, url, batch_deadline): url for url in urls}
+        done, not_done = wait(futures, timeout=self.batch_deadline)
+
+        results = [future.result() for future in done]
+        for future in not_done:
+            future.cancel()  # Queued ones never start; running ones stop at their next chunk
+            results.append(DownloadResult(futures[future], None, None, 0, self.batch_deadline, "batch deadline exceeded"))
+
+        self.cache.save()
+        self.report(results, time.monotonic() - started)
+        return results
+
+    def report(self, results, wall_seconds):
+        ok = [r for r in results if r.error is None]
+        not_modified = sum(1 for r in ok if r.status == 304)
+        cached = sum(1 for r in ok if r.status == "cached")
+        total_bytes = sum(r.size for r in ok)
+        throughput = total_bytes / wall_seconds / 1024 if wall_seconds > 0 else 0.0
+        serial_seconds = sum(r.seconds for r in results)
+        print(f"  [assets] {len(ok)}/{len(results)} assets ({not_modified} not modified, {cached} already fetched this run), "
+              f"{total_bytes / 1024:.1f} KiB in {wall_seconds * 1000:.0f} ms "
+              f"({throughput:.1f} KiB/s; serial would be ~{serial_seconds * 1000:.0f} ms)")
+        for r in results:
+            if r.error is not None:
+                print(f"  [assets] ❌ Failed to download asset {r.url}: {r.error}")
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
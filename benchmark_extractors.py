@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Checks that every HTML extractor returns the same links, images and applications
+grid as the BeautifulSoup reference on home_page.html, then times them.
+
+Usage:  python benchmark_extractors.py [iterations]
+"""
+import sys
+import time
+
+from html_extractors import EXTRACTORS, get_extractor
+
+SAMPLE_PAGE = "home_page.html"
+
+# A GridView like the one Applications.aspx renders, spliced into the sample page so
+# the table path is exercised too (home_page.html itself has only layout tables).
+SAMPLE_GRID = """
+<div>
+<table class="grid" cellspacing="0" rules="all" border="1" id="MainContent_gvApplications" style="border-collapse:collapse;">
+    <tr>
+        <th scope="col">Α/Α</th><th scope="col">Αριθμός Αίτησης</th><th scope="col">Ημ/νία Υποβολής</th><th scope="col">Κατάσταση</th><th scope="col">&nbsp;</th>
+    </tr><tr>
+        <td>1</td><td><span id="MainContent_gvApplications_lblNumber_0">  1234 </span></td><td>29/07/2025 14:00:03</td><td>ΝΕΑ ΑΙΤΗΣΗ</td><td><a href="Reports/application_view.pdf?id=1">Εκτύπωση</a></td>
+    </tr><tr>
+        <td>2</td><td>1240</td><td>29/07/2025&nbsp;14:00:09</td><td>Σε&nbsp;επεξεργασία</td><td><a href="Reports/application_view.pdf?id=2">Εκτύπωση</a></td>
+    </tr>
+</table>
+</div>
+"""
+
+def load_sample_pages():
+    with open(SAMPLE_PAGE, "r", encoding="utf-8") as f:
+        page = f.read()
+    marker = '<div class="main">'
+    with_grid = page.replace(marker, marker + SAMPLE_GRID, 1)
+    return {"home_page.html": page, "home_page.html + grid": with_grid}
+
+def check_parity(pages, extractors):
+    """Every extractor must agree with the BeautifulSoup reference. Returns True on success."""
+    reference = extractors["soup"]
+    all_ok = True
+    for page_name, page_html in pages.items():
+        expected = reference.extract(page_html)
+        for name, extractor in extractors.items():
+            if name == "soup":
+                continue
+            got = extractor.extract(page_html)
+            for field in expected._fields:
+                if getattr(got, field) != getattr(expected, field):
+                    print(f"❌ {name} differs from soup on {page_name} ({field}):")
+                    print(f"   soup: {getattr(expected, field)}")
+                    print(f"   {name}: {getattr(got, field)}")
+                    all_ok = False
+        print(f"  {page_name}: {len(expected.links)} links, {len(expected.images)} images, "
+              f"{len(expected.applications or [])} application rows")
+    return all_ok
+
+def time_extractor(extractor, page_html, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        extractor.extract(page_html)
+    return (time.perf_counter() - started) / iterations
+
+def run_benchmark(iterations=50):
+    pages = load_sample_pages()
+    extractors = {}
+    for name in EXTRACTORS:
+        extractor = get_extractor(name)
+        if extractor.name == name:  # Skip ones that fell back because of a missing dependency
+            extractors[name] = extractor
+
+    print("--- Parity check against BeautifulSoup ---")
+    parity_ok = check_parity(pages, extractors)
+    print("✅ All extractors agree." if parity_ok else "❌ Extractors disagree.")
+
+    page_html = pages["home_page.html + grid"]
+    print(f"\n--- Timing ({iterations} iterations, {len(page_html.encode('utf-8')) / 1024:.0f} KiB page) ---")
+    baseline = None
+    for name, extractor in extractors.items():
+        per_call = time_extractor(extractor, page_html, iterations)
+        baseline = baseline or per_call
+        print(f"  {name:<6} {per_call * 1000:8.2f} ms/page   x{baseline / per_call:6.1f} vs soup")
+    return parity_ok
+
+if __name__ == "__main__":
+    ok = run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-end latency benchmark against the local fake portal (fake_portal.py).
+
+For every scenario (backend / reload mode / polling policy) it starts a fresh fake
+portal whose applications appear OPENING_DELAY_SECONDS after the bot's target time,
+runs test_bot.py in its own directory under benchmark_runs/, and reports:
+
+  - opening → first new-data capture: when the first poll showing the new row
+    returned (fetched_at + latency from applications_timeseries.jsonl), relative to the opening
+  - polls/s during Phase 3
+  - bytes the run wrote to disk
+
+Results are printed as a table and written to benchmark_portal_results.json.
+
+Usage:  python benchmark_portal.py [scenario ...]     (default: all scenarios)
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from applications_timeseries import TIMESERIES_FILE, first_appearance, read_rows
+from fake_portal import FAKE_PASSWORD, FAKE_USERNAME, FakePortal
+from portal_clock import GREEK_TZ
+
+BENCHMARK_DIR = "benchmark_runs"
+RESULTS_FILE = "benchmark_portal_results.json"
+BOT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_bot.py")
+
+OPENING_DELAY_SECONDS = 2.0        # Applications appear this long after the bot's target time
+PORTAL_LATENCY_MS = 40.0
+PORTAL_JITTER_MS = 20.0
+PORTAL_ERROR_RATE = 0.05
+PORTAL_SLOW_RATE = 0.1             # Share of responses stuck behind a slow server thread...
+PORTAL_SLOW_MS = 1500.0            # ...for this much longer
+RUN_TIMEOUT_SECONDS = 180
+
+# name → (environment for test_bot.py, seconds between start and target time: login/browser launch must fit)
+SCENARIOS = {
+    "http/fixed": ({"PIS_FETCH_BACKEND": "http", "PIS_POLL_POLICY": "fixed"}, 5),
+    "http/adaptive": ({"PIS_FETCH_BACKEND": "http", "PIS_POLL_POLICY": "adaptive"}, 5),
+    "http/adaptive/hedged": ({"PIS_FETCH_BACKEND": "http", "PIS_POLL_POLICY": "adaptive", "PIS_HEDGE": "1"}, 5),
+    "playwright/full/fixed": ({"PIS_FETCH_BACKEND": "playwright", "PIS_RELOAD_MODE": "full", "PIS_POLL_POLICY": "fixed"}, 15),
+    "playwright/fast/fixed": ({"PIS_FETCH_BACKEND": "playwright", "PIS_RELOAD_MODE": "fast", "PIS_POLL_POLICY": "fixed"}, 15),
+    "playwright/fast/adaptive": ({"PIS_FETCH_BACKEND": "playwright", "PIS_RELOAD_MODE": "fast", "PIS_POLL_POLICY": "adaptive"}, 15),
+    "playwright/fast/adaptive/hedged": ({"PIS_FETCH_BACKEND": "playwright", "PIS_RELOAD_MODE": "fast", "PIS_POLL_POLICY": "adaptive",
+                                         "PIS_HEDGE": "1"}, 15),
+}
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def run_scenario(name, bot_env, lead_seconds):
+    run_dir = os.path.join(BENCHMARK_DIR, name.replace("/", "_"))
+    shutil.rmtree(run_dir, ignore_errors=True)
+    os.makedirs(run_dir)
+
+    target_ts = time.time() + lead_seconds
+    opens_at = target_ts + OPENING_DELAY_SECONDS
+    portal = FakePortal(opens_at=opens_at, latency_ms=PORTAL_LATENCY_MS, latency_jitter_ms=PORTAL_JITTER_MS,
+                        error_rate=PORTAL_ERROR_RATE, seed=1, slow_rate=PORTAL_SLOW_RATE, slow_ms=PORTAL_SLOW_MS).start()
+    env = dict(os.environ, **bot_env,
+               PIS_PORTAL_BASE_URL=portal.base_url,
+               PIS_USERNAME=FAKE_USERNAME,
+               PIS_PASSWORD=FAKE_PASSWORD,
+               PIS_EVENT_TIME=datetime.fromtimestamp(target_ts, GREEK_TZ).isoformat())
+
+    print(f"\n--- Scenario {name} (target in {lead_seconds} s, opening {OPENING_DELAY_SECONDS} s later) ---")
+    result = {"scenario": name, "ok": False}
+    try:
+        with open(os.path.join(run_dir, "bot_output.log"), "w", encoding="utf-8") as log:
+            completed = subprocess.run([sys.executable, BOT_SCRIPT], cwd=run_dir, env=env, stdout=log,
+                                       stderr=subprocess.STDOUT, timeout=RUN_TIMEOUT_SECONDS)
+        result["exit_code"] = completed.returncode
+    except subprocess.TimeoutExpired:
+        result["exit_code"] = None
+        print(f"  ❌ Bot did not finish within {RUN_TIMEOUT_SECONDS} s")
+    finally:
+        portal.stop()
+
+    series_path = os.path.join(run_dir, TIMESERIES_FILE)
+    if not os.path.exists(series_path):
+        print(f"  ❌ No time series written; see {run_dir}/bot_output.log")
+        return result
+
+    rows = list(read_rows(series_path))
+    fetch_times = [datetime.fromisoformat(row["fetched_at"]).timestamp() for row in rows if row.get("fetched_at")]
+    found = first_appearance(series_path)
+    if found:
+        row, _ = found
+        first_capture = datetime.fromisoformat(row["fetched_at"]).timestamp() + (row["latency_ms"] or 0) / 1000
+        result["opening_to_first_capture_ms"] = round((first_capture - opens_at) * 1000, 1)
+    if len(fetch_times) > 1:
+        result["polls_per_second"] = round((len(fetch_times) - 1) / (fetch_times[-1] - fetch_times[0]), 2)
+    result["polls"] = len(rows)
+    result["bytes_written"] = directory_size(run_dir)
+    result["portal_requests"] = sum(portal.stats.values())
+    result["ok"] = found is not None
+    return result
+
+def print_results(results):
+    print("\n--- Benchmark results (fake portal, "
+          f"{PORTAL_LATENCY_MS:.0f}+{PORTAL_JITTER_MS:.0f} ms latency, {PORTAL_SLOW_RATE:.0%} stalled +{PORTAL_SLOW_MS:.0f} ms, "
+          f"{PORTAL_ERROR_RATE:.0%} errors) ---")
+    print(f"  {'scenario':<26} {'opening→capture':>16} {'polls/s':>8} {'polls':>6} {'written':>10}")
+    for r in results:
+        first = f"{r['opening_to_first_capture_ms']:.0f} ms" if "opening_to_first_capture_ms" in r else "—"
+        pps = f"{r['polls_per_second']:.2f}" if "polls_per_second" in r else "—"
+        written = f"{r['bytes_written'] / 1024:.0f} KiB" if "bytes_written" in r else "—"
+        status = "" if r["ok"] else "  ❌ failed"
+        print(f"  {r['scenario']:<26} {first:>16} {pps:>8} {r.get('polls', 0):>6} {written:>10}{status}")
+
+if __name__ == "__main__":
+    selected = sys.argv[1:] or list(SCENARIOS)
+    unknown = [name for name in selected if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scenario(s): {', '.join(unknown)}. Choose from: {', '.join(SCENARIOS)}")
+        sys.exit(1)
+
+    all_results = [run_scenario(name, *SCENARIOS[name]) for name in selected]
+    print_results(all_results)
+    with open(RESULTS_FILE, "w", encoding="utf-8") as f:
+        json.dump(all_results, f, ensure_ascii=False, indent=2)
+    print(f"\nResults written to {RESULTS_FILE}")
+    sys.exit(0 if all(r["ok"] for r in all_results) else 1)
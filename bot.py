@@ -3,9 +3,16 @@ import os
 import base64
 import json
 import time
-from datetime import datetime, timedelta, timezone
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright
 
+from asset_downloader import AssetDownloader
+from fast_reload import ReloadTimings, fast_mode_enabled, install_resource_blocking, reload_until_usable
+from http_backend import session_from_browser_cookies, sync_browser_cookies
+from portal_clock import greek_now
+from portal_html import PORTAL_BASE_URL
+
 def load_credentials():
     """Read username/password from env, base64 env, or credentials.json."""
     username = os.environ.get("PIS_USERNAME")
@@ -30,8 +37,8 @@ def load_credentials():
         raise Exception("Credentials not found. Please set PIS_USERNAME/PIS_PASSWORD env vars or create credentials.json.")
 
 def get_greek_time():
-    # Greek time is UTC+3
-    return datetime.now(timezone.utc) + timedelta(hours=3)
+    # Greek wall-clock time (Europe/Athens, handles EET/EEST)
+    return greek_now()
 
 def wait_until(target_dt):
     """Wait until the target datetime (Greek time)."""
@@ -45,16 +52,24 @@ def wait_until(target_dt):
 
 def run_scraper():
     """Log in to portal, wait until xx Greek time, then repeatedly download the applications page for 1 minute, every 5 seconds, saving each with a timestamp."""
+    if os.environ.get("PIS_FETCH_BACKEND", "playwright").strip().lower() == "http":
+        # Browserless backend lives next to the main bot; reuse it instead of duplicating the loop
+        from test_bot import run_scraper_http
+        return run_scraper_http()
+
     start_time = time.time()
     username, password = load_credentials()
 
-    login_url = "https://myrequests.pis.gr/Account/Login.aspx"
-    applications_url = "https://myrequests.pis.gr/Applications.aspx"
+    login_url = PORTAL_BASE_URL + "/Account/Login.aspx"
+    applications_url = PORTAL_BASE_URL + "/Applications.aspx"
 
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=True)
         try:
             context = browser.new_context()
+            # PIS_RELOAD_MODE=fast: skip CSS, fonts, images and CDN scripts (see fast_reload.py)
+            blocker = install_resource_blocking(context) if fast_mode_enabled() else None
+            reload_timings = ReloadTimings()
             page = context.new_page()
 
             print("Navigating to login page...")
@@ -96,7 +111,7 @@ def run_scraper():
             if login_success:
                 print("Proceeding to applications page and starting 1-minute scrape window.")
                 # Go to applications page
-                page.goto(applications_url)
+                response = page.goto(applications_url)
                 page.wait_for_load_state("networkidle")
                 # Wait until Greek time is 14:00
                 now = get_greek_time()
@@ -106,65 +121,66 @@ def run_scraper():
                 duration = 60  # seconds
                 interval = 5   # seconds
                 count = 0
+                reload_failed = False
+                downloader = AssetDownloader(session_from_browser_cookies(context.cookies()), "application_assets", own_pool=True)
                 wait_until(target_time)
                 # Start repeated download loop for 1 minute, every 5 seconds
                 while True:
                     now = time.time()
                     if now - loop_start > duration:
                         break
-                    try:
-                        greek_now = get_greek_time()
-                        ts = greek_now.strftime("%Y%m%d_%H%M%S")
-                        fname = f"application_view_{ts}.html"
-                        print(f"Saving {fname}")
-                        page_html = page.content()
-                        with open(fname, "w", encoding="utf-8") as f:
-                            f.write(page_html)
-                        # --- Asset download enhancement ---
+                    if reload_failed:
+                        # The page still holds the previous body: saving it would stamp stale data with a new time
+                        print("⚠️ Skipping save: the last reload failed.")
+                    else:
                         try:
-                            from bs4 import BeautifulSoup
-                            import os
-                            soup = BeautifulSoup(page_html, "html.parser")
-                            asset_dir = "application_assets"
-                            os.makedirs(asset_dir, exist_ok=True)
-                            # Find all asset links (PDFs, images)
-                            asset_tags = []
-                            asset_tags += soup.find_all("a", href=True)
-                            asset_tags += soup.find_all("iframe", src=True)
-                            asset_tags += soup.find_all("embed", src=True)
-                            asset_tags += soup.find_all("img", src=True)
-                            for tag in asset_tags:
-                                url = tag.get("href") or tag.get("src")
-                                if not url:
-                                    continue
-                                if url.startswith("/"):
-                                    url = "https://myrequests.pis.gr" + url
-                                if url.lower().endswith(".pdf") or url.lower().endswith(".jpg") or url.lower().endswith(".png"):
-                                    asset_name = os.path.basename(url.split("?")[0])
-                                    asset_path = os.path.join(asset_dir, asset_name)
-                                    try:
-                                        asset_page = context.new_page()
-                                        asset_page.goto(url)
-                                        with open(asset_path, "wb") as af:
-                                            af.write(asset_page.content().encode("utf-8"))
-                                        asset_page.close()
-                                        print(f"Downloaded asset: {asset_path}")
-                                    except Exception as asset_err:
-                                        print(f"❌ Error downloading asset {url}: {asset_err}")
-                        except Exception as soup_err:
-                            print(f"❌ Error parsing HTML for assets: {soup_err}")
-                        # --- End asset download enhancement ---
-                        count += 1
-                    except Exception as e:
-                        print(f"❌ Error during page save or reload: {e}")
+                            greek_now = get_greek_time()
+                            ts = greek_now.strftime("%Y%m%d_%H%M%S")
+                            fname = f"application_view_{ts}.html"
+                            print(f"Saving {fname}")
+                            # Raw body of the last navigation response: written as-is, no DOM re-serialisation
+                            page_bytes = response.body() if response else page.content().encode("utf-8")
+                            with open(fname, "wb") as f:
+                                f.write(page_bytes)
+                            # --- Asset download enhancement ---
+                            try:
+                                soup = BeautifulSoup(page_bytes, "html.parser")
+                                # Find all asset links (PDFs, images)
+                                asset_tags = []
+                                asset_tags += soup.find_all("a", href=True)
+                                asset_tags += soup.find_all("iframe", src=True)
+                                asset_tags += soup.find_all("embed", src=True)
+                                asset_tags += soup.find_all("img", src=True)
+                                asset_urls = set()
+                                for tag in asset_tags:
+                                    url = tag.get("href") or tag.get("src")
+                                    if not url:
+                                        continue
+                                    url = urljoin(page.url, url)
+                                    if url.lower().endswith(".pdf") or url.lower().endswith(".jpg") or url.lower().endswith(".png"):
+                                        asset_urls.add(url)
+                                # Raw response bytes over one shared connection pool (not a new page per asset,
+                                # whose page.content() would re-serialise binaries as HTML text)
+                                sync_browser_cookies(downloader.session, context.cookies())
+                                downloader.download_all(asset_urls)
+                            except Exception as soup_err:
+                                print(f"❌ Error parsing HTML for assets: {soup_err}")
+                            # --- End asset download enhancement ---
+                            count += 1
+                        except Exception as e:
+                            print(f"❌ Error during page save or reload: {e}")
                     if now - loop_start + interval > duration:
                         break
                     time.sleep(interval)
                     try:
-                        page.reload()
-                        page.wait_for_load_state("networkidle")
+                        response = reload_until_usable(page, 30000, reload_timings).response  # 30 s: Playwright's default timeout
+                        reload_failed = False
                     except Exception as e:
                         print(f"❌ Error during page reload: {e}")
+                        response = None
+                        reload_failed = True
+                downloader.close()
+                reload_timings.report(blocker)
                 print(f"✅ Finished repeated downloads. Total pages saved: {count}")
             else:
                 print("Login likely failed. Check credentials or form data.")
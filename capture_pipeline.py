@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Pipelined capture: keep the reload loop on its cadence.
+
+The capturing thread only reloads the page and hands the HTML to submit().
+Background workers then do the slow parts:
+
+    capture thread ──> [snapshot queue] ──> persist worker ──> [asset queue] ──> asset worker
+                       (write file or archive record,
+                        detect new data,           (concurrent PDF/image downloads)
+                        append time-series row,
+                        notify on first new data,
+                        collect asset URLs)
+
+Both queues are bounded. A full snapshot queue blocks the capture thread (snapshots
+are never dropped) and the blocked time is reported; a full asset queue drops the
+batch instead, since the same assets are offered again by the next capture.
+"""
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from applications_timeseries import build_poll_row, parse_application_row
+from asset_downloader import AssetDownloader
+from html_extractors import get_extractor
+from portal_html import asset_urls_from_extract, is_logged_in
+from tracing import TRACER
+
+SNAPSHOT_QUEUE_SIZE = 32
+ASSET_QUEUE_SIZE = 8
+
+# html: the page as the raw UTF-8 response body (bytes) or as str
+# meta: fetched_at (ISO, Greek time), server_date (HTTP Date header) and latency_ms of the capture
+CaptureItem = namedtuple("CaptureItem", "attempt captured_at page_url html meta")
+AssetBatch = namedtuple("AssetBatch", "attempt urls")
+
+_STOP = object()
+
+class PipelineMetrics:
+    """Counters for the pipeline's backpressure report (updated under a lock)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.persisted = 0
+        self.persist_errors = 0
+        self.producer_blocked_seconds = 0.0
+        self.max_snapshot_queue_depth = 0
+        self.max_persist_lag_seconds = 0.0
+        self.asset_batches_queued = 0
+        self.asset_batches_dropped = 0
+        self.max_asset_queue_depth = 0
+        self.assets_downloaded = 0
+        self.asset_bytes = 0
+        self.asset_errors = 0
+
+    def report(self):
+        with self.lock:
+            print("\n--- Capture pipeline metrics ---")
+            print(f"  Snapshots submitted/persisted: {self.submitted}/{self.persisted} (errors: {self.persist_errors})")
+            print(f"  Capture thread blocked on full queue: {self.producer_blocked_seconds * 1000:.0f} ms total")
+            print(f"  Max snapshot queue depth: {self.max_snapshot_queue_depth}/{SNAPSHOT_QUEUE_SIZE}, "
+                  f"max capture→disk lag: {self.max_persist_lag_seconds * 1000:.0f} ms")
+            print(f"  Asset batches queued/dropped: {self.asset_batches_queued}/{self.asset_batches_dropped}, "
+                  f"max asset queue depth: {self.max_asset_queue_depth}/{ASSET_QUEUE_SIZE}")
+            print(f"  Assets downloaded: {self.assets_downloaded}, {self.asset_bytes / 1024:.1f} KiB (errors: {self.asset_errors})")
+
+class CapturePipeline:
+    """Persistence, new-data detection and asset fetching on background threads."""
+
+    def __init__(self, asset_session, new_data_detector, save_snapshot,
+                 asset_dir="application_assets", output_dir="", timeseries=None, snapshot_store=None, on_new_data=None):
+        """
+        asset_session: requests.Session carrying the portal cookies (thread-side downloads); owned by the
+                       pipeline, which sizes its pool for the downloader and closes it. Never the poller's session.
+        new_data_detector: callable(page_html) -> bool (page_html is whatever was submitted, bytes or str)
+        save_snapshot: callable(page_html, output_dir=...) -> file name
+        timeseries: optional ApplicationTimeSeries receiving one structured row per capture
+        snapshot_store: optional SnapshotStore; when given it replaces save_snapshot and is closed with the pipeline
+        on_new_data: optional callable(attempt, fetched_at, applications) run once, for the first capture with new data;
+                     applications are the grid's parse_application_row records. Must not block (e.g. notifier.py queues).
+        """
+        self.asset_session = asset_session
+        self.new_data_detector = new_data_detector
+        self.save_snapshot = save_snapshot
+        self.asset_dir = asset_dir
+        self.output_dir = output_dir
+        self.timeseries = timeseries
+        self.snapshot_store = snapshot_store
+        self.on_new_data = on_new_data
+        self.extractor = get_extractor()
+        self.downloader = AssetDownloader(asset_session, asset_dir, own_pool=True)
+        self.snapshot_queue = queue.Queue(maxsize=SNAPSHOT_QUEUE_SIZE)
+        self.asset_queue = queue.Queue(maxsize=ASSET_QUEUE_SIZE)
+        self.metrics = PipelineMetrics()
+        self.new_data_found = threading.Event()
+        self._persist_thread = threading.Thread(target=self._persist_worker, name="persist-worker", daemon=True)
+        self._asset_thread = threading.Thread(target=self._asset_worker, name="asset-worker", daemon=True)
+
+    def start(self):
+        self._persist_thread.start()
+        self._asset_thread.start()
+        return self
+
+    # --- Capture thread side ---
+
+    def submit(self, attempt, page_html, page_url, meta=None):
+        """
+        Hands one captured page (response body bytes, or str) to the workers.
+        Blocks only if the snapshot queue is full.
+        """
+        item = CaptureItem(attempt, time.time(), page_url, page_html, meta or {})
+        try:
+            self.snapshot_queue.put_nowait(item)
+        except queue.Full:
+            blocked_started = time.perf_counter()
+            self.snapshot_queue.put(item)
+            with self.metrics.lock:
+                self.metrics.producer_blocked_seconds += time.perf_counter() - blocked_started
+        with self.metrics.lock:
+            self.metrics.submitted += 1
+            self.metrics.max_snapshot_queue_depth = max(self.metrics.max_snapshot_queue_depth, self.snapshot_queue.qsize())
+
+    def close(self, timeout=None):
+        """Drains both queues, stops the workers and prints the metrics."""
+        self.snapshot_queue.put(_STOP)
+        self._persist_thread.join(timeout)
+        self._asset_thread.join(timeout)
+        self.downloader.close()
+        self.asset_session.close()
+        if self.timeseries is not None:
+            self.timeseries.close()
+        self.metrics.report()
+        if self.snapshot_store is not None:
+            self.snapshot_store.close()
+            self.snapshot_store.report()
+
+    # --- Workers ---
+
+    def _persist_worker(self):
+        while True:
+            item = self.snapshot_queue.get()
+            if item is _STOP:
+                self.asset_queue.put(_STOP)  # Blocking put: the asset worker must see the stop marker
+                return
+            try:
+                with TRACER.span("persist", attempt=item.attempt):
+                    if self.snapshot_store is not None:
+                        fname = self.snapshot_store.save_snapshot(item.html, captured_at=item.meta.get("fetched_at"))
+                    else:
+                        fname = self.save_snapshot(item.html, output_dir=self.output_dir)
+                lag = time.time() - item.captured_at
+                with self.metrics.lock:
+                    self.metrics.persisted += 1
+                    self.metrics.max_persist_lag_seconds = max(self.metrics.max_persist_lag_seconds, lag)
+                print(f"  [persist] Saved {fname} (attempt {item.attempt}, {lag * 1000:.0f} ms after capture)")
+
+                with TRACER.span("detect", attempt=item.attempt):
+                    new_data = self.new_data_detector(item.html)
+                    first_new_data = new_data and not self.new_data_found.is_set()
+                    if new_data:
+                        self.new_data_found.set()
+
+                # Bytes are decoded once, here, off the capture thread
+                page_html = item.html.decode("utf-8", errors="replace") if isinstance(item.html, bytes) else item.html
+
+                # One extraction pass feeds both the time series and the asset list
+                with TRACER.span("parse", attempt=item.attempt):
+                    extract = self.extractor.extract(page_html)
+                if self.timeseries is not None:
+                    self.timeseries.append(build_poll_row(
+                        item.attempt,
+                        item.meta.get("fetched_at"),
+                        item.meta.get("server_date"),
+                        item.meta.get("latency_ms"),
+                        is_logged_in(page_html),
+                        extract.applications,
+                    ))
+                if first_new_data and self.on_new_data is not None:
+                    self.on_new_data(item.attempt, item.meta.get("fetched_at"),
+                                     [parse_application_row(row) for row in extract.applications or []])
+
+                asset_urls = asset_urls_from_extract(extract, item.page_url)
+                if asset_urls:
+                    self._queue_assets(AssetBatch(item.attempt, asset_urls))
+            except Exception as e:
+                with self.metrics.lock:
+                    self.metrics.persist_errors += 1
+                print(f"  [persist] ❌ Error persisting attempt {item.attempt}: {e}")
+
+    def _queue_assets(self, batch):
+        try:
+            self.asset_queue.put_nowait(batch)
+            with self.metrics.lock:
+                self.metrics.asset_batches_queued += 1
+                self.metrics.max_asset_queue_depth = max(self.metrics.max_asset_queue_depth, self.asset_queue.qsize())
+        except queue.Full:
+            with self.metrics.lock:
+                self.metrics.asset_batches_dropped += 1
+            print(f"  [assets] Asset queue full; skipping assets of attempt {batch.attempt}")
+
+    def _asset_worker(self):
+        while True:
+            batch = self.asset_queue.get()
+            if batch is _STOP:
+                return
+            with TRACER.span("assets", attempt=batch.attempt, count=len(batch.urls)):
+                results = self.downloader.download_all(batch.urls)
+            with self.metrics.lock:
+                for result in results:
+                    if result.error is None:
+                        self.metrics.assets_downloaded += 1
+                        self.metrics.asset_bytes += result.size
+                    else:
+                        self.metrics.asset_errors += 1
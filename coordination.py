@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+Coordination for several bot processes polling the same event from one machine.
+
+One process polls Applications.aspx once per interval, so an update can go unseen for up to
+a whole interval. Starting more copies of test_bot.py used to make them fire in lockstep,
+duplicate each other's work and fight over the same output files. With PIS_COORDINATE=1 the
+workers cooperate through a shared SQLite registry (PIS_COORDINATION_DB, default
+coordination.sqlite3, in WAL mode so readers never block the writer):
+
+  - Phase offsets: each worker claims the lowest free slot and keeps it alive with a heartbeat.
+    The first worker to join an empty registry starts a new run, which later joiners share.
+    The first worker of the run to start Phase 3 records the event's epoch (an epoch or
+    new-data signal left by an earlier run of the same event is reset). Worker k of n then polls at
+    epoch + (i + k/n) * interval, so n workers sample the page n times per interval while
+    each session keeps the normal cadence. n is re-read every attempt, so a worker that
+    joins or dies re-spreads the others.
+  - Shared stop: the first worker whose capture shows new data records it for the event. The
+    others see it within SIGNAL_CHECK_SECONDS, even mid-wait, and stop.
+  - Shared store: snapshots go into the same database, plus one capture row per poll. Pages are
+    told apart by their normalised content (see snapshot_store.normalize_snapshot), and the first
+    capture of each distinct page is kept as the raw response body, zlib-compressed.
+    The asset cache is already content-addressed and merges its manifest across processes.
+  - Each worker past slot 0 keeps its own session cache file, so no two share an ASP.NET session.
+
+    PIS_COORDINATE=1 python test_bot.py &   (as many times as wanted)
+    python coordination.py status [db]       workers, events and capture counts
+    python coordination.py extract [db] [dir] writes every stored page, as received, to <sha256>.html
+"""
+import hashlib
+import math
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+from portal_clock import greek_now
+from snapshot_store import normalize_snapshot
+
+COORDINATE_ENABLED = os.environ.get("PIS_COORDINATE", "0").strip().lower() in ("1", "true", "yes", "on")
+COORDINATION_DB = os.environ.get("PIS_COORDINATION_DB", "coordination.sqlite3")
+HEARTBEAT_SECONDS = 2.0
+STALE_AFTER_SECONDS = 10.0     # A worker whose heartbeat is older than this has died; its slot is free again
+SIGNAL_CHECK_SECONDS = 0.1     # How often a waiting worker looks for another worker's new-data signal
+BUSY_TIMEOUT_SECONDS = 30
+PAGE_COMPRESSION_LEVEL = 6
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY, slot INTEGER NOT NULL, pid INTEGER, host TEXT, joined_at REAL, heartbeat REAL
+);
+CREATE TABLE IF NOT EXISTS registry (key TEXT PRIMARY KEY, value TEXT);  -- 'run': the current group of workers
+CREATE TABLE IF NOT EXISTS events (
+    event TEXT PRIMARY KEY, epoch REAL NOT NULL,
+    new_data_at REAL, new_data_worker TEXT, new_data_attempt INTEGER, run TEXT
+);  -- run: the group of workers the epoch and the new-data signal belong to
+CREATE TABLE IF NOT EXISTS pages (
+    sha256 TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER, first_worker TEXT, first_captured_at TEXT
+);  -- sha256 of the normalised page; body: its first raw capture, zlib-compressed; size: raw bytes
+CREATE TABLE IF NOT EXISTS captures (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, event TEXT, worker_id TEXT, slot INTEGER,
+    captured_at TEXT, sha256 TEXT, stored INTEGER
+);
+"""
+
+def connect(path=COORDINATION_DB):
+    """A connection to the registry (created on first use), shareable between this process's threads."""
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    if "run" not in {row[1] for row in conn.execute("PRAGMA table_info(events)")}:
+        try:
+            conn.execute("ALTER TABLE events ADD COLUMN run TEXT")  # Registry created before runs existed
+        except sqlite3.OperationalError:
+            pass  # Another process added it first
+    return conn
+
+class Coordinator:
+    """This process's membership in the worker registry: slot, phase offset and the shared new-data signal."""
+
+    def __init__(self, path=COORDINATION_DB):
+        self.path = path
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.lock = threading.Lock()  # One connection, used by the poll loop, the pipeline and the heartbeat
+        self.conn = connect(path)
+        self.slot = None
+        self.run = None
+        self.event = "default"
+        self.epoch = None
+        self.found_by = None
+        self._stop = threading.Event()
+        self._heartbeat_thread = None
+
+    # --- Membership ---
+
+    def join(self):
+        """Claims the lowest free slot and starts the heartbeat. Returns self."""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")  # Serialises slot claims between processes
+            try:
+                self.conn.execute("DELETE FROM workers WHERE heartbeat < ? OR worker_id = ?",
+                                  (now - STALE_AFTER_SECONDS, self.worker_id))
+                taken = {row[0] for row in self.conn.execute("SELECT slot FROM workers")}
+                row = self.conn.execute("SELECT value FROM registry WHERE key = 'run'").fetchone() if taken else None
+                if row is None:
+                    # First worker of a new group: whatever an earlier run left in events is not ours
+                    self.run = f"{self.worker_id}@{now:.3f}"
+                    self.conn.execute("INSERT OR REPLACE INTO registry VALUES ('run', ?)", (self.run,))
+                else:
+                    self.run = row[0]
+                self.slot = next(slot for slot in range(len(taken) + 1) if slot not in taken)
+                self.conn.execute("INSERT INTO workers VALUES (?, ?, ?, ?, ?, ?)",
+                                  (self.worker_id, self.slot, os.getpid(), socket.gethostname(), now, now))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat, name="coordination-heartbeat", daemon=True)
+        self._heartbeat_thread.start()
+        print(f"🔀 Coordinated worker: slot {self.slot} ({len(self.live_slots())} live worker(s) in {self.path}).")
+        return self
+
+    def _heartbeat(self):
+        while not self._stop.wait(HEARTBEAT_SECONDS):
+            try:
+                with self.lock:
+                    self.conn.execute("UPDATE workers SET heartbeat = ? WHERE worker_id = ?", (time.time(), self.worker_id))
+            except sqlite3.Error as e:
+                print(f"  [coordination] ⚠️ Heartbeat failed: {e}")
+
+    def live_slots(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT slot FROM workers WHERE heartbeat >= ? ORDER BY slot",
+                                     (time.time() - STALE_AFTER_SECONDS,)).fetchall()
+        return [row[0] for row in rows]
+
+    def phase(self):
+        """(rank, n): this worker's position among the live workers. Gaps left by dead workers close up."""
+        slots = self.live_slots()
+        if self.slot not in slots:
+            slots = sorted(slots + [self.slot])  # Our own heartbeat is late; we are obviously still alive
+        return slots.index(self.slot), len(slots)
+
+    def leave(self):
+        """Frees the slot right away (rather than after STALE_AFTER_SECONDS) and closes the registry."""
+        self._stop.set()
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.join(HEARTBEAT_SECONDS)
+        try:
+            with self.lock:
+                self.conn.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+                self.conn.close()
+        except sqlite3.Error as e:
+            print(f"  [coordination] ⚠️ Could not leave the registry: {e}")
+
+    # --- Event and phase ---
+
+    def arm(self, event):
+        """Names the event the next Phase 3 belongs to (any string all workers agree on, e.g. its ISO time)."""
+        self.event = str(event)
+        self.epoch = None
+        self.found_by = None
+
+    def start_polling(self):
+        """Phase 3 begins: the first worker of this run to get here fixes the event's epoch for everyone."""
+        with self.lock:
+            # A row from an earlier run of the same event is taken over, its new-data signal cleared
+            self.conn.execute(
+                "INSERT INTO events (event, epoch, run) VALUES (?, ?, ?) ON CONFLICT (event) DO UPDATE SET "
+                "epoch = excluded.epoch, run = excluded.run, new_data_at = NULL, new_data_worker = NULL, "
+                "new_data_attempt = NULL WHERE events.run IS NOT excluded.run",
+                (self.event, time.time(), self.run),
+            )
+            self.epoch = self.conn.execute("SELECT epoch FROM events WHERE event = ?", (self.event,)).fetchone()[0]
+
+    def align(self, delay, interval):
+        """
+        Moves a poll due in `delay` seconds onto this worker's lane, epoch + (i + rank/n) * interval.
+        The lane point chosen is at most half an interval before the target and, unless the policy
+        asked for an immediate poll, about half an interval after now or later, so a worker never
+        polls twice in one interval. Returns the new delay.
+        """
+        rank, n = self.phase()
+        if n <= 1 or interval <= 0 or self.epoch is None:
+            return delay
+        now = time.time()
+        # Half the spacing between neighbouring lanes of slack, so a worker that starts a few ms
+        # after the epoch still takes its first lane point rather than skipping a whole interval
+        earliest = max(now + min(delay, interval / 2), now + delay - interval / 2) - interval / (2 * n)
+        offset = self.epoch + rank / n * interval
+        lane_point = offset + math.ceil((earliest - offset) / interval) * interval
+        return max(0.0, lane_point - now)
+
+    # --- New-data signal ---
+
+    def publish_new_data(self, attempt):
+        """Records that this worker saw new data (only the first report per event counts)."""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE events SET new_data_at = ?, new_data_worker = ?, new_data_attempt = ? "
+                "WHERE event = ? AND run = ? AND new_data_at IS NULL",
+                (time.time(), self.worker_id, attempt, self.event, self.run),
+            )
+        print(f"  [coordination] 🔀 Told the other workers about the new data (attempt {attempt}).")
+
+    def new_data_handler(self):
+        """A CapturePipeline on_new_data callback that publishes the signal."""
+        def on_new_data(attempt, fetched_at, applications):
+            self.publish_new_data(attempt)
+        return on_new_data
+
+    def found_elsewhere(self):
+        """The worker id that saw new data for this event first, if that was another worker; else None."""
+        if self.found_by is None:
+            with self.lock:
+                row = self.conn.execute("SELECT new_data_worker FROM events WHERE event = ? AND run = ?",
+                                        (self.event, self.run)).fetchone()
+            self.found_by = row[0] if row else None
+        return self.found_by if self.found_by not in (None, self.worker_id) else None
+
+    def sleep(self, seconds):
+        """Sleeps, waking early when another worker reports new data. Returns False in that case."""
+        deadline = time.monotonic() + seconds
+        while True:
+            if self.found_elsewhere():
+                return False
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return True
+            time.sleep(min(left, SIGNAL_CHECK_SECONDS))
+
+    def report(self):
+        rank, n = self.phase()
+        print("\n--- Coordination ---")
+        print(f"  Worker {self.worker_id}: slot {self.slot}, phase {rank + 1}/{n}")
+        found = "this worker" if self.found_by == self.worker_id else (self.found_by or "nobody yet")
+        print(f"  New data for '{self.event}' first seen by: {found}")
+
+def open_coordinator():
+    """A joined Coordinator, or None when coordination is off."""
+    return Coordinator().join() if COORDINATE_ENABLED else None
+
+# --- Shared snapshot store ---
+
+class SharedCaptureStore:
+    """
+    SnapshotStore stand-in for coordinated workers: every distinct page is stored once in the
+    registry database, however many workers captured it; every capture gets a row. Normalising
+    only decides what counts as distinct: the stored body is the raw bytes the portal sent.
+    """
+
+    def __init__(self, coordinator):
+        self.coordinator = coordinator
+        self.stored = 0
+        self.duplicates = 0
+        self.bytes_in = 0
+
+    def save_snapshot(self, page_html, output_dir="", captured_at=None):
+        """Same contract as test_bot.save_snapshot (output_dir is unused). Returns a short description."""
+        if isinstance(page_html, bytes):
+            raw, page_html = page_html, page_html.decode("utf-8", errors="replace")
+        else:
+            raw = page_html.encode("utf-8")
+        sha = hashlib.sha256(normalize_snapshot(page_html).encode("utf-8")).hexdigest()
+        captured_at = captured_at or greek_now().isoformat(timespec="milliseconds")
+        coordinator = self.coordinator
+        with coordinator.lock:
+            cursor = coordinator.conn.execute(
+                "INSERT OR IGNORE INTO pages VALUES (?, ?, ?, ?, ?)",
+                (sha, zlib.compress(raw, PAGE_COMPRESSION_LEVEL), len(raw), coordinator.worker_id, captured_at),
+            )
+            stored = cursor.rowcount == 1
+            coordinator.conn.execute(
+                "INSERT INTO captures (event, worker_id, slot, captured_at, sha256, stored) VALUES (?, ?, ?, ?, ?, ?)",
+                (coordinator.event, coordinator.worker_id, coordinator.slot, captured_at, sha, int(stored)),
+            )
+        self.bytes_in += len(raw)
+        if stored:
+            self.stored += 1
+        else:
+            self.duplicates += 1
+        return f"{coordinator.path}#{sha[:12]} ({'new page' if stored else 'already stored'})"
+
+    def report(self):
+        print(f"  Shared capture store: {self.stored} new page(s), {self.duplicates} already stored by this or "
+              f"another worker ({self.bytes_in / 1024:.0f} KiB captured)")
+
+    def close(self):
+        pass  # The connection belongs to the Coordinator
+
+# --- Command line ---
+
+def print_status(path):
+    conn = connect(path)
+    now = time.time()
+    print(f"--- Workers in {path} ---")
+    for worker_id, slot, heartbeat in conn.execute("SELECT worker_id, slot, heartbeat FROM workers ORDER BY slot"):
+        state = "live" if heartbeat >= now - STALE_AFTER_SECONDS else "stale"
+        print(f"  slot {slot}: {worker_id} ({state}, heartbeat {now - heartbeat:.1f} s ago)")
+    print("--- Events ---")
+    for event, epoch, found_at, found_by, attempt in conn.execute(
+            "SELECT event, epoch, new_data_at, new_data_worker, new_data_attempt FROM events ORDER BY epoch"):
+        found = f"new data +{found_at - epoch:.2f} s by {found_by} (attempt {attempt})" if found_at else "no new data yet"
+        captures, workers = conn.execute("SELECT COUNT(*), COUNT(DISTINCT worker_id) FROM captures WHERE event = ?",
+                                         (event,)).fetchone()
+        print(f"  {event}: {captures} capture(s) by {workers} worker(s); {found}")
+    pages, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+    print(f"--- Stored pages: {pages} distinct ({size / 1024:.0f} KiB as received) ---")
+
+def extract_pages(path, output_dir):
+    conn = connect(path)
+    os.makedirs(output_dir, exist_ok=True)
+    count = 0
+    for sha, body in conn.execute("SELECT sha256, body FROM pages ORDER BY first_captured_at"):
+        with open(os.path.join(output_dir, f"{sha}.html"), "wb") as f:
+            f.write(zlib.decompress(body))
+        count += 1
+    print(f"Extracted {count} page(s) to {output_dir}")
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    db_path = sys.argv[2] if len(sys.argv) > 2 else COORDINATION_DB
+    if command == "status":
+        print_status(db_path)
+    elif command == "extract":
+        extract_pages(db_path, sys.argv[3] if len(sys.argv) > 3 else "coordinated_pages")
+    else:
+        print("Usage: python coordination.py status|extract [db] [output_dir]")
+        sys.exit(2)
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+Concurrent crawler for the rest of the logged-in portal.
+
+The bot itself only polls Applications.aspx. The portal's NavigationMenu also links to the
+profile form on Default.aspx (MainContent_txtAM, txtLastName, ...), NewApplication.aspx,
+Help.aspx, and each application's detail page and PDF. PortalCrawler archives all of
+them over an already logged-in requests.Session:
+
+  - every fetched page is scanned for links (html_extractors); same-origin page links are
+    normalised (see crawl_key) and queued once, up to CRAWL_MAX_DEPTH clicks from the start pages;
+  - pages are fetched by CRAWL_CONCURRENCY worker threads, and every request, pages and
+    assets alike, first takes a token from its host's TokenBucket (CRAWL_RATE_PER_HOST per second);
+  - links that would change state (logout, delete, cancel, javascript: postbacks) are never followed;
+  - a bounce to Login.aspx triggers one re-login (when a relogin callback is given) and a retry.
+
+Output, next to the bot's own:
+
+    crawl/<greek timestamp>/<path>.html   raw page bodies
+    crawl/<greek timestamp>/index.jsonl   one row per page: url, file, status, bytes, depth, latency_ms, links
+    application_assets/                   PDFs and images, through the usual AssetCache
+
+test_bot.py crawls after Phase 3 when PIS_CRAWL=1. On its own, it logs in over HTTP and crawls:
+
+    python crawler.py [start path ...]      (default: /Default.aspx /Applications.aspx)
+"""
+import json
+import os
+import posixpath
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import requests
+
+from asset_downloader import ASSET_DOWNLOAD_WORKERS, AssetDownloader
+from html_extractors import get_extractor
+from polling_policy import TokenBucket
+from portal_clock import greek_now
+from portal_html import PORTAL_BASE_URL, asset_urls_from_extract, is_logged_in
+from tracing import TRACER
+
+CRAWL_ENABLED = os.environ.get("PIS_CRAWL", "0").strip().lower() in ("1", "true", "yes", "on")
+CRAWL_DIR = "crawl"
+CRAWL_CONCURRENCY = int(os.environ.get("PIS_CRAWL_CONCURRENCY", "4"))
+CRAWL_RATE_PER_HOST = float(os.environ.get("PIS_CRAWL_RATE", "5"))  # Requests per second per host
+CRAWL_MAX_DEPTH = 3
+CRAWL_MAX_PAGES = 200
+CRAWL_TIMEOUT_SECONDS = 15
+CRAWL_ASSET_DEADLINE_SECONDS = 120  # All of the crawl's assets are one batch, so allow more than one page's
+CRAWL_START_PATHS = ("/Default.aspx", "/Applications.aspx")
+
+# Never followed: they log out, change data, or only make sense as postbacks
+EXCLUDED_LINK_RE = re.compile(r"logout|logoff|signout|delete|cancel|/account/login\.aspx", re.IGNORECASE)
+# Links to these are assets for the AssetDownloader, not pages to crawl
+ASSET_EXTENSIONS = (".pdf", ".png", ".gif", ".jpg", ".jpeg", ".doc", ".docx", ".xls", ".xlsx", ".zip")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# links: same-origin page URLs found on the page; assets: its PDF and image URLs
+CrawlResult = namedtuple("CrawlResult", "url depth status file size latency_ms links assets error")
+
+# --- URLs ---
+
+def normalize_url(href, page_url, base_url=PORTAL_BASE_URL):
+    """
+    Absolute, canonical form of a link found on page_url, or None if it leaves the portal's
+    origin or is not a plain link (javascript:, mailto:, bare #fragment). Scheme and host are
+    lower-cased, "." and ".." segments resolved, the default port and the fragment dropped,
+    and the query parameters sorted.
+    """
+    href = href.strip()
+    if not href or href.startswith("#") or href.lower().startswith(("javascript:", "mailto:", "tel:")):
+        return None
+    parts = urlsplit(urljoin(page_url, href))
+    origin = urlsplit(base_url)
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS:
+        return None
+    netloc = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS[scheme]:
+        netloc += f":{parts.port}"
+    origin_netloc = (origin.hostname or "").lower()
+    if origin.port and origin.port != _DEFAULT_PORTS.get(origin.scheme.lower()):
+        origin_netloc += f":{origin.port}"
+    if (scheme, netloc) != (origin.scheme.lower(), origin_netloc):
+        return None
+    path = posixpath.normpath(parts.path or "/")
+    if parts.path.endswith("/") and path != "/":
+        path += "/"
+    query = "&".join(sorted(p for p in parts.query.split("&") if p))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+def crawl_key(url):
+    """Dedupe key for a normalize_url() result: IIS paths are case-insensitive, so Help.aspx == help.aspx."""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path.lower(), parts.query, ""))
+
+def is_asset_url(url):
+    return urlsplit(url).path.lower().endswith(ASSET_EXTENSIONS)
+
+def page_file_name(url):
+    """File name for a crawled page: its path and query with everything but letters, digits, '.' and '-' as '_'."""
+    parts = urlsplit(url)
+    name = parts.path.strip("/") + (f"?{parts.query}" if parts.query else "")
+    return (re.sub(r"[^\w.-]+", "_", name, flags=re.ASCII).strip("_") or "index") + ".html"
+
+# --- Crawler ---
+
+class PortalCrawler:
+    """Bounded-concurrency, rate-limited crawl of the logged-in portal over one requests.Session."""
+
+    def __init__(self, session, relogin=None, base_url=PORTAL_BASE_URL, output_dir=CRAWL_DIR,
+                 asset_dir="application_assets", concurrency=CRAWL_CONCURRENCY, rate_per_host=CRAWL_RATE_PER_HOST,
+                 max_depth=CRAWL_MAX_DEPTH, max_pages=CRAWL_MAX_PAGES):
+        self.session = session
+        self.relogin = relogin  # Callable returning True once the session is logged in again, or None
+        self.base_url = base_url.rstrip("/")
+        self.output_dir = os.path.join(output_dir, greek_now().strftime("%Y%m%d_%H%M%S"))
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.extractor = get_extractor()
+        self.visited = set()  # crawl_key()s of every page queued so far; only touched by the crawl() thread
+        self.asset_urls = set()
+        self.results = []
+        self.asset_results = []
+        self.relogins = 0
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+        self._login_lock = threading.Lock()
+        self._login_generation = 0
+        self._pending = set()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="crawl")
+        # Mounts a keep-alive pool on the session big enough for the crawl workers too. The crawl runs
+        # after Phase 3, so nothing is polling on this session any more
+        self.downloader = AssetDownloader(session, asset_dir, workers=max(ASSET_DOWNLOAD_WORKERS, concurrency),
+                                          batch_deadline=CRAWL_ASSET_DEADLINE_SECONDS, throttle=self.throttle,
+                                          own_pool=True)
+
+    # --- Rate limit and session ---
+
+    def throttle(self, url):
+        """Blocks until url's host has a free request token."""
+        host = urlsplit(url).netloc
+        with self._buckets_lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate_per_host, max(1, self.concurrency))
+        bucket.acquire()
+
+    def _login_again(self, seen_generation):
+        """One re-login for all workers that hit Login.aspx with the same session. Returns True if logged in."""
+        with self._login_lock:
+            if self._login_generation != seen_generation:
+                return True  # Another worker already logged in again
+            if self.relogin is None or self.relogins:
+                return False  # A second expiry within one crawl means something else is wrong
+            self.relogins += 1
+            print("  [crawl] Session expired mid-crawl; logging in again...")
+            if not self.relogin():
+                return False
+            self._login_generation += 1
+            return True
+
+    # --- Worker ---
+
+    def _get(self, url):
+        self.throttle(url)
+        return self.session.get(url, timeout=CRAWL_TIMEOUT_SECONDS)
+
+    def _fetch_page(self, url, depth):
+        started = time.perf_counter()
+        result = self._crawl_page(url, depth, started)
+        TRACER.record("crawl_page", started, url=url, status=result.status, size=result.size, error=result.error)
+        return result
+
+    def _crawl_page(self, url, depth, started):
+        try:
+            generation = self._login_generation
+            response = self._get(url)
+            if "/Account/Login.aspx" in response.url:
+                if not self._login_again(generation):
+                    return CrawlResult(url, depth, response.status_code, None, 0, None, [], [], "not logged in")
+                started = time.perf_counter()
+                response = self._get(url)
+            latency_ms = (time.perf_counter() - started) * 1000
+            body = response.content
+            if not response.ok:
+                return CrawlResult(url, depth, response.status_code, None, len(body), latency_ms, [], [],
+                                   f"HTTP {response.status_code} {response.reason}")
+            if "html" not in response.headers.get("Content-Type", "text/html"):
+                # Served something other than a page: archive it with the assets instead
+                return CrawlResult(url, depth, response.status_code, None, len(body), latency_ms, [], [url], None)
+            if "/Account/Login.aspx" in response.url or not is_logged_in(body):
+                return CrawlResult(url, depth, response.status_code, None, len(body), latency_ms, [], [], "not logged in")
+
+            file_name = os.path.join(self.output_dir, page_file_name(url))
+            with open(file_name, "wb") as f:
+                f.write(body)  # Raw bytes, as with the bot's snapshots
+
+            extract = self.extractor.extract(response.text)
+            links, assets = [], set(asset_urls_from_extract(extract, response.url))
+            for href in extract.links:
+                link = normalize_url(href, response.url, self.base_url)
+                if link is None or EXCLUDED_LINK_RE.search(link):
+                    continue
+                if is_asset_url(link):
+                    assets.add(link)
+                else:
+                    links.append(link)
+            return CrawlResult(url, depth, response.status_code, file_name, len(body), latency_ms, links, sorted(assets), None)
+        except (requests.RequestException, OSError) as e:
+            return CrawlResult(url, depth, None, None, 0, None, [], [], str(e))
+
+    # --- Frontier ---
+
+    def _enqueue(self, url, depth):
+        key = crawl_key(url)
+        if key in self.visited or depth > self.max_depth or len(self.visited) >= self.max_pages:
+            return
+        self.visited.add(key)
+        self._pending.add(self._executor.submit(self._fetch_page, url, depth))
+
+    def _write_index(self, index_file, result):
+        row = {
+            "url": result.url,
+            "file": result.file,
+            "status": result.status,
+            "bytes": result.size,
+            "depth": result.depth,
+            "fetched_at": greek_now().isoformat(timespec="milliseconds"),
+            "latency_ms": round(result.latency_ms, 1) if result.latency_ms is not None else None,
+            "links": len(result.links),
+            "error": result.error,
+        }
+        index_file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def crawl(self, start_paths=CRAWL_START_PATHS):
+        """Crawls from start_paths (relative to base_url), then downloads every asset found. Returns the CrawlResults."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        started = time.monotonic()
+        print(f"\n--- Crawling the portal ({self.concurrency} workers, {self.rate_per_host:g} req/s per host) ---")
+        with TRACER.span("crawl"), open(os.path.join(self.output_dir, "index.jsonl"), "w", encoding="utf-8") as index_file:
+            for path in start_paths:
+                url = normalize_url(path, self.base_url + "/", self.base_url)
+                if url is not None:
+                    self._enqueue(url, 0)
+            while self._pending:
+                done, self._pending = wait(self._pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    self.results.append(result)
+                    self._write_index(index_file, result)
+                    if result.error is not None:
+                        print(f"  [crawl] ❌ {result.url}: {result.error}")
+                    self.asset_urls.update(result.assets)
+                    for link in result.links:
+                        self._enqueue(link, result.depth + 1)
+            pages_seconds = time.monotonic() - started
+            self.asset_results = self.downloader.download_all(sorted(self.asset_urls))
+        self.report(pages_seconds, time.monotonic() - started)
+        return self.results
+
+    def report(self, pages_seconds, wall_seconds):
+        ok = [r for r in self.results if r.error is None and r.file is not None]
+        total_bytes = sum(r.size for r in ok)
+        serial_ms = sum(r.latency_ms for r in self.results if r.latency_ms is not None)
+        assets_ok = sum(1 for r in self.asset_results if r.error is None)
+        print("\n--- Crawl ---")
+        print(f"  Pages: {len(ok)}/{len(self.results)} saved to {self.output_dir} ({total_bytes / 1024:.0f} KiB) "
+              f"in {pages_seconds * 1000:.0f} ms; one at a time would be ~{serial_ms:.0f} ms")
+        print(f"  Assets: {assets_ok}/{len(self.asset_results)}; total crawl time {wall_seconds:.2f} s"
+              + (f"; re-logins: {self.relogins}" if self.relogins else ""))
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.downloader.close()
+
+def crawl_portal(session, relogin=None, start_paths=CRAWL_START_PATHS, **kwargs):
+    """Crawls the portal over a logged-in session and closes the crawler. Returns the PortalCrawler."""
+    crawler = PortalCrawler(session, relogin, **kwargs)
+    try:
+        crawler.crawl(start_paths)
+    finally:
+        crawler.close()
+    return crawler
+
+if __name__ == "__main__":
+    import sys
+
+    # Imported here so importing crawler.py never pulls in the bot (and Playwright)
+    from test_bot import BotRun, close_run, load_credentials, prepare_http_run
+
+    username, password = load_credentials()
+    run = BotRun(username, password)
+    try:
+        if prepare_http_run(run):
+            crawl_portal(run.portal.session, run.portal.login, tuple(sys.argv[1:]) or CRAWL_START_PATHS)
+    finally:
+        close_run(run)
+        TRACER.export()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Upcoming application-opening events, read from a JSON config instead of code constants.
+
+events.json (or the file named by PIS_EVENTS_FILE) holds a list of events:
+
+    [
+      {"name": "July round", "at": "2025-07-29T14:00:00"},
+      {"name": "September round", "at": "2025-09-16T10:00:00+03:00"},
+      {"name": "Unannounced", "at": null}
+    ]
+
+"at" is ISO 8601 in Greek time unless it carries an offset. An event without "at" has no
+scheduled time and only fires on a manual trigger (see standby.py).
+"""
+import json
+import os
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from portal_clock import GREEK_TZ
+
+EVENTS_FILE = os.environ.get("PIS_EVENTS_FILE", "events.json")
+EVENT_GRACE_SECONDS = 60  # An event that started less than this long ago is still worth running
+
+Event = namedtuple("Event", "name at")  # at: timezone-aware datetime (Greek time), or None for trigger-only
+
+def parse_event_time(value):
+    """An ISO 8601 string as a Greek-time datetime; naive values are taken to be Greek time."""
+    target = datetime.fromisoformat(value)
+    return target.replace(tzinfo=GREEK_TZ) if target.tzinfo is None else target.astimezone(GREEK_TZ)
+
+def load_events(path=EVENTS_FILE):
+    """Events from the config file, scheduled ones by time and trigger-only ones last. [] if there is no file."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        raw_events = json.load(f)
+    events = []
+    for i, raw in enumerate(raw_events, start=1):
+        at = raw.get("at")
+        events.append(Event(raw.get("name") or f"event_{i:02d}", parse_event_time(at) if at else None))
+    return sorted(events, key=lambda e: (e.at is None, e.at.timestamp() if e.at else 0))
+
+def upcoming_events(events, now=None, grace_seconds=EVENT_GRACE_SECONDS):
+    """The events that have not passed yet (trigger-only events always count as upcoming)."""
+    now = time.time() if now is None else now
+    return [e for e in events if e.at is None or e.at.timestamp() > now - grace_seconds]
+
+def next_scheduled_event(path=EVENTS_FILE):
+    """The first upcoming event with a scheduled time, or None."""
+    return next((e for e in upcoming_events(load_events(path)) if e.at is not None), None)
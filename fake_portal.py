@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for myrequests.pis.gr, for exercising the bot without touching the live portal.
+
+What it mimics:
+  - Account/Login.aspx with the real ctl00$MainContent$LoginUser$* field names and the ASP.NET
+    hidden fields; the posted __VIEWSTATE must be one the server issued (round-trip check)
+  - the .ASPXAUTH cookie, with sessions that expire after session_ttl seconds
+  - the HeadLoginView_HeadLoginName / HeadLoginView_HeadLoginStatus ("Έξοδος") header
+  - Applications.aspx: an empty MainContent_gvApplications grid until opens_at, then a
+    "ΝΕΑ ΑΙΤΗΣΗ" row with a PDF link and a link to its ApplicationDetails.aspx page
+  - the NavigationMenu of logged-in pages and the pages it links to (profile form on
+    Default.aspx, ChangePassword, NewApplication, Help), for crawler.py
+  - injectable latency, slow-thread stalls and 503 errors, ETag/304 on assets, and a Date header on every response
+
+Use it in-process (FakePortal(...).start(), see benchmark_portal.py) or from the command line:
+
+    python fake_portal.py --port 8800 --opens-in 30 --latency-ms 80 --error-rate 0.05
+
+then run the bot against it with PIS_PORTAL_BASE_URL=http://127.0.0.1:8800.
+"""
+import argparse
+import base64
+import hashlib
+import html
+import os
+import random
+import secrets
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+from portal_clock import GREEK_TZ
+from portal_html import (
+    LOGIN_BUTTON_FIELD,
+    LOGIN_PASSWORD_FIELD,
+    LOGIN_USERNAME_FIELD,
+    LOGOUT_TEXT,
+)
+
+FAKE_USERNAME = "demo"
+FAKE_PASSWORD = "demo"
+FAKE_DISPLAY_NAME = "ΔΟΚΙΜΑΣΤΙΚΟΣ ΧΡΗΣΤΗΣ"
+AUTH_COOKIE_NAME = ".ASPXAUTH"
+VIEWSTATE_BYTES = 30000            # ~40 KB once base64-encoded, like the real pages
+ISSUED_VIEWSTATE_LIMIT = 1000
+APPLICATION_NUMBER = 1234
+
+# Tiny but valid binary bodies for the assets the real pages reference
+PNG_BYTES = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+GIF_BYTES = base64.b64decode("R0lGODlhAQABAIAAAP///wAAACH5BAEAAAAALAAAAAABAAEAAAICRAEAOw==")
+PDF_TEMPLATE = (
+    "%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    "2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    "3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 595 842]>>endobj\n"
+    "trailer<</Root 1 0 R>>\n%%EOF\n% {label}\n"
+)
+
+STATIC_FILES = {
+    "/Assets/Images/header.png": ("image/png", PNG_BYTES),
+    "/Styles/images/calendar.gif": ("image/gif", GIF_BYTES),
+    "/Styles/Site.css": ("text/css", b".page{width:960px}.header{position:relative}.main{padding:0 12px}\n"),
+    "/Styles/ui-lightness/jquery-ui-1.8.5.custom.css": ("text/css", b".ui-datepicker{display:none}\n"),
+    "/Scripts/jquery.ui.datepicker-el.js": ("application/javascript", b"/* datepicker el */\n"),
+    "/WebResource.axd": ("application/javascript", b"function WebForm_OnSubmit(){return true;}\n"),
+    "/Docs/odigies.pdf": ("application/pdf", PDF_TEMPLATE.format(label="odigies").encode("ascii")),
+}
+
+# The real pages pull jQuery from public CDNs; keep that so fast reload mode has something to block
+THIRD_PARTY_SCRIPTS = (
+    '<script src="//ajax.googleapis.com/ajax/libs/jquery/1.9.1/jquery.min.js"></script>\n'
+    '<script src="https://code.jquery.com/ui/1.12.0/jquery-ui.js" crossorigin="anonymous"></script>\n'
+)
+
+class FakePortal:
+    """In-process fake portal server. start() runs it on a daemon thread and returns self."""
+
+    def __init__(self, host="127.0.0.1", port=0, opens_at=None, latency_ms=0.0, latency_jitter_ms=0.0,
+                 error_rate=0.0, session_ttl=600.0, username=FAKE_USERNAME, password=FAKE_PASSWORD,
+                 third_party_scripts=True, seed=None, slow_rate=0.0, slow_ms=0.0):
+        """
+        opens_at: epoch seconds when applications appear (None: already open)
+        latency_ms / latency_jitter_ms: added before every response (uniform jitter on top)
+        slow_rate / slow_ms: fraction of responses stalled by an extra slow_ms (a stuck server thread)
+        error_rate: fraction of Applications.aspx requests answered with 503
+        session_ttl: seconds an .ASPXAUTH session stays valid
+        """
+        self.opens_at = opens_at
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.error_rate = error_rate
+        self.session_ttl = session_ttl
+        self.username = username
+        self.password = password
+        self.third_party_scripts = third_party_scripts
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.sessions = {}                                    # token -> expiry (epoch)
+        self.issued_viewstates = deque(maxlen=ISSUED_VIEWSTATE_LIMIT)
+        self.stats = Counter()
+        self.bytes_sent = 0
+        self.first_open_response_at = None                   # When a page with the new row was first served
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def is_open(self, now=None):
+        return self.opens_at is None or (now or time.time()) >= self.opens_at
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-portal", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # --- State ---
+
+    def new_viewstate(self):
+        value = base64.b64encode(os.urandom(VIEWSTATE_BYTES)).decode("ascii")
+        with self.lock:
+            self.issued_viewstates.append(value)
+        return value
+
+    def viewstate_was_issued(self, value):
+        with self.lock:
+            return value in self.issued_viewstates
+
+    def new_session(self):
+        token = secrets.token_hex(32)
+        with self.lock:
+            self.sessions[token] = time.time() + self.session_ttl
+        return token
+
+    def session_valid(self, token):
+        with self.lock:
+            expiry = self.sessions.get(token)
+            if expiry is None:
+                return False
+            if expiry < time.time():
+                del self.sessions[token]
+                self.stats["sessions expired"] += 1
+                return False
+            return True
+
+    def expire_all_sessions(self):
+        """Drops every session, e.g. to exercise the bot's re-login path."""
+        with self.lock:
+            self.sessions.clear()
+
+    def record(self, key, sent_bytes=0):
+        with self.lock:
+            self.stats[key] += 1
+            self.bytes_sent += sent_bytes
+
+    def simulated_delay(self):
+        with self.lock:
+            delay_ms = self.latency_ms + self.rng.uniform(0, self.latency_jitter_ms)
+            if self.slow_rate > 0 and self.rng.random() < self.slow_rate:
+                delay_ms += self.slow_ms
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+
+    def should_fail(self):
+        with self.lock:
+            return self.error_rate > 0 and self.rng.random() < self.error_rate
+
+    def report(self):
+        print("\n--- Fake portal requests ---")
+        with self.lock:
+            for key, count in sorted(self.stats.items()):
+                print(f"  {key}: {count}")
+            print(f"  Bytes sent: {self.bytes_sent / 1024:.0f} KiB")
+
+# Logged-in pages only; the real menu is an ASP.NET Menu control with these entries
+NAVIGATION_MENU = (
+    '<div class="menu" id="NavigationMenu" style="float: left;">\n<ul class="level1 static" role="menubar">\n'
+    '<li role="menuitem" class="static"><a class="level1 static" href="/Default.aspx">Αρχικη</a></li>'
+    '<li role="menuitem" class="static"><a class="level1 static" href="/Account/ChangePassword.aspx">Αλλαγή Κωδικού</a></li>'
+    '<li role="menuitem" class="static"><a class="level1 static" href="/NewApplication.aspx">Νέα Αίτηση</a></li>'
+    '<li role="menuitem" class="static"><a class="level1 static" href="/Applications.aspx">Αιτήσεις</a></li>'
+    '<li role="menuitem" class="static"><a class="level1 static" href="/Help.aspx">Οδηγίες Συμπλήρωσης Αίτησης</a></li>\n'
+    '</ul>\n</div><div style="clear: left;"></div>\n'
+)
+
+PROFILE_FORM = (
+    '<div class="demo">\n<table cellpadding="5" cellspacing="5" width="700px">\n'
+    '<tr><td><span class="UILabel">ΑΜΚΑ:</span></td>'
+    '<td><input name="ctl00$MainContent$txtAM" type="text" value="17080001369" id="MainContent_txtAM"></td></tr>\n'
+    '<tr><td><span class="UILabel">ΕΠΩΝΥΜΟ:</span></td>'
+    '<td><input name="ctl00$MainContent$txtLastName" type="text" value="ΔΟΚΙΜΑΣΤΙΚΟΣ" id="MainContent_txtLastName"></td></tr>\n'
+    '<tr><td><span class="UILabel">ΟΝΟΜΑ:</span></td>'
+    '<td><input name="ctl00$MainContent$txtFirstName" type="text" value="ΧΡΗΣΤΗΣ" id="MainContent_txtFirstName"></td></tr>\n'
+    '</table>\n</div>'
+)
+
+# path (lower-case) -> (title, action, main_html) for the plain logged-in pages behind the menu
+MENU_PAGES = {
+    "/account/changepassword.aspx": (
+        "Αλλαγή Κωδικού", "./ChangePassword.aspx",
+        '<h2>Αλλαγή Κωδικού</h2>\n<input name="ctl00$MainContent$ChangeUserPassword$CurrentPassword" type="password">',
+    ),
+    "/newapplication.aspx": (
+        "Νέα Αίτηση", "./NewApplication.aspx",
+        '<h2>Νέα Αίτηση</h2>\n<p><a href="/Help.aspx#tab2">Οδηγίες</a></p>\n' + PROFILE_FORM,
+    ),
+    "/help.aspx": (
+        "Οδηγίες", "./Help.aspx",
+        '<h2>Οδηγίες Συμπλήρωσης Αίτησης</h2>\n<p><a href="/Docs/odigies.pdf">Οδηγίες χρήσης (PDF)</a></p>',
+    ),
+}
+
+# --- Page rendering ---
+
+def _hidden_fields(portal):
+    return (
+        '<div class="aspNetHidden">\n'
+        '<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="">\n'
+        '<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="">\n'
+        f'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{portal.new_viewstate()}">\n'
+        '</div>\n'
+    )
+
+def _validation_fields(portal):
+    event_validation = base64.b64encode(os.urandom(256)).decode("ascii")
+    return (
+        '<div class="aspNetHidden">\n'
+        '\t<input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="CA0B0334">\n'
+        f'\t<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{event_validation}">\n'
+        '</div>\n'
+    )
+
+def render_page(portal, title, action, main_html, logged_in):
+    """A page laid out like the portal's Site.master (header, login view, main, footer)."""
+    if logged_in:
+        login_view = (
+            f'Καλώς ήλθατε <span class="bold"><span id="HeadLoginView_HeadLoginName">{FAKE_DISPLAY_NAME}</span></span>!\n'
+            f'[ <a id="HeadLoginView_HeadLoginStatus" href="javascript:__doPostBack(\'ctl00$HeadLoginView$HeadLoginStatus$ctl00\',\'\')">{LOGOUT_TEXT}</a> ]'
+        )
+    else:
+        login_view = '[ <a href="Account/Login.aspx" id="HeadLoginView_HeadLoginStatus">Είσοδος</a> ]'
+    return (
+        '<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Strict//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-strict.dtd">'
+        '<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en"><head><title>\n\t' + title + '\n</title>'
+        '<link href="/Styles/Site.css" rel="stylesheet" type="text/css">'
+        '<link href="/Styles/ui-lightness/jquery-ui-1.8.5.custom.css" rel="stylesheet" type="text/css">\n'
+        + (THIRD_PARTY_SCRIPTS if portal.third_party_scripts else '')
+        + '<script src="/Scripts/jquery.ui.datepicker-el.js" type="text/javascript"></script>\n'
+        '</head>\n<body>\n<div class="page">\n'
+        f'<form method="post" action="{action}" id="Form1">\n'
+        + _hidden_fields(portal)
+        + '<script src="/WebResource.axd?d=fake&amp;t=638563379773552689" type="text/javascript"></script>\n'
+        + _validation_fields(portal)
+        + '<div class="header">\n<div class="title"><img src="/Assets/Images/header.png" width="135px" height="90px"></div>\n'
+        f'<div class="loginDisplay">\n{login_view}\n</div>\n'
+        + (NAVIGATION_MENU if logged_in else '')
+        + '</div>\n'
+        f'<div class="main">\n{main_html}\n</div>\n'
+        '</form>\n</div>\n<div class="footer">\n</div>\n</body></html>'
+    )
+
+def render_login(portal, message=""):
+    error = f'<span class="failureNotification">{html.escape(message)}</span>\n' if message else ""
+    main_html = (
+        '<h2>Είσοδος</h2>\n'
+        '<p><a href="/Docs/odigies.pdf">Οδηγίες χρήσης (PDF)</a></p>\n'
+        + error
+        + f'<input name="{LOGIN_USERNAME_FIELD}" type="text" id="MainContent_LoginUser_UserName" class="textEntry">\n'
+        f'<input name="{LOGIN_PASSWORD_FIELD}" type="password" id="MainContent_LoginUser_Password" class="passwordEntry">\n'
+        '<input id="MainContent_LoginUser_RememberMe" type="checkbox" name="ctl00$MainContent$LoginUser$RememberMe">\n'
+        f'<input type="submit" name="{LOGIN_BUTTON_FIELD}" value="Είσοδος" id="MainContent_LoginUser_LoginButton">\n'
+        '<img src="/Styles/images/calendar.gif" alt="">\n'
+    )
+    return render_page(portal, "Είσοδος", "./Login.aspx", main_html, logged_in=False)
+
+def render_applications(portal, now):
+    if not portal.is_open(now):
+        grid = (
+            '<table cellspacing="0" rules="all" border="1" id="MainContent_gvApplications" style="border-collapse:collapse;">\n'
+            '<tr><td colspan="5">Δεν υπάρχουν αιτήσεις.</td></tr>\n</table>'
+        )
+    else:
+        submitted = datetime.fromtimestamp(portal.opens_at or now, GREEK_TZ).strftime("%d/%m/%Y %H:%M:%S")
+        grid = (
+            '<table class="grid" cellspacing="0" rules="all" border="1" id="MainContent_gvApplications" style="border-collapse:collapse;">\n'
+            '<tr><th scope="col">Α/Α</th><th scope="col">Αριθμός Αίτησης</th><th scope="col">Ημ/νία Υποβολής</th>'
+            '<th scope="col">Κατάσταση</th><th scope="col">&nbsp;</th></tr>\n'
+            f'<tr><td>1</td><td>{APPLICATION_NUMBER}</td><td>{submitted}</td><td>ΝΕΑ ΑΙΤΗΣΗ</td>'
+            f'<td><a href="ApplicationDetails.aspx?id={APPLICATION_NUMBER}">Προβολή</a> '
+            f'<a href="Reports/application_{APPLICATION_NUMBER}.pdf">Εκτύπωση</a></td></tr>\n</table>'
+        )
+    main_html = f'<h2>Οι αιτήσεις μου</h2>\n<div>\n{grid}\n</div>\n<img src="/Styles/images/calendar.gif" alt="">'
+    return render_page(portal, "Αιτήσεις", "./Applications.aspx", main_html, logged_in=True)
+
+def render_application_details(portal, application_id):
+    main_html = (
+        f'<h2>Αίτηση {html.escape(application_id)}</h2>\n'
+        '<table id="MainContent_dvApplication"><tr><td>Κατάσταση</td><td>ΝΕΑ ΑΙΤΗΣΗ</td></tr></table>\n'
+        f'<p><a href="Reports/application_{html.escape(application_id)}.pdf">Εκτύπωση</a> '
+        '<a href="Applications.aspx">Πίσω</a></p>'
+    )
+    return render_page(portal, "Αίτηση", f"./ApplicationDetails.aspx?id={quote(application_id)}", main_html, logged_in=True)
+
+# --- HTTP handler ---
+
+def _make_handler(portal):
+    class FakePortalHandler(BaseHTTPRequestHandler):
+        server_version = "Microsoft-IIS/8.5"
+        sys_version = ""
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass  # Quiet; FakePortal.report() summarises the traffic
+
+        # --- Helpers ---
+
+        def _auth_token(self):
+            for part in self.headers.get("Cookie", "").split(";"):
+                name, _, value = part.strip().partition("=")
+                if name == AUTH_COOKIE_NAME:
+                    return value
+            return None
+
+        def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None, key=None):
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "private")
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+            portal.record(f"{self.command} {key or urlsplit(self.path).path} {status}", len(body))
+
+        def _redirect(self, location, headers=None):
+            self._send(302, f'<html><body>Object moved to <a href="{location}">here</a>.</body></html>',
+                       headers={"Location": location, **(headers or {})})
+
+        def _send_asset(self, content_type, body, key):
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, b"", content_type, {"ETag": etag}, key)
+            else:
+                self._send(200, body, content_type, {"ETag": etag}, key)
+
+        def _require_login(self, path):
+            token = self._auth_token()
+            if token and portal.session_valid(token):
+                return True
+            self._redirect("/Account/Login.aspx?ReturnUrl=" + quote(path, safe=""))
+            return False
+
+        # --- Routes ---
+
+        def do_HEAD(self):
+            self.do_GET()
+
+        def do_GET(self):
+            portal.simulated_delay()
+            path = urlsplit(self.path).path
+            lower = path.lower()
+            if lower in ("/", "/default.aspx"):
+                if self._require_login("/Default.aspx"):
+                    self._send(200, render_page(portal, "Home Page", "./default.aspx", PROFILE_FORM, logged_in=True))
+            elif lower == "/account/login.aspx":
+                self._send(200, render_login(portal))
+            elif lower == "/applications.aspx":
+                if not self._require_login("/Applications.aspx"):
+                    return
+                if portal.should_fail():
+                    self._send(503, "<html><body><h1>Service Unavailable</h1></body></html>")
+                    return
+                now = time.time()
+                body = render_applications(portal, now)
+                if portal.is_open(now) and portal.first_open_response_at is None:
+                    portal.first_open_response_at = now
+                self._send(200, body)
+            elif lower in MENU_PAGES:
+                if self._require_login(path):
+                    self._send(200, render_page(portal, *MENU_PAGES[lower], logged_in=True))
+            elif lower == "/applicationdetails.aspx":
+                if self._require_login(path):
+                    application_id = parse_qs(urlsplit(self.path).query).get("id", [""])[0]
+                    self._send(200, render_application_details(portal, application_id))
+            elif lower.startswith("/reports/") and lower.endswith(".pdf"):
+                if self._require_login(path):
+                    label = os.path.basename(path)
+                    self._send_asset("application/pdf", PDF_TEMPLATE.format(label=label).encode("ascii"), "/Reports/*.pdf")
+            elif path in STATIC_FILES:
+                content_type, body = STATIC_FILES[path]
+                self._send_asset(content_type, body, path)
+            else:
+                self._send(404, "<html><body><h1>404 - File or directory not found.</h1></body></html>")
+
+        def do_POST(self):
+            portal.simulated_delay()
+            path = urlsplit(self.path).path
+            length = int(self.headers.get("Content-Length") or 0)
+            form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode("utf-8"), keep_blank_values=True).items()}
+            if path.lower() != "/account/login.aspx":
+                self._send(404, "<html><body><h1>404 - File or directory not found.</h1></body></html>")
+                return
+            if not portal.viewstate_was_issued(form.get("__VIEWSTATE", "")):
+                # What ASP.NET answers when the posted view state was not produced by this server
+                self._send(500, "<html><body><h2>Validation of viewstate MAC failed.</h2></body></html>")
+                return
+            if form.get(LOGIN_USERNAME_FIELD) != portal.username or form.get(LOGIN_PASSWORD_FIELD) != portal.password:
+                portal.record("login failed")
+                self._send(200, render_login(portal, "Η σύνδεση απέτυχε. Παρακαλώ δοκιμάστε ξανά."))
+                return
+            token = portal.new_session()
+            return_url = parse_qs(urlsplit(self.path).query).get("ReturnUrl", ["/Default.aspx"])[0]
+            portal.record("login ok")
+            self._redirect(return_url if return_url.startswith("/") else "/Default.aspx",
+                           {"Set-Cookie": f"{AUTH_COOKIE_NAME}={token}; path=/; HttpOnly"})
+
+    return FakePortalHandler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the PIS portal.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--opens-in", type=float, default=None, help="seconds until applications appear (default: already open)")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of Applications.aspx polls answered with 503")
+    parser.add_argument("--session-ttl", type=float, default=600.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of responses stalled by --slow-ms")
+    parser.add_argument("--slow-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    opens_at = time.time() + args.opens_in if args.opens_in is not None else None
+    fake = FakePortal(args.host, args.port, opens_at, args.latency_ms, args.jitter_ms, args.error_rate, args.session_ttl,
+                      slow_rate=args.slow_rate, slow_ms=args.slow_ms).start()
+    print(f"✅ Fake portal running at {fake.base_url} (user '{FAKE_USERNAME}' / password '{FAKE_PASSWORD}')")
+    if opens_at:
+        print(f"   Applications open at {datetime.fromtimestamp(opens_at, GREEK_TZ).strftime('%H:%M:%S')} Greek time")
+    print(f"   Run the bot with PIS_PORTAL_BASE_URL={fake.base_url}. Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        fake.report()
+        fake.stop()
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Local SMTP stand-in, for exercising the in-run notifier (notifier.py) without a real mail account.
+
+What it speaks: EHLO/HELO, AUTH PLAIN (checked against username/password), MAIL, RCPT,
+DATA, NOOP, RSET and QUIT, over plain TCP. Every accepted message is kept in memory
+(FakeSmtp.messages) and printed. With idle_timeout the server drops connections that stay
+silent that long, like real servers do, so the notifier's NOOP keepalive and reconnect
+paths can be exercised.
+
+    python fake_smtp.py --port 2525 --idle-timeout 30
+    SMTP_SECURITY=plain SMTP_SERVER=127.0.0.1 SMTP_PORT=2525 SMTP_USERNAME=demo SMTP_PASSWORD=demo python test_bot.py
+"""
+import argparse
+import base64
+import socket
+import socketserver
+import threading
+import time
+from collections import Counter, namedtuple
+from email import message_from_bytes, policy
+
+FAKE_USERNAME = "demo"
+FAKE_PASSWORD = "demo"
+
+ReceivedMessage = namedtuple("ReceivedMessage", "received_at connection sender recipients subject body")
+
+class FakeSmtp:
+    """In-process fake SMTP server. start() runs it on a daemon thread and returns self."""
+
+    def __init__(self, host="127.0.0.1", port=0, username=FAKE_USERNAME, password=FAKE_PASSWORD, idle_timeout=None):
+        self.username = username
+        self.password = password
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        self.messages = []
+        self.stats = Counter()
+        self._server = socketserver.ThreadingTCPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address[:2]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-smtp", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def record(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+    def accept(self, connection, sender, recipients, data):
+        message = message_from_bytes(data, policy=policy.default)
+        body = message.get_body(("plain",))
+        received = ReceivedMessage(time.time(), connection, sender, recipients, message["Subject"],
+                                   body.get_content() if body is not None else "")
+        with self.lock:
+            self.messages.append(received)
+            self.stats["messages"] += 1
+        print(f"  [fake-smtp] 📨 Message on connection {connection} for {', '.join(recipients)}: {received.subject}")
+
+    def report(self):
+        print("\n--- Fake SMTP ---")
+        with self.lock:
+            for key, count in sorted(self.stats.items()):
+                print(f"  {key}: {count}")
+
+def _make_handler(server):
+    class FakeSmtpHandler(socketserver.StreamRequestHandler):
+        def reply(self, line):
+            self.wfile.write((line + "\r\n").encode("utf-8"))
+
+        def read_data(self):
+            lines = []
+            for line in self.rfile:
+                if line in (b".\r\n", b".\n"):
+                    break
+                lines.append(line[1:] if line.startswith(b"..") else line)  # Undo dot-stuffing
+            return b"".join(lines)
+
+        def handle(self):
+            with server.lock:
+                server.stats["connections"] += 1
+                connection = server.stats["connections"]
+            if server.idle_timeout:
+                self.connection.settimeout(server.idle_timeout)
+            self.reply("220 fake-smtp ESMTP ready")
+            authenticated, sender, recipients = False, None, []
+            while True:
+                try:
+                    raw = self.rfile.readline()
+                except socket.timeout:
+                    server.record("idle disconnects")
+                    self.reply("421 4.4.2 Idle timeout, closing connection")
+                    return
+                if not raw:
+                    return
+                verb, _, argument = raw.decode("utf-8", errors="replace").strip().partition(" ")
+                verb = verb.upper()
+                if verb == "EHLO":
+                    self.reply("250-fake-smtp\r\n250-AUTH PLAIN\r\n250-8BITMIME\r\n250 SMTPUTF8")
+                elif verb == "HELO":
+                    self.reply("250 fake-smtp")
+                elif verb == "AUTH":
+                    mechanism, _, initial = argument.partition(" ")
+                    if mechanism.upper() != "PLAIN":
+                        self.reply("504 5.5.4 Only AUTH PLAIN is supported")
+                        continue
+                    if not initial:
+                        self.reply("334 ")
+                        initial = self.rfile.readline().decode("ascii", errors="replace").strip()
+                    try:
+                        _, user, password = base64.b64decode(initial).decode("utf-8").split("\0")
+                    except ValueError:
+                        user, password = None, None
+                    authenticated = (user, password) == (server.username, server.password)
+                    server.record("logins ok" if authenticated else "logins failed")
+                    self.reply("235 2.7.0 Authenticated" if authenticated else "535 5.7.8 Bad credentials")
+                elif verb == "MAIL":
+                    if not authenticated:
+                        self.reply("530 5.7.0 Authentication required")
+                        continue
+                    sender, recipients = argument.partition(":")[2].split()[0].strip("<>"), []
+                    self.reply("250 2.1.0 OK")
+                elif verb == "RCPT":
+                    recipients.append(argument.partition(":")[2].split()[0].strip("<>"))
+                    self.reply("250 2.1.5 OK")
+                elif verb == "DATA":
+                    if not recipients:
+                        self.reply("503 5.5.1 RCPT first")
+                        continue
+                    self.reply("354 End data with <CR><LF>.<CR><LF>")
+                    server.accept(connection, sender, recipients, self.read_data())
+                    sender, recipients = None, []
+                    self.reply("250 2.0.0 Queued")
+                elif verb in ("NOOP", "RSET"):
+                    server.record(verb.lower())
+                    if verb == "RSET":
+                        sender, recipients = None, []
+                    self.reply("250 2.0.0 OK")
+                elif verb == "QUIT":
+                    self.reply("221 2.0.0 Bye")
+                    return
+                else:
+                    self.reply("502 5.5.2 Command not implemented")
+
+    return FakeSmtpHandler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in for notifier.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--idle-timeout", type=float, default=None, help="drop connections silent for this many seconds")
+    args = parser.parse_args()
+
+    fake = FakeSmtp(args.host, args.port, idle_timeout=args.idle_timeout).start()
+    host, port = fake.address
+    print(f"✅ Fake SMTP server on {host}:{port} (user '{FAKE_USERNAME}' / password '{FAKE_PASSWORD}', no TLS)")
+    print(f"   Run the bot with SMTP_SECURITY=plain SMTP_SERVER={host} SMTP_PORT={port}. Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        fake.report()
+        fake.stop()
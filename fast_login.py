@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Login fast path for the Playwright backend: one form POST instead of a page interaction.
+
+perform_login() drives Login.aspx like a user would: goto, networkidle, two fills, a click,
+expect_navigation and networkidle again. That costs several seconds, and every re-login in the
+Phase 3 loop pays it again. FastLogin instead:
+
+  - keeps a fresh copy of the login form's hidden fields (__VIEWSTATE, __EVENTVALIDATION, ...),
+    fetched on a background thread over a plain requests.Session holding the browser's cookies;
+  - logs in by POSTing those fields plus the credentials through context.request, which
+    shares the browser's cookie jar, so the page itself is never touched;
+  - reads success from the response: the page the portal lands on must show the
+    HeadLoginView_HeadLoginName header. The POST asks for ReturnUrl=/Applications.aspx, so after a
+    mid-loop re-login the response already is the applications page.
+
+A used form is replaced right away in the background. If no form is ready, or the portal rejects
+the post, the caller falls back to the full perform_login().
+Disable with PIS_FAST_LOGIN=0.
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import quote
+
+import requests
+from playwright.sync_api import Error as PlaywrightError
+
+from http_backend import REQUEST_TIMEOUT_SECONDS, browser_cookies_from_jar, session_from_browser_cookies
+from portal_html import (
+    LOGIN_PASSWORD_FIELD,
+    LOGIN_USERNAME_FIELD,
+    PORTAL_BASE_URL,
+    is_logged_in,
+    login_form_data,
+    parse_form_action,
+)
+from tracing import TRACER
+
+FAST_LOGIN_ENABLED = os.environ.get("PIS_FAST_LOGIN", "1").strip().lower() not in ("0", "false", "no", "off")
+LOGIN_FORM_MAX_AGE_SECONDS = 600  # Older prefetched forms are fetched again rather than posted
+LOGIN_FORM_WAIT_SECONDS = 5       # How long a login waits for a prefetch that is still in flight
+RETURN_PATH = "/Applications.aspx"
+
+# fields: hidden fields + login button; cookies: what the login page's GET set (Playwright format)
+LoginForm = namedtuple("LoginForm", "fields action_url cookies fetched_at")
+
+class FastLogin:
+    """Prefetched login form for one browser context, and the one-POST login that uses it."""
+
+    def __init__(self, context, base_url=PORTAL_BASE_URL, timeout_ms=REQUEST_TIMEOUT_SECONDS * 1000,
+                 max_age_seconds=LOGIN_FORM_MAX_AGE_SECONDS):
+        self.context = context
+        self.login_url = base_url.rstrip("/") + "/Account/Login.aspx"
+        self.timeout_ms = timeout_ms
+        self.max_age_seconds = max_age_seconds
+        self.lock = threading.Lock()
+        self.fast_logins = 0
+        self.fallbacks = 0
+        self.login_ms = []
+        self._form = None
+        self._thread = None
+
+    # --- Prefetch ---
+
+    def prefetch(self):
+        """Starts fetching a fresh login form in the background (no-op while one is already on its way)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        # Playwright objects stay on this thread; the worker gets a plain copy of the cookies
+        browser_cookies = self.context.cookies()
+        self._thread = threading.Thread(target=self._fetch_form, args=(browser_cookies,),
+                                        name="login-prefetch", daemon=True)
+        self._thread.start()
+
+    def _fetch_form(self, browser_cookies):
+        session = session_from_browser_cookies(browser_cookies)
+        try:
+            with TRACER.span("login_prefetch"):
+                response = session.get(f"{self.login_url}?ReturnUrl={quote(RETURN_PATH, safe='')}",
+                                       timeout=self.timeout_ms / 1000)
+                response.raise_for_status()
+            fields = login_form_data(response.text)
+            if fields is None:
+                print("  [login] ⚠️ Prefetched login page has no __VIEWSTATE; the full login will be used.")
+                return
+            action_url = parse_form_action(response.text, response.url)
+            if "ReturnUrl=" not in action_url:
+                action_url += ("&" if "?" in action_url else "?") + f"ReturnUrl={quote(RETURN_PATH, safe='')}"
+            form = LoginForm(fields, action_url, browser_cookies_from_jar(response.cookies), time.time())
+            with self.lock:
+                self._form = form
+        except requests.RequestException as e:
+            print(f"  [login] ⚠️ Could not prefetch the login form: {e}")
+        finally:
+            session.close()
+
+    def take_form(self):
+        """The prefetched form (waiting briefly for one in flight), or None. Each form is posted once."""
+        if self._thread is not None:
+            self._thread.join(LOGIN_FORM_WAIT_SECONDS)
+        with self.lock:
+            form, self._form = self._form, None
+        if form is not None and time.time() - form.fetched_at > self.max_age_seconds:
+            return None
+        return form
+
+    # --- Login ---
+
+    def login(self, username, password):
+        """
+        Logs in with one POST of the prefetched form. Returns the APIResponse of the page the
+        portal landed on (Applications.aspx) on success, or None if the full login is needed.
+        """
+        form = self.take_form()
+        if form is None:
+            self.fallbacks += 1
+            print("  [login] No fresh login form prefetched; using the full login.")
+            self.prefetch()
+            return None
+
+        started = time.perf_counter()
+        try:
+            if form.cookies:
+                self.context.add_cookies(form.cookies)  # e.g. the ASP.NET_SessionId the form belongs to
+            data = dict(form.fields)
+            data[LOGIN_USERNAME_FIELD] = username
+            data[LOGIN_PASSWORD_FIELD] = password
+            print("Posting login form (fast path)...")
+            response = self.context.request.post(form.action_url, form=data, headers={"Referer": self.login_url},
+                                                 timeout=self.timeout_ms)
+            body = response.body()
+        except PlaywrightError as e:
+            self.fallbacks += 1
+            print(f"  [login] ⚠️ Fast login failed ({e}); using the full login.")
+            return None
+        finally:
+            self.prefetch()  # Have the next form ready before the next login is needed
+
+        if response.ok and not response.url.startswith(self.login_url) and is_logged_in(body):
+            self.fast_logins += 1
+            self.login_ms.append((time.perf_counter() - started) * 1000)
+            print(f"✅ Login successful (one form POST, {self.login_ms[-1]:.0f} ms)!")
+            return response
+        self.fallbacks += 1
+        print(f"  [login] ⚠️ Fast login not accepted (HTTP {response.status}, {response.url}); using the full login.")
+        return None
+
+    def report(self):
+        if not self.fast_logins and not self.fallbacks:
+            return
+        timing = f", {sum(self.login_ms) / len(self.login_ms):.0f} ms on average" if self.login_ms else ""
+        print("\n--- Fast login ---")
+        print(f"  One-POST logins: {self.fast_logins}{timing}; fell back to the full login: {self.fallbacks}")
+
+def open_fast_login(context):
+    """A FastLogin for the context with its first form already being fetched, or None when disabled."""
+    if not FAST_LOGIN_ENABLED:
+        return None
+    fast_login = FastLogin(context)
+    fast_login.prefetch()
+    return fast_login
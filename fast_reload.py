@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Fast reload mode for the Playwright Phase 3 loop.
+
+A normal reload of Applications.aspx also fetches Styles/Site.css, the jQuery UI
+theme, jQuery from ajax.googleapis.com / code.jquery.com and the header images,
+then "networkidle" waits for 500 ms of silence on top. None of it is needed to read
+the server-rendered table. In fast mode:
+
+  - stylesheets, fonts, images, media and scripts from other hosts are aborted
+    at the browser context (the portal's own scripts still load),
+  - a reload waits for DOMContentLoaded instead of networkidle, plus an optional
+    selector (PIS_READY_SELECTOR, e.g. "#MainContent_gvApplications"),
+  - every reload's time-to-usable-content is recorded and summarised.
+
+Select with PIS_RELOAD_MODE=fast|full (default: full).
+Asset downloads are not affected: they go through requests.Session, not the page.
+"""
+import os
+import statistics
+import time
+from collections import namedtuple
+from urllib.parse import urlparse
+
+from portal_html import PORTAL_BASE_URL
+
+RELOAD_MODE = os.environ.get("PIS_RELOAD_MODE", "full").strip().lower()
+READY_SELECTOR = os.environ.get("PIS_READY_SELECTOR", "").strip()
+
+BLOCKED_RESOURCE_TYPES = {"stylesheet", "font", "image", "media"}
+PORTAL_HOST = urlparse(PORTAL_BASE_URL).hostname
+
+# response_ms: until page.reload() returned; usable_ms: until the page could be read
+ReloadResult = namedtuple("ReloadResult", "response response_ms usable_ms")
+
+def fast_mode_enabled():
+    return RELOAD_MODE == "fast"
+
+class ResourceBlocker:
+    """Decides which requests the browser may skip, and counts what it skipped."""
+
+    def __init__(self, portal_host=PORTAL_HOST):
+        self.portal_host = portal_host
+        self.blocked = 0
+        self.allowed = 0
+
+    def should_block(self, request):
+        if request.resource_type in BLOCKED_RESOURCE_TYPES:
+            return True
+        # Third-party scripts (jQuery CDNs); the portal's own WebResource.axd scripts stay
+        return request.resource_type == "script" and urlparse(request.url).hostname != self.portal_host
+
+    def handle(self, route):
+        if self.should_block(route.request):
+            self.blocked += 1
+            route.abort()
+        else:
+            self.allowed += 1
+            route.continue_()
+
+    async def handle_async(self, route):
+        if self.should_block(route.request):
+            self.blocked += 1
+            await route.abort()
+        else:
+            self.allowed += 1
+            await route.continue_()
+
+def install_resource_blocking(context, portal_host=PORTAL_HOST):
+    """Routes every request of a (sync API) browser context through a ResourceBlocker."""
+    blocker = ResourceBlocker(portal_host)
+    context.route("**/*", blocker.handle)
+    return blocker
+
+async def install_resource_blocking_async(context, portal_host=PORTAL_HOST):
+    """Async API counterpart of install_resource_blocking."""
+    blocker = ResourceBlocker(portal_host)
+    await context.route("**/*", blocker.handle_async)
+    return blocker
+
+class ReloadTimings:
+    """Time-to-usable-content of each reload, summarised at the end of the run."""
+
+    def __init__(self, mode=RELOAD_MODE):
+        self.mode = mode
+        self.usable_ms = []
+
+    def record(self, usable_ms):
+        self.usable_ms.append(usable_ms)
+
+    def report(self, blocker=None):
+        if not self.usable_ms:
+            return
+        ordered = sorted(self.usable_ms)
+        p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+        print(f"\n--- Reload timing ({self.mode} mode, {len(ordered)} reloads) ---")
+        print(f"  Time to usable content: median {statistics.median(ordered):.0f} ms, "
+              f"mean {statistics.mean(ordered):.0f} ms, p95 {p95:.0f} ms, max {ordered[-1]:.0f} ms")
+        if blocker is not None:
+            print(f"  Requests blocked/allowed: {blocker.blocked}/{blocker.allowed}")
+
+def reload_until_usable(page, timeout_ms, timings=None):
+    """Reloads the page and waits until its content can be read, per RELOAD_MODE (sync API)."""
+    started = time.perf_counter()
+    if fast_mode_enabled():
+        response = page.reload(timeout=timeout_ms, wait_until="domcontentloaded")
+        response_ms = (time.perf_counter() - started) * 1000
+        if READY_SELECTOR:
+            page.wait_for_selector(READY_SELECTOR, state="attached", timeout=timeout_ms)
+    else:
+        response = page.reload(timeout=timeout_ms)
+        response_ms = (time.perf_counter() - started) * 1000
+        page.wait_for_load_state("networkidle", timeout=timeout_ms)
+    usable_ms = (time.perf_counter() - started) * 1000
+    if timings is not None:
+        timings.record(usable_ms)
+    return ReloadResult(response, response_ms, usable_ms)
+
+def goto_until_usable(page, url, timeout_ms):
+    """page.goto with the same readiness rule as reload_until_usable (sync API)."""
+    if fast_mode_enabled():
+        response = page.goto(url, timeout=timeout_ms, wait_until="domcontentloaded")
+        if READY_SELECTOR:
+            page.wait_for_selector(READY_SELECTOR, state="attached", timeout=timeout_ms)
+    else:
+        response = page.goto(url, timeout=timeout_ms)
+        page.wait_for_load_state("networkidle", timeout=timeout_ms)
+    return response
+
+async def reload_until_usable_async(page, timeout_ms, timings=None):
+    """Async API counterpart of reload_until_usable."""
+    started = time.perf_counter()
+    if fast_mode_enabled():
+        response = await page.reload(timeout=timeout_ms, wait_until="domcontentloaded")
+        response_ms = (time.perf_counter() - started) * 1000
+        if READY_SELECTOR:
+            await page.wait_for_selector(READY_SELECTOR, state="attached", timeout=timeout_ms)
+    else:
+        response = await page.reload(timeout=timeout_ms)
+        response_ms = (time.perf_counter() - started) * 1000
+        await page.wait_for_load_state("networkidle", timeout=timeout_ms)
+    usable_ms = (time.perf_counter() - started) * 1000
+    if timings is not None:
+        timings.record(usable_ms)
+    return ReloadResult(response, response_ms, usable_ms)
+
+async def goto_until_usable_async(page, url, timeout_ms):
+    """Async API counterpart of goto_until_usable."""
+    if fast_mode_enabled():
+        response = await page.goto(url, timeout=timeout_ms, wait_until="domcontentloaded")
+        if READY_SELECTOR:
+            await page.wait_for_selector(READY_SELECTOR, state="attached", timeout=timeout_ms)
+    else:
+        response = await page.goto(url, timeout=timeout_ms)
+        await page.wait_for_load_state("networkidle", timeout=timeout_ms)
+    return response
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+In-memory flight recorder: the last few request/response pairs, written out only when something fails.
+
+The Phase 3 error handlers used to call page.content() and write an error_page_*.html.
+That is one more slow browser call, made while the browser is already struggling, and it
+only shows the page's final state, not the responses that led up to it. The FlightRecorder
+instead keeps the last FLIGHT_RECORDER_SIZE exchanges in a bounded ring. Each entry holds the
+URL, status, request and response headers, timing and the body, zlib-compressed on a
+background thread so the polling thread only pays for a deque append. Nothing is
+written on the happy path. dump() writes one HAR-like file only when an attempt fails or the
+run ends abnormally:
+
+    flight_<greek timestamp>_<reason>.har      {"log": {"version": "1.2", "entries": [...]}}
+
+It opens in any HAR viewer (browser dev tools, har-analyzer); "_attempt" and "_note" say which
+Phase 3 attempt each exchange belongs to. Cookie values are masked and request bodies (the login
+POST carries the password) are never recorded.
+
+  - HTTP backend: attach(session) adds a requests response hook, so every response on the
+    session is recorded, redirects included. Streamed responses (assets, hedges) are recorded
+    without their body, so the hook never consumes a stream.
+  - Playwright backend: the Phase 3 loop records the navigation response it already holds.
+
+Disable with PIS_FLIGHT_RECORDER=0; PIS_FLIGHT_RECORDER_SIZE sets the ring size (default 50).
+"""
+import base64
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from collections import deque, namedtuple
+from datetime import datetime
+
+from portal_clock import GREEK_TZ, greek_now
+
+FLIGHT_RECORDER_ENABLED = os.environ.get("PIS_FLIGHT_RECORDER", "1").strip().lower() not in ("0", "false", "no", "off")
+FLIGHT_RECORDER_SIZE = int(os.environ.get("PIS_FLIGHT_RECORDER_SIZE", "50"))
+BODY_COMPRESSION_LEVEL = 1  # Fastest zlib level: the portal's pages shrink ~3x, the ViewState doesn't compress
+MASKED_HEADERS = ("cookie", "set-cookie")
+
+# started: time.time() when the request was sent; body: raw bytes until the compressor gets to it
+# (compressed=True then), or None when not recorded
+Exchange = namedtuple("Exchange", "started method url status request_headers response_headers latency_ms body compressed "
+                                  "size attempt note")
+
+def _masked(headers):
+    """HAR header list with cookie values replaced by their names."""
+    masked = []
+    for name, value in (headers or {}).items():
+        if name.lower() in MASKED_HEADERS:
+            value = "; ".join(part.split("=", 1)[0].strip() + "=…" for part in value.split(";") if "=" in part)
+        masked.append({"name": name, "value": value})
+    return masked
+
+class FlightRecorder:
+    """Bounded ring of recent exchanges; dump() turns it into a HAR file."""
+
+    def __init__(self, size=FLIGHT_RECORDER_SIZE, output_dir=""):
+        self.exchanges = deque(maxlen=size)
+        self.output_dir = output_dir
+        self.attempt = None  # Set by the Phase 3 loop; tags every exchange recorded meanwhile
+        self.dumps = []
+        self.lock = threading.Lock()
+        self._to_compress = queue.Queue()
+        self._compressor = None
+
+    # --- Recording ---
+
+    def record(self, url, status, body=None, latency_ms=None, method="GET", request_headers=None,
+               response_headers=None, started=None, note=None):
+        """Adds one exchange. body is the raw response bytes (compressed here), or None."""
+        if latency_ms is not None and started is None:
+            started = time.time() - latency_ms / 1000
+        exchange = Exchange(started or time.time(), method, url, status, dict(request_headers or {}),
+                            dict(response_headers or {}), latency_ms, body or None, False, len(body) if body else 0,
+                            self.attempt, note)
+        with self.lock:
+            self.exchanges.append(exchange)
+            if body:
+                if self._compressor is None:
+                    self._compressor = threading.Thread(target=self._compress_bodies, name="flight-recorder", daemon=True)
+                    self._compressor.start()
+                self._to_compress.put(exchange)
+
+    def _compress_bodies(self):
+        while True:
+            exchange = self._to_compress.get()
+            compressed = zlib.compress(exchange.body, BODY_COMPRESSION_LEVEL)  # Releases the GIL while it works
+            with self.lock:
+                for i, recorded in enumerate(self.exchanges):
+                    if recorded is exchange:
+                        self.exchanges[i] = exchange._replace(body=compressed, compressed=True)
+                        break  # Not found: it already fell out of the ring
+
+    def record_page_response(self, response, body, latency_ms=None, url=None, note=None):
+        """
+        Adds a Playwright Response or APIResponse whose body the caller already read.
+        Only properties Playwright holds in memory are used, so this costs no browser round-trip.
+        response may be None (e.g. a same-document reload); url then names the page.
+        """
+        if response is None:
+            self.record(url, None, body, latency_ms, note=note)
+            return
+        request = getattr(response, "request", None)  # APIResponse has none
+        self.record(url or response.url, response.status, body, latency_ms,
+                    request.method if request is not None else "GET",
+                    request.headers if request is not None else None, response.headers, note=note)
+
+    def _response_hook(self, response, stream=False, **kwargs):
+        # Runs before requests reads a non-streamed body, so .content here is the read it would do anyway
+        body = None if stream else response.content
+        latency_ms = response.elapsed.total_seconds() * 1000
+        self.record(response.url, response.status_code, body, latency_ms, response.request.method,
+                    response.request.headers, response.headers, note="streamed, body not kept" if stream else None)
+        return response
+
+    def attach(self, session):
+        """Records every response of a requests.Session from now on."""
+        session.hooks["response"].append(self._response_hook)
+
+    # --- Dump ---
+
+    def _har_entry(self, exchange):
+        content = {"size": exchange.size, "mimeType": exchange.response_headers.get("Content-Type", "")}
+        if exchange.body is not None:
+            body = zlib.decompress(exchange.body) if exchange.compressed else exchange.body
+            if content["mimeType"].startswith("text/") or "html" in content["mimeType"]:
+                content["text"] = body.decode("utf-8", errors="replace")
+            else:
+                content["text"] = base64.b64encode(body).decode("ascii")
+                content["encoding"] = "base64"
+        latency_ms = exchange.latency_ms if exchange.latency_ms is not None else -1
+        return {
+            "startedDateTime": datetime.fromtimestamp(exchange.started, GREEK_TZ).isoformat(timespec="milliseconds"),
+            "time": latency_ms,
+            "request": {
+                "method": exchange.method, "url": exchange.url, "httpVersion": "HTTP/1.1", "cookies": [],
+                "headers": _masked(exchange.request_headers), "queryString": [], "headersSize": -1, "bodySize": -1,
+            },
+            "response": {
+                "status": exchange.status or 0, "statusText": "", "httpVersion": "HTTP/1.1", "cookies": [],
+                "headers": _masked(exchange.response_headers), "content": content,
+                "redirectURL": exchange.response_headers.get("Location", ""), "headersSize": -1, "bodySize": exchange.size,
+            },
+            "cache": {},
+            "timings": {"send": 0, "wait": latency_ms, "receive": 0},
+            "_attempt": exchange.attempt,
+            "_note": exchange.note,
+        }
+
+    def dump(self, reason, error=None):
+        """
+        Writes the ring to flight_<ts>_<reason>.har and returns the file name (None if nothing
+        was recorded). The ring is kept, so a later dump still shows the history leading up to it.
+        """
+        with self.lock:
+            exchanges = list(self.exchanges)
+        if not exchanges:
+            return None
+        ts = greek_now().strftime("%Y%m%d_%H%M%S_%f")
+        fname = os.path.join(self.output_dir, f"flight_{ts}_{reason}.har")
+        har = {"log": {
+            "version": "1.2",
+            "creator": {"name": "PIS-GR Scraper flight recorder", "version": "1"},
+            "comment": f"{reason}: {error}" if error is not None else reason,
+            "pages": [],
+            "entries": [self._har_entry(exchange) for exchange in exchanges],
+        }}
+        try:
+            with open(fname, "w", encoding="utf-8") as f:
+                json.dump(har, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"  Could not write the flight recorder dump: {e}")
+            return None
+        self.dumps.append(fname)
+        print(f"  📼 Saved the last {len(exchanges)} request(s) to {fname} for inspection.")
+        return fname
+
+def open_flight_recorder(output_dir=""):
+    """A FlightRecorder for the run (dumping into output_dir), or None when disabled."""
+    return FlightRecorder(output_dir=output_dir) if FLIGHT_RECORDER_ENABLED else None
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Hedged requests for the first seconds after the opening time.
+
+Normally one poll is in flight at a time. If the poll sent at T0 reaches the portal a few
+ms before it flips, or waits behind a slow server thread, the next chance only comes one
+interval (or one timeout) later. In hedging mode each Phase 3 attempt inside the hedge
+window sends HEDGE_COUNT requests for Applications.aspx on the same session, HEDGE_STAGGER_MS
+apart. The first response that shows the post-opening content wins. Hedges that have not
+been sent yet are never sent, and those still in flight are dropped. If no hedge shows new
+content yet, the attempt ends HEDGE_GRACE_MS after the first response and keeps the earliest
+successful one, so a hedge stuck behind a slow server thread never holds up the loop.
+
+  - HTTP backend: the hedges are GETs on worker threads sharing the requests.Session.
+  - Playwright backend: the hedges are fetch() calls inside the page (same cookies, same
+    browser connection pool), and losers are cancelled with AbortController.
+
+Each hedged attempt prints which hedge won and the latency spread, and HedgeStats sums it up.
+
+Enable with PIS_HEDGE=1; PIS_HEDGE_COUNT (default 3), PIS_HEDGE_STAGGER_MS (default 25),
+PIS_HEDGE_GRACE_MS (default 100) and PIS_HEDGE_WINDOW (seconds after T0, default 5) tune it.
+"""
+import os
+import statistics
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+HEDGE_ENABLED = os.environ.get("PIS_HEDGE", "0").strip().lower() in ("1", "true", "yes", "on")
+HEDGE_COUNT = int(os.environ.get("PIS_HEDGE_COUNT", "3"))
+HEDGE_STAGGER_MS = float(os.environ.get("PIS_HEDGE_STAGGER_MS", "25"))
+HEDGE_GRACE_MS = float(os.environ.get("PIS_HEDGE_GRACE_MS", "100"))
+HEDGE_WINDOW_SECONDS = float(os.environ.get("PIS_HEDGE_WINDOW", "5"))
+
+# sent_ms: when the hedge left, relative to the first one; latency_ms: until its body was read
+HedgeAttempt = namedtuple("HedgeAttempt", "index sent_ms latency_ms status opened error")
+# winner: index of the first hedge showing post-opening content (None if none did);
+# chosen: the hedge whose response is returned (the winner, else the earliest successful one)
+HedgeOutcome = namedtuple("HedgeOutcome", "winner chosen status url headers body latency_ms attempts response")
+
+def hedging_active(opened_at, new_data_found=False, window_seconds=HEDGE_WINDOW_SECONDS):
+    """True while hedging should be used: enabled, inside the window after opened_at (time.monotonic()), no new data yet."""
+    return HEDGE_ENABLED and not new_data_found and time.monotonic() - opened_at < window_seconds
+
+def hedged_get(session, url, is_opened, count=HEDGE_COUNT, stagger_ms=HEDGE_STAGGER_MS, grace_ms=HEDGE_GRACE_MS,
+               timeout=15):
+    """
+    Sends up to `count` staggered GETs of url over session and returns a HedgeOutcome as soon as one
+    response satisfies is_opened(body bytes), or grace_ms after the first response (or once every hedge finished).
+    Raises requests.ConnectionError if no hedge got any response at all.
+    """
+    decided = threading.Event()
+    lock = threading.Lock()
+    attempts = [None] * count
+    picked = {}  # "winner" / "ok" / "any" -> (index, response)
+    started = time.perf_counter()
+
+    def hedge(i):
+        # Wait for this hedge's slot; a winner in the meantime means it is never sent
+        if i and decided.wait(i * stagger_ms / 1000):
+            attempts[i] = HedgeAttempt(i, None, None, None, False, "cancelled before sending")
+            return
+        sent = time.perf_counter()
+        attempts[i] = HedgeAttempt(i, (sent - started) * 1000, None, None, False, "abandoned in flight")
+        try:
+            with session.get(url, timeout=timeout, stream=True) as response:
+                if decided.is_set():
+                    attempts[i] = HedgeAttempt(i, (sent - started) * 1000, None, response.status_code, False, "cancelled in flight")
+                    return  # Closing the unread stream drops this connection
+                body = response.content
+            opened = response.ok and is_opened(body)
+            attempts[i] = HedgeAttempt(i, (sent - started) * 1000, (time.perf_counter() - sent) * 1000,
+                                       response.status_code, opened, None)
+            with lock:
+                if opened and "winner" not in picked:
+                    picked["winner"] = (i, response)
+                    decided.set()
+                if response.ok:
+                    picked.setdefault("ok", (i, response))
+                picked.setdefault("any", (i, response))
+        except requests.RequestException as e:
+            attempts[i] = HedgeAttempt(i, (sent - started) * 1000, None, None, False, str(e))
+
+    executor = ThreadPoolExecutor(max_workers=count, thread_name_prefix="hedge")
+    pending = {executor.submit(hedge, i) for i in range(count)}
+    grace_deadline = None
+    while pending and not decided.is_set():
+        timeout_left = None if grace_deadline is None else grace_deadline - time.perf_counter()
+        if timeout_left is not None and timeout_left <= 0:
+            break
+        _, pending = wait(pending, timeout=timeout_left, return_when=FIRST_COMPLETED)
+        with lock:
+            if grace_deadline is None and "any" in picked:
+                grace_deadline = time.perf_counter() + grace_ms / 1000
+    decided.set()  # Hedges not sent yet are skipped; late arrivals are closed unread
+    executor.shutdown(wait=False)
+
+    with lock:
+        choice = picked.get("winner") or picked.get("ok") or picked.get("any")
+        winner = picked["winner"][0] if "winner" in picked else None
+    if choice is None:
+        errors = "; ".join(a.error for a in attempts if a is not None and a.error)
+        raise requests.ConnectionError(f"Every hedge failed: {errors}")
+    index, response = choice
+    return HedgeOutcome(winner, index, response.status_code, response.url, response.headers, response.content,
+                        attempts[index].latency_ms, [a for a in list(attempts) if a is not None], response)
+
+# Runs inside the page: staggered fetch() calls, the first one with the marker aborts the others
+_BROWSER_HEDGE_JS = """
+async ({url, count, stagger, grace, marker, timeout}) => {
+  const t0 = performance.now();
+  const results = new Array(count).fill(null);
+  const controllers = [];
+  let winner = null, fallback = null, first = null, settled = 0, done = false, finish;
+  const finished = new Promise(resolve => finish = () => {
+    done = true;
+    controllers.forEach((c, j) => { if (c && !results[j]) c.abort(); });
+    resolve();
+  });
+  const settle = () => { if (++settled === count) finish(); };
+  for (let i = 0; i < count; i++) {
+    setTimeout(async () => {
+      if (done) { results[i] = {index: i, error: "cancelled before sending"}; return settle(); }
+      const controller = new AbortController();
+      controllers[i] = controller;
+      const timer = setTimeout(() => controller.abort(), timeout);
+      const sent = performance.now() - t0;
+      try {
+        const response = await fetch(url, {credentials: "same-origin", cache: "no-store", signal: controller.signal});
+        const body = await response.text();
+        const opened = response.ok && body.includes(marker);
+        results[i] = {index: i, sent, latency: performance.now() - t0 - sent, status: response.status, opened,
+                      url: response.url, date: response.headers.get("date"), body};
+        if (opened && winner === null) {
+          winner = i;
+          finish();
+        }
+        if (response.ok && fallback === null) fallback = i;
+        if (first === null) {
+          first = i;
+          setTimeout(finish, grace);  // Don't wait for hedges stuck behind a slow server thread
+        }
+      } catch (e) {
+        results[i] = {index: i, sent, error: done ? "cancelled in flight" : String(e)};
+      } finally {
+        clearTimeout(timer);
+      }
+      settle();
+    }, i * stagger);
+  }
+  await finished;
+  const chosen = winner ?? fallback ?? first;
+  const snapshot = results.map((r, i) => r ?? (controllers[i] ? {index: i, error: "abandoned in flight"} : null));
+  return {winner, chosen, results: snapshot.map(r => r && r.index !== chosen ? {...r, body: undefined} : r)};
+}
+"""
+
+def hedged_fetch_browser(page, url, marker, count=HEDGE_COUNT, stagger_ms=HEDGE_STAGGER_MS, grace_ms=HEDGE_GRACE_MS,
+                         timeout_ms=15000):
+    """
+    Browser counterpart of hedged_get: staggered fetch() calls from the page, won by the first body
+    containing marker. The page itself is not navigated. Raises playwright's Error if every hedge failed.
+    """
+    from playwright.sync_api import Error as PlaywrightError
+
+    data = page.evaluate(_BROWSER_HEDGE_JS, {"url": url, "count": count, "stagger": stagger_ms, "grace": grace_ms,
+                                             "marker": marker, "timeout": timeout_ms})
+    attempts = [
+        HedgeAttempt(i, r.get("sent"), r.get("latency"), r.get("status"), r.get("opened", False), r.get("error"))
+        for i, r in enumerate(data["results"]) if r is not None
+    ]
+    chosen = data["chosen"]
+    if chosen is None:
+        raise PlaywrightError("Every hedge failed: " + "; ".join(a.error for a in attempts if a.error))
+    result = data["results"][chosen]
+    return HedgeOutcome(data["winner"], chosen, result["status"], result["url"], {"date": result.get("date")},
+                        result["body"].encode("utf-8"), result["latency"], attempts, None)
+
+def requests_sent(outcome):
+    """How many hedges actually went out (cancelled-before-sending ones cost nothing)."""
+    return sum(1 for a in outcome.attempts if a.sent_ms is not None)
+
+def describe(outcome):
+    """One line on who won and how spread out the hedges' latencies were."""
+    latencies = [a.latency_ms for a in outcome.attempts if a.latency_ms is not None]
+    cancelled = sum(1 for a in outcome.attempts if a.error and a.error.startswith(("cancelled", "abandoned")))
+    sent = requests_sent(outcome)
+    verdict = (f"hedge {outcome.winner + 1} won with post-opening content" if outcome.winner is not None
+               else f"no post-opening content yet; kept hedge {outcome.chosen + 1}")
+    spread = f"latency spread {min(latencies):.0f}–{max(latencies):.0f} ms" if latencies else "no complete responses"
+    return f"  🔀 Hedged poll: {verdict} ({outcome.latency_ms:.0f} ms); {spread}; {sent} sent, {cancelled} cancelled"
+
+class HedgeStats:
+    """Wins per hedge and latency spreads over the run's hedged attempts."""
+
+    def __init__(self):
+        self.attempts = 0
+        self.wins = Counter()
+        self.spreads_ms = []
+
+    def record(self, outcome):
+        self.attempts += 1
+        if outcome.winner is not None:
+            self.wins[outcome.winner + 1] += 1
+        latencies = [a.latency_ms for a in outcome.attempts if a.latency_ms is not None]
+        if len(latencies) > 1:
+            self.spreads_ms.append(max(latencies) - min(latencies))
+
+    def report(self):
+        if not self.attempts:
+            return
+        print(f"\n--- Hedging ({HEDGE_COUNT} hedges, {HEDGE_STAGGER_MS:.0f} ms apart) ---")
+        wins = ", ".join(f"hedge {i}: {n}" for i, n in sorted(self.wins.items())) or "none (no post-opening content seen)"
+        print(f"  Hedged attempts: {self.attempts}; wins: {wins}")
+        if self.spreads_ms:
+            print(f"  Latency spread: median {statistics.median(self.spreads_ms):.0f} ms, max {max(self.spreads_ms):.0f} ms")
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Pluggable HTML extractors for the portal's pages.
+
+Every poll only needs three things from the page: link targets, image sources and
+the applications grid. Building a full BeautifulSoup tree for that means walking
+~190 KB of markup, 75 KB of which are the __VIEWSTATE/__EVENTVALIDATION values.
+
+Implementations (all return the same PageExtract):
+  - "soup":   BeautifulSoup + html.parser, the original reference path
+  - "lxml":   libxml2's C parser (optional dependency)
+  - "stream": a regex tokenizer that only stops at the few tags we need and jumps
+              straight over <script>/<style>/comments and the huge hidden inputs
+
+Select one with PIS_HTML_EXTRACTOR=soup|lxml|stream (default: stream).
+benchmark_extractors.py checks they agree on home_page.html and times them.
+"""
+import html
+import os
+import re
+from collections import namedtuple
+
+PageExtract = namedtuple("PageExtract", "links images applications")
+
+_TAG_NAME_RE = re.compile(r"<\s*[^\s/>]+")
+_ATTR_RE = re.compile(r"""([\w:$.-]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+))""")
+
+def parse_tag_attrs(tag):
+    """Return the attributes of a single start tag as a dict (names lower-cased, values HTML-unescaped)."""
+    attrs = {}
+    # Skip the tag name itself so "<a" is not read as an attribute
+    name_match = _TAG_NAME_RE.match(tag)
+    for match in _ATTR_RE.finditer(tag, name_match.end() if name_match else 0):
+        name = match.group(1).lower()
+        if name in attrs:
+            continue  # First occurrence wins, like browsers and html.parser
+        value = next(g for g in match.groups()[1:] if g is not None)
+        attrs[name] = html.unescape(value)
+    return attrs
+
+def normalize_text(text):
+    """Collapse all whitespace runs to single spaces (cell text comparison across extractors)."""
+    return " ".join(text.split())
+
+def is_applications_table(table_id, has_header_cells):
+    """
+    The applications grid is an ASP.NET GridView: a table with a MainContent_ id and a <th>
+    header row. Layout tables (like the profile form) have no <th>. Id-less tables are never the
+    grid: one wrapped around the GridView would also contain its <th> cells.
+    """
+    return has_header_cells and bool(table_id) and table_id.startswith("MainContent_")
+
+def rows_to_records(rows):
+    """[[header...], [cell...], ...] → [{header: cell}, ...]. Returns [] for an empty grid."""
+    if not rows:
+        return []
+    headers = rows[0]
+    return [dict(zip(headers, cells)) for cells in rows[1:] if cells]
+
+class SoupExtractor:
+    """Reference implementation on a full BeautifulSoup tree."""
+    name = "soup"
+
+    def extract(self, page_html):
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(page_html, "html.parser")
+        links = [a["href"] for a in soup.find_all("a", href=True)]
+        images = [img["src"] for img in soup.find_all("img", src=True)]
+        applications = None
+        for table in soup.find_all("table"):
+            if not is_applications_table(table.get("id"), table.find("th") is not None):
+                continue
+            rows = []
+            for tr in table.find_all("tr"):
+                cells = [normalize_text(cell.get_text(" ")) for cell in tr.find_all(["th", "td"])]
+                rows.append(cells)
+            applications = rows_to_records(rows)
+            break
+        return PageExtract(links, images, applications)
+
+class LxmlExtractor:
+    """libxml2-backed extraction; needs the optional lxml package."""
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html  # Raises ImportError when lxml is not installed
+        self._lxml_html = lxml.html
+
+    def extract(self, page_html):
+        root = self._lxml_html.fromstring(page_html)
+        links = root.xpath("//a[@href]/@href")
+        images = root.xpath("//img[@src]/@src")
+        applications = None
+        for table in root.iter("table"):
+            if not is_applications_table(table.get("id"), bool(table.xpath(".//th"))):
+                continue
+            rows = []
+            for tr in table.iter("tr"):
+                cells = [normalize_text(" ".join(cell.itertext())) for cell in tr if cell.tag in ("th", "td")]
+                rows.append(cells)
+            applications = rows_to_records(rows)
+            break
+        return PageExtract([str(v) for v in links], [str(v) for v in images], applications)
+
+class StreamingExtractor:
+    """
+    Single-pass regex tokenizer. It never materialises a tree and never looks inside
+    attribute values it does not need, so the 40 KB hidden fields cost one scan.
+    """
+    name = "stream"
+
+    # Raw-text/comment blocks are matched as a whole so tags inside them are ignored
+    _TOKEN_RE = re.compile(
+        r"<!--.*?-->"
+        r"|<script\b.*?</script\s*>"
+        r"|<style\b.*?</style\s*>"
+        r"|<(a|img|table)\b[^>]*>",
+        re.IGNORECASE | re.DOTALL,
+    )
+    _TABLE_END_RE = re.compile(r"</table\s*>", re.IGNORECASE)
+    _ROW_RE = re.compile(r"<tr\b[^>]*>(.*?)(?=<tr\b|</table\s*>|$)", re.IGNORECASE | re.DOTALL)
+    _CELL_RE = re.compile(r"<(t[hd])\b[^>]*>(.*?)(?=<t[hd]\b|</tr\s*>|$)", re.IGNORECASE | re.DOTALL)
+    _TAG_RE = re.compile(r"<[^>]*>")
+
+    def extract(self, page_html):
+        links = []
+        images = []
+        applications = None
+        for match in self._TOKEN_RE.finditer(page_html):
+            tag_name = match.group(1)
+            if tag_name is None:
+                continue  # Comment / script / style block
+            tag_name = tag_name.lower()
+            attrs = parse_tag_attrs(match.group(0))
+            if tag_name == "a":
+                if "href" in attrs:
+                    links.append(attrs["href"])
+            elif tag_name == "img":
+                if "src" in attrs:
+                    images.append(attrs["src"])
+            elif applications is None:
+                end = self._TABLE_END_RE.search(page_html, match.end())
+                table_html = page_html[match.end():end.start() if end else len(page_html)]
+                if is_applications_table(attrs.get("id"), re.search(r"<th\b", table_html, re.IGNORECASE) is not None):
+                    applications = rows_to_records(self._table_rows(table_html))
+        return PageExtract(links, images, applications)
+
+    def _cell_text(self, cell_html):
+        cell_html = re.sub(r"</t[hd]\s*>.*", "", cell_html, flags=re.IGNORECASE | re.DOTALL)
+        return normalize_text(html.unescape(self._TAG_RE.sub(" ", cell_html)))
+
+    def _table_rows(self, table_html):
+        rows = []
+        for row_match in self._ROW_RE.finditer(table_html):
+            rows.append([self._cell_text(cell.group(2)) for cell in self._CELL_RE.finditer(row_match.group(1))])
+        return rows
+
+EXTRACTORS = {
+    "soup": SoupExtractor,
+    "lxml": LxmlExtractor,
+    "stream": StreamingExtractor,
+}
+
+_default_extractor = None
+
+def get_extractor(name=None):
+    """
+    Returns an extractor instance. Without a name the PIS_HTML_EXTRACTOR setting is used
+    (default "stream"); "lxml" falls back to "stream" when lxml is not installed.
+    """
+    global _default_extractor
+    if name is None and _default_extractor is not None:
+        return _default_extractor
+
+    requested = (name or os.environ.get("PIS_HTML_EXTRACTOR", "stream")).strip().lower()
+    if requested not in EXTRACTORS:
+        raise ValueError(f"Unknown HTML extractor '{requested}'. Choose one of: {', '.join(EXTRACTORS)}")
+    try:
+        extractor = EXTRACTORS[requested]()
+    except ImportError:
+        print(f"⚠️ HTML extractor '{requested}' is not available (missing dependency); using 'stream'.")
+        extractor = StreamingExtractor()
+
+    if name is None:
+        _default_extractor = extractor
+    return extractor
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Browserless HTTP backend for the PIS portal.
+
+The portal is a server-rendered ASP.NET WebForms site, so logging in and polling
+Applications.aspx only needs the hidden form state and the .ASPXAUTH cookie.
+HttpPortalSession does both with a plain requests.Session: one round-trip per poll
+instead of a browser reload plus a networkidle wait.
+"""
+import requests
+
+from portal_html import (
+    PORTAL_BASE_URL,
+    LOGIN_USERNAME_FIELD,
+    LOGIN_PASSWORD_FIELD,
+    login_form_data,
+    parse_form_action,
+    is_logged_in,
+)
+
+REQUEST_TIMEOUT_SECONDS = 15  # Same budget as PAGE_OPERATION_TIMEOUT_MS in test_bot.py
+AUTH_COOKIE_NAME = ".ASPXAUTH"
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "el-GR,el;q=0.9,en;q=0.8",
+}
+
+class HttpPortalSession:
+    """A PIS portal session driven by plain HTTP requests instead of a browser."""
+
+    def __init__(self, username, password, base_url=PORTAL_BASE_URL, timeout=REQUEST_TIMEOUT_SECONDS):
+        self.username = username
+        self.password = password
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        self.url = None            # URL of the last page fetched (after redirects)
+        self.last_response = None  # Last requests.Response, kept for error dumps
+
+    @property
+    def login_url(self):
+        return self.base_url + "/Account/Login.aspx"
+
+    @property
+    def applications_url(self):
+        return self.base_url + "/Applications.aspx"
+
+    def has_auth_cookie(self):
+        """True if the server has handed us a forms-authentication cookie."""
+        return any(cookie.name == AUTH_COOKIE_NAME for cookie in self.session.cookies)
+
+    def fetch(self, url, **kwargs):
+        """GET a portal URL with the session cookies. Returns the requests.Response."""
+        kwargs.setdefault("timeout", self.timeout)
+        response = self.session.get(url, **kwargs)
+        self.url = response.url
+        self.last_response = response
+        return response
+
+    def fetch_applications(self):
+        """One round-trip poll of Applications.aspx."""
+        return self.fetch(self.applications_url)
+
+    def is_session_valid(self, response):
+        """True if the response is an authenticated page rather than a bounce to Login.aspx."""
+        if "/Account/Login.aspx" in response.url:
+            return False
+        return is_logged_in(response.content)  # Raw bytes: no charset detection or decode per poll
+
+    def login(self):
+        """
+        Performs the WebForms login: GET Login.aspx for __VIEWSTATE/__EVENTVALIDATION,
+        then POST them back together with the ctl00$MainContent$LoginUser$* fields.
+        Returns True when the .ASPXAUTH cookie was issued and the logged-in header is shown.
+        """
+        print("Fetching login page (HTTP backend)...")
+        try:
+            login_page = self.fetch(self.login_url)
+            login_page.raise_for_status()
+
+            form_data = login_form_data(login_page.text)
+            if form_data is None:
+                print("❌ Login page did not contain __VIEWSTATE; cannot post login form.")
+                return False
+
+            form_data[LOGIN_USERNAME_FIELD] = self.username
+            form_data[LOGIN_PASSWORD_FIELD] = self.password
+
+            print("Posting login form...")
+            post_url = parse_form_action(login_page.text, login_page.url)
+            response = self.session.post(
+                post_url,
+                data=form_data,
+                headers={"Referer": login_page.url},
+                timeout=self.timeout,
+            )
+            self.url = response.url
+            self.last_response = response
+
+            if self.has_auth_cookie() and self.is_session_valid(response):
+                print("✅ Login successful (HTTP backend)!")
+                return True
+
+            print("Login verification failed. Current page content:")
+            with open("login_failed_response.html", "w", encoding="utf-8") as f:
+                f.write(response.text)
+            print("Login response saved to login_failed_response.html for inspection.")
+            return False
+
+        except requests.RequestException as e:
+            print(f"❌ HTTP error during login: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ Unexpected error during login: {e}")
+            return False
+
+    def detached_session(self):
+        """
+        A new requests.Session with this session's headers and cookies but its own connection pool,
+        for background work (assets) that must not take connections from the poller.
+        """
+        session = requests.Session()
+        session.headers.update(self.session.headers)
+        session.cookies.update(self.session.cookies)
+        return session
+
+    def close(self):
+        self.session.close()
+
+def sync_browser_cookies(session, browser_cookies):
+    """
+    Copies cookies from a Playwright BrowserContext (context.cookies()) into a requests.Session,
+    so background threads can make authenticated requests without touching the browser.
+    """
+    for cookie in browser_cookies:
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+            secure=cookie.get("secure", False),
+        )
+    return session
+
+def browser_cookies_from_jar(cookie_jar):
+    """The cookies of a requests cookie jar in Playwright's format (context.add_cookies(), storage_state)."""
+    cookies = []
+    for cookie in cookie_jar:
+        cookies.append({
+            "name": cookie.name,
+            "value": cookie.value,
+            "domain": cookie.domain,
+            "path": cookie.path or "/",
+            "expires": cookie.expires if cookie.expires is not None else -1,
+            "httpOnly": cookie.has_nonstandard_attr("HttpOnly"),
+            "secure": bool(cookie.secure),
+            "sameSite": "Lax",
+        })
+    return cookies
+
+def session_from_browser_cookies(browser_cookies):
+    """A fresh requests.Session (browser-like headers) holding the given Playwright cookies."""
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    return sync_browser_cookies(session, browser_cookies)
@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+"""
+Multi-account mode: one Chromium process, one isolated browser context per account.
+
+All accounts log in concurrently (asyncio), share a single calibrated wait for the
+event time, then run their Phase 3 loops in parallel. Each account writes into its
+own directory under MULTI_ACCOUNT_OUTPUT_DIR:
+
+    runs/<label>/snapshots/...          (or application_view_<ts>.html with PIS_SNAPSHOT_STORAGE=files)
+    runs/<label>/application_assets/...
+    runs/<label>/flight_<ts>_<reason>.har   (only when an attempt fails, see flight_recorder.py)
+
+Run with:  python multi_account.py
+"""
+import asyncio
+import os
+import statistics
+import time
+
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError, Error as PlaywrightError
+
+from asset_cache import AssetCache
+from fast_reload import (
+    ReloadTimings, fast_mode_enabled, goto_until_usable_async, install_resource_blocking_async, reload_until_usable_async,
+)
+from flight_recorder import open_flight_recorder
+from polling_policy import (
+    DECISION_LOG_FILE, OUTCOME_ERROR, OUTCOME_OK, PollScheduler, TokenBucket, is_retryable_status, make_policy,
+)
+from portal_clock import ServerClock
+from portal_html import collect_asset_urls, is_logged_in
+from snapshot_store import SNAPSHOT_DIR
+from test_bot import (
+    LOGIN_URL,
+    APPLICATIONS_URL,
+    MIN_SUCCESS_SAVES,
+    MAX_SCRAPE_LOOP_ATTEMPTS,
+    SCRAPE_WINDOW_DURATION_SECONDS,
+    SCRAPE_INTERVAL_SECONDS,
+    PAGE_OPERATION_TIMEOUT_MS,
+    CALIBRATE_SERVER_CLOCK,
+    load_accounts,
+    get_target_event_time,
+    wait_until_absolute,
+    open_snapshot_store,
+    save_snapshot,
+    report_new_data,
+)
+
+MULTI_ACCOUNT_OUTPUT_DIR = "runs"
+
+class AccountRun:
+    """State and timings of one account inside a batch."""
+
+    def __init__(self, account, output_root=MULTI_ACCOUNT_OUTPUT_DIR):
+        self.username = account["username"]
+        self.password = account["password"]
+        self.label = account["label"]
+        self.output_dir = os.path.join(output_root, self.label)
+        self.asset_dir = os.path.join(self.output_dir, "application_assets")
+        self.asset_cache = None  # Created when the account starts scraping
+        self.blocker = None      # ResourceBlocker in PIS_RELOAD_MODE=fast
+        self.reload_timings = ReloadTimings()
+        self.recorder = open_flight_recorder(self.output_dir)
+        self.context = None
+        self.page = None
+        self.logged_in = False
+        self.login_seconds = None
+        self.scrape_seconds = None
+        self.successful_saves = 0
+        self.attempts = 0
+        self.error = None        # Exception that ended this account's login or Phase 3 early
+
+    def log(self, message):
+        print(f"[{self.label}] {message}")
+
+    def record_response(self, response, body, latency_ms=None, url=None, note=None):
+        """Puts a Playwright response the loop already holds into the flight recorder."""
+        if self.recorder is not None:
+            self.recorder.record_page_response(response, body, latency_ms, url, note)
+
+    def dump_history(self, reason, error=None):
+        """Writes the flight recorder's ring to a .har file in the account's directory."""
+        if self.recorder is not None:
+            self.recorder.dump(reason, error)
+
+# --- Async counterparts of the test_bot.py page steps ---
+
+async def perform_login_async(run):
+    """Async version of test_bot.perform_login for one account's page."""
+    page = run.page
+    run.log("Navigating to login page...")
+    try:
+        await page.goto(LOGIN_URL, timeout=PAGE_OPERATION_TIMEOUT_MS)
+        await page.wait_for_load_state("networkidle", timeout=PAGE_OPERATION_TIMEOUT_MS)
+
+        run.log("Filling in login form...")
+        await (await page.wait_for_selector('input[name="ctl00$MainContent$LoginUser$UserName"]', timeout=PAGE_OPERATION_TIMEOUT_MS)).fill(run.username)
+        await (await page.wait_for_selector('input[name="ctl00$MainContent$LoginUser$Password"]', timeout=PAGE_OPERATION_TIMEOUT_MS)).fill(run.password)
+
+        async with page.expect_navigation(timeout=PAGE_OPERATION_TIMEOUT_MS):
+            await page.click('input[name="ctl00$MainContent$LoginUser$LoginButton"]')
+
+        await page.wait_for_load_state("networkidle", timeout=PAGE_OPERATION_TIMEOUT_MS)
+
+        welcome_span = await page.query_selector("#HeadLoginView_HeadLoginName")
+        logout_link = await page.query_selector("#HeadLoginView_HeadLoginStatus")
+        login_success = bool(welcome_span and await welcome_span.is_visible())
+        if not login_success and logout_link and await logout_link.is_visible():
+            login_success = (await logout_link.inner_text()).strip() == "Έξοδος"
+
+        if not login_success:
+            os.makedirs(run.output_dir, exist_ok=True)
+            failed_path = os.path.join(run.output_dir, "login_failed_response.html")
+            with open(failed_path, "w", encoding="utf-8") as f:
+                f.write(await page.content())
+            run.log(f"Login verification failed. Response saved to {failed_path} for inspection.")
+            return False
+
+        run.log("✅ Login successful!")
+        return True
+
+    except PlaywrightTimeoutError as e:
+        run.log(f"❌ Playwright timeout during login: {e}")
+        return False
+    except PlaywrightError as e:
+        run.log(f"❌ Playwright error during login: {e}")
+        return False
+
+async def download_assets_async(run, page_html):
+    """
+    Async version of the asset step, writing into the account's asset cache.
+    All assets of the page are fetched concurrently over the context's request API;
+    known URLs are revalidated with a conditional GET and skipped after their first check this run.
+    """
+    asset_urls = collect_asset_urls(page_html, run.page.url)
+    if not asset_urls:
+        run.log("  No new assets (PDFs/images) found on this page.")
+        return
+
+    async def fetch(asset_full_url):
+        if run.asset_cache.validated_this_run(asset_full_url):
+            return True
+        try:
+            response = await run.page.request.get(
+                asset_full_url,
+                headers=run.asset_cache.conditional_headers(asset_full_url),
+                timeout=PAGE_OPERATION_TIMEOUT_MS,
+            )
+            if response.status == 304:
+                run.asset_cache.mark_not_modified(asset_full_url)
+                return True
+            if response.ok:
+                run.asset_cache.store_bytes(asset_full_url, await response.body(), response.headers)
+                return True
+            run.log(f"  ❌ Failed to download asset {asset_full_url}: HTTP {response.status} {response.status_text}")
+        except (PlaywrightTimeoutError, PlaywrightError) as asset_dl_err:
+            run.log(f"  ❌ Playwright error downloading asset {asset_full_url}: {asset_dl_err}")
+        return False
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(fetch(url) for url in asset_urls))
+    await asyncio.to_thread(run.asset_cache.save)
+    run.log(f"  Assets up to date: {sum(results)}/{len(asset_urls)} in {run.asset_dir} "
+            f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+async def response_bytes_async(page, response):
+    """Async counterpart of test_bot.response_bytes."""
+    if response is not None:
+        return await response.body()
+    return (await page.content()).encode("utf-8")
+
+# --- Per-account phases ---
+
+async def login_account(browser, run):
+    """Phase 1 + 2 for one account: isolated context, login, pre-load Applications.aspx."""
+    started = time.perf_counter()
+    run.context = await browser.new_context()
+    if fast_mode_enabled():
+        run.blocker = await install_resource_blocking_async(run.context)
+    run.page = await run.context.new_page()
+    run.logged_in = await perform_login_async(run)
+    if run.logged_in:
+        try:
+            await run.page.goto(APPLICATIONS_URL, timeout=PAGE_OPERATION_TIMEOUT_MS)
+            await run.page.wait_for_load_state("networkidle", timeout=PAGE_OPERATION_TIMEOUT_MS)
+            run.log(f"Pre-loaded applications page: {run.page.url}")
+        except PlaywrightError as e:
+            run.log(f"❌ Could not pre-load applications page: {e}")
+            run.logged_in = False
+    run.login_seconds = time.perf_counter() - started
+    return run
+
+async def scrape_account(run, budget):
+    """
+    Phase 3 for one account: the same reload/save/detect/assets loop as run_scraper.
+    budget is the TokenBucket shared by all accounts, so the batch as a whole respects the rate limit.
+    Disk writes run in worker threads, so one account's I/O never holds up another account's reload.
+    """
+    os.makedirs(run.output_dir, exist_ok=True)
+    run.asset_cache = AssetCache(run.asset_dir)
+    snapshot_store = open_snapshot_store(os.path.join(run.output_dir, SNAPSHOT_DIR))
+    scheduler = None
+    new_data_seen = False
+    loop_start_time = time.time()
+    page = run.page
+
+    try:
+        scheduler = PollScheduler(make_policy(None, SCRAPE_INTERVAL_SECONDS, MIN_SUCCESS_SAVES), budget,
+                                  log_path=os.path.join(run.output_dir, DECISION_LOG_FILE)).start()
+        while run.attempts < MAX_SCRAPE_LOOP_ATTEMPTS and \
+              (time.time() - loop_start_time) < SCRAPE_WINDOW_DURATION_SECONDS:
+
+            run.attempts += 1
+            if run.recorder is not None:
+                run.recorder.attempt = run.attempts
+            outcome = OUTCOME_ERROR
+            try:
+                scheduler.before_attempt()
+                reload = await reload_until_usable_async(page, PAGE_OPERATION_TIMEOUT_MS, run.reload_timings)
+                if reload.response is not None and is_retryable_status(reload.response.status):
+                    run.record_response(reload.response, None, reload.response_ms, page.url)
+                    raise PlaywrightError(f"Server returned HTTP {reload.response.status}")
+                page_bytes = await response_bytes_async(page, reload.response)
+                run.record_response(reload.response, page_bytes, reload.response_ms, page.url)
+
+                # Session check on the response body we already hold (no extra page.content())
+                if page.url.startswith(LOGIN_URL) or not is_logged_in(page_bytes):
+                    run.log("Session invalidated during scrape loop! Attempting to re-login...")
+                    if not await perform_login_async(run):
+                        run.log("Re-login failed. Breaking loop.")
+                        run.dump_history(f"attempt{run.attempts}_relogin_failed")
+                        break
+                    response = await goto_until_usable_async(page, APPLICATIONS_URL, PAGE_OPERATION_TIMEOUT_MS)
+                    page_bytes = await response_bytes_async(page, response)
+                    run.record_response(response, page_bytes, url=page.url, note="after re-login")
+
+                if snapshot_store is not None:
+                    fname = await asyncio.to_thread(snapshot_store.save_snapshot, page_bytes)
+                else:
+                    fname = await asyncio.to_thread(save_snapshot, page_bytes, output_dir=run.output_dir)
+                run.successful_saves += 1
+                run.log(f"  ✅ Saved main HTML: {fname}. Successful HTML saves: {run.successful_saves}/{MIN_SUCCESS_SAVES}")
+
+                outcome = OUTCOME_OK
+
+                new_data_seen = report_new_data(page_bytes) or new_data_seen
+                await download_assets_async(run, page_bytes.decode("utf-8", errors="replace"))
+
+            except (PlaywrightTimeoutError, PlaywrightError) as e:
+                run.log(f"❌ Playwright error during scrape attempt {run.attempts}: {e}")
+                # The responses leading up to the error, from memory: no page.content() on a struggling browser
+                run.dump_history(f"attempt{run.attempts}_playwright_error", e)
+            except Exception as e:
+                # e.g. an OSError from the snapshot write: this account retries, the others are unaffected
+                run.log(f"❌ Unexpected error during scrape attempt {run.attempts}: {e}")
+                run.dump_history(f"attempt{run.attempts}_unexpected_error", e)
+
+            decision = scheduler.after_attempt(run.attempts, outcome, new_data_seen)
+            if decision.stop:
+                break
+            if decision.delay > 0:
+                await asyncio.sleep(decision.delay)
+    finally:
+        run.scrape_seconds = time.time() - loop_start_time
+        if scheduler is not None:
+            scheduler.close()
+        if snapshot_store is not None:
+            snapshot_store.close()
+    return run
+
+async def gather_accounts(runs, phase, *args, **kwargs):
+    """
+    Runs phase(..., run, ...) for every account concurrently. An exception ends only that
+    account's phase: it is logged and kept on run.error instead of cancelling the others.
+    """
+    results = await asyncio.gather(*(phase(*args, run, **kwargs) for run in runs), return_exceptions=True)
+    for run, result in zip(runs, results):
+        if isinstance(result, BaseException):
+            run.error = result
+            run.logged_in = False
+            run.log(f"❌ {phase.__name__} failed: {result!r}")
+
+def print_batch_timing(runs, login_wall_seconds, scrape_wall_seconds):
+    """Summarises how the batch's latency scales with the number of accounts."""
+    n = len(runs)
+    login_times = [r.login_seconds for r in runs if r.login_seconds is not None]
+    print(f"\n--- Batch timing ({n} accounts, one browser) ---")
+    if login_times:
+        serial_estimate = sum(login_times)
+        print(f"  Login phase wall time: {login_wall_seconds:.2f} s "
+              f"(per account: mean {statistics.mean(login_times):.2f} s, max {max(login_times):.2f} s)")
+        print(f"  Serial login estimate: {serial_estimate:.2f} s → concurrency speedup x{serial_estimate / max(login_wall_seconds, 1e-9):.1f}")
+        print(f"  Login wall time per account: {login_wall_seconds / n:.2f} s")
+    print(f"  Scrape phase wall time: {scrape_wall_seconds:.2f} s")
+    for r in runs:
+        status = f"failed ({r.error!r})" if r.error is not None else "ok" if r.logged_in else "login failed"
+        reloads = r.reload_timings.usable_ms
+        reload_note = f", median reload {statistics.median(reloads):.0f} ms ({r.reload_timings.mode})" if reloads else ""
+        print(f"  [{r.label}] {status}: saves {r.successful_saves}/{MIN_SUCCESS_SAVES} in {r.attempts} attempts{reload_note}")
+
+async def run_multi_account_async(accounts, headless=True):
+    runs = [AccountRun(account) for account in accounts]
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        try:
+            print(f"\n--- Phase 1/2: Logging in {len(runs)} accounts concurrently ---")
+            login_started = time.perf_counter()
+            await gather_accounts(runs, login_account, browser)
+            login_wall_seconds = time.perf_counter() - login_started
+
+            active = [run for run in runs if run.logged_in]
+            if not active:
+                print("No account logged in. Exiting.")
+                return runs
+
+            # One shared calibrated wait for the whole batch; it blocks, so keep it off the event loop
+            clock = ServerClock(LOGIN_URL) if CALIBRATE_SERVER_CLOCK else None
+            await asyncio.get_running_loop().run_in_executor(None, wait_until_absolute, get_target_event_time(), clock)
+
+            print(f"\n--- Phase 3: Parallel refreshing for {len(active)} accounts ---")
+            scrape_started = time.perf_counter()
+            budget = TokenBucket()  # One request-rate budget for the whole batch
+            await gather_accounts(active, scrape_account, budget=budget)
+            scrape_wall_seconds = time.perf_counter() - scrape_started
+
+            print_batch_timing(runs, login_wall_seconds, scrape_wall_seconds)
+        finally:
+            await browser.close()
+            print("Browser closed.")
+    return runs
+
+def run_multi_account():
+    """Entry point: loads all accounts and runs them concurrently in one browser."""
+    start_overall_time = time.time()
+    accounts = load_accounts()
+    asyncio.run(run_multi_account_async(accounts))
+    print(f"⏱️ Total script execution time: {time.time() - start_overall_time:.2f} seconds.")
+
+if __name__ == "__main__":
+    print("Starting multi-account scraping with Playwright...")
+    run_multi_account()
+    print("Scraping process finished.")
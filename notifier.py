@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+In-run e-mail notification, sent the moment the new-data detector trips.
+
+send_artifact_email.py mails the artifacts only after the run has finished. The Notifier sends
+a short message from inside the run as soon as the capture pipeline sees "ΝΕΑ ΑΙΤΗΣΗ", with the
+application number(s) read from the grid:
+
+    Subject: PIS-GR: new application 1234
+    'ΝΕΑ ΑΙΤΗΣΗ' appeared on Applications.aspx (poll 3, fetched 2025-07-29T14:00:00.412+03:00).
+      #1234  ΝΕΑ ΑΙΤΗΣΗ  29/07/2025 14:00:00
+
+- One authenticated SMTP connection is opened when the run starts, long before T0. It gets a
+  NOOP every NOOP_INTERVAL_SECONDS while idle, and every message reuses it. If the server has
+  dropped it, it is reopened once.
+- Messages go through a queue to a background thread, so the capture threads never wait on mail.
+
+SMTP settings come from send_artifact_email.load_smtp_settings() (SMTP_USERNAME/SMTP_PASSWORD or
+smtp.json). SMTP_SECURITY=ssl|starttls|plain (default ssl) picks the transport. "plain" is meant
+for a local stand-in such as fake_smtp.py. Disable with PIS_NOTIFY=0.
+"""
+import os
+import queue
+import smtplib
+import statistics
+import threading
+import time
+from email.message import EmailMessage
+
+from send_artifact_email import SMTP_SECURITY, SMTP_TIMEOUT_SECONDS, connect_smtp, load_smtp_settings
+from tracing import TRACER
+
+NOTIFY_ENABLED = os.environ.get("PIS_NOTIFY", "1").strip().lower() not in ("0", "false", "no", "off")
+NOOP_INTERVAL_SECONDS = 60  # Most servers drop a connection after a few idle minutes
+
+_STOP = object()
+
+def new_data_message(attempt, fetched_at, applications, marker):
+    """
+    Subject and body for the first capture showing new data.
+    applications: the grid's records (applications_timeseries.parse_application_row), possibly empty.
+    """
+    new = [a for a in applications if a.get("status") and marker in a["status"]]
+    numbers = [str(a["number"]) for a in new if a.get("number") is not None]
+    if numbers:
+        subject = f"PIS-GR: new application {', '.join(numbers)}"
+    else:
+        subject = "PIS-GR: new data on Applications.aspx"
+    lines = [f"'{marker}' appeared on Applications.aspx (poll {attempt}, fetched {fetched_at})."]
+    for a in new:
+        lines.append(f"  #{a.get('number') or '?'}  {a['status']}  {a.get('submitted_at') or ''}".rstrip())
+    lines.append("")
+    lines.append("Snapshots and assets follow in the artifact e-mail after the run.")
+    return subject, "\n".join(lines)
+
+class Notifier:
+    """One pooled SMTP connection and the background thread sending queued messages over it."""
+
+    def __init__(self, smtp_conf, security=SMTP_SECURITY, noop_interval=NOOP_INTERVAL_SECONDS):
+        self.smtp_conf = smtp_conf
+        self.sender = smtp_conf["smtp_username"]
+        self.receiver = smtp_conf.get("receiver") or self.sender
+        self.security = security
+        self.noop_interval = noop_interval
+        self.queue = queue.Queue()
+        self.server = None
+        self.connects = 0
+        self.noops = 0
+        self.sent = 0
+        self.failed = 0
+        self.delivery_ms = []  # Queued → accepted by the SMTP server
+        self._thread = threading.Thread(target=self._worker, name="notifier", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    # --- Capture thread side ---
+
+    def notify(self, subject, body):
+        """Queues one message; never blocks."""
+        self.queue.put((time.perf_counter(), subject, body))
+
+    def new_data_handler(self, marker):
+        """A CapturePipeline on_new_data callback that queues new_data_message(...)."""
+        def on_new_data(attempt, fetched_at, applications):
+            self.notify(*new_data_message(attempt, fetched_at, applications, marker))
+        return on_new_data
+
+    def close(self, timeout=SMTP_TIMEOUT_SECONDS):
+        """Sends whatever is still queued, closes the connection and prints the report."""
+        self.queue.put(_STOP)
+        self._thread.join(timeout)
+        self.report()
+
+    # --- Worker ---
+
+    def _connect(self):
+        with TRACER.span("smtp_connect", security=self.security):
+            self.server = connect_smtp(self.smtp_conf, self.security)
+        self.connects += 1
+
+    def _keepalive(self):
+        """NOOP on the idle connection; reconnects right away if the server dropped it."""
+        try:
+            if self.server is not None:
+                self.server.noop()
+                self.noops += 1
+                return
+        except (smtplib.SMTPException, OSError):
+            self.server = None
+        try:
+            self._connect()
+        except (smtplib.SMTPException, OSError) as e:
+            print(f"  [notify] ⚠️ SMTP reconnect failed ({e}); retrying at the next send.")
+
+    def _send(self, message):
+        # A pooled connection can go stale between sends; retry once on a fresh one
+        for last_try in (False, True):
+            try:
+                if self.server is None:
+                    self._connect()
+                self.server.send_message(message)
+                return
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException, ConnectionError) as e:
+                # 421: the server is closing the channel, e.g. after an idle timeout
+                if isinstance(e, smtplib.SMTPResponseException) and e.smtp_code != 421:
+                    raise
+                self.server = None
+                if last_try:
+                    raise
+
+    def _worker(self):
+        try:
+            self._connect()  # Log in now, while waiting for T0, not when the number shows up
+            print(f"  [notify] SMTP connection ready ({self.smtp_conf['smtp_server']}, {self.security}).")
+        except (smtplib.SMTPException, OSError) as e:
+            print(f"  [notify] ⚠️ Could not open the SMTP connection yet ({e}); retrying at the next send.")
+        while True:
+            try:
+                item = self.queue.get(timeout=self.noop_interval)
+            except queue.Empty:
+                self._keepalive()
+                continue
+            if item is _STOP:
+                break
+            queued_at, subject, body = item
+            message = EmailMessage()
+            message["From"] = self.sender
+            message["To"] = self.receiver
+            message["Subject"] = subject
+            message.set_content(body)
+            try:
+                with TRACER.span("notify"):
+                    self._send(message)
+            except (smtplib.SMTPException, OSError) as e:
+                self.failed += 1
+                print(f"  [notify] ❌ Could not send '{subject}': {e}")
+                continue
+            self.sent += 1
+            self.delivery_ms.append((time.perf_counter() - queued_at) * 1000)
+            print(f"  [notify] 📧 Sent '{subject}' ({self.delivery_ms[-1]:.0f} ms after it was queued).")
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.server = None
+
+    def report(self):
+        print("\n--- In-run notifications ---")
+        median = f", median delivery {statistics.median(self.delivery_ms):.0f} ms" if self.delivery_ms else ""
+        print(f"  Sent: {self.sent}, failed: {self.failed}{median}")
+        print(f"  SMTP connections opened: {self.connects}, keepalive NOOPs: {self.noops}")
+
+def open_notifier():
+    """A started Notifier, or None when disabled or no SMTP settings are configured."""
+    if not NOTIFY_ENABLED:
+        return None
+    try:
+        smtp_conf = load_smtp_settings()
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ No SMTP settings ({e}); in-run notifications are off.")
+        return None
+    return Notifier(smtp_conf).start()
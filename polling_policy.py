@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Polling policies for Phase 3.
+
+The loop asks a PollScheduler what to do after every attempt. The scheduler passes the
+attempt's outcome to a policy, applies the global request-rate budget and logs
+the decision. The loops stop on their own window and attempt limits; a policy can
+stop them earlier.
+
+Policies (PIS_POLL_POLICY):
+  - "fixed":    one poll every SCRAPE_INTERVAL_SECONDS until MIN_SUCCESS_SAVES captures (the original cadence)
+  - "adaptive": dense polls right after the opening time that slow down exponentially,
+                exponential backoff with jitter on 5xx/429/timeouts, and an early stop
+                once new data has been detected
+
+With a Coordinator (coordination.py, PIS_COORDINATE=1) the scheduler also puts each poll on
+this worker's phase lane, so several processes interleave instead of firing together, and it
+stops as soon as another worker reports new data.
+
+Every decision is appended to polling_decisions.jsonl so the cadence can be tuned after the event:
+
+    {"attempt": 4, "elapsed_s": 1.73, "outcome": "ok", "delay_s": 0.41, "reason": "burst interval 0.50 s", "stop": false}
+"""
+import json
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+
+POLL_POLICY = os.environ.get("PIS_POLL_POLICY", "fixed").strip().lower()
+DECISION_LOG_FILE = "polling_decisions.jsonl"
+
+# --- Adaptive policy tuning ---
+BURST_INTERVAL_SECONDS = 0.5       # Poll cadence right after the opening time
+BURST_DURATION_SECONDS = 5.0       # How long the dense burst lasts
+DECAY_HALF_LIFE_SECONDS = 8.0      # After the burst, the interval doubles every this many seconds...
+MAX_INTERVAL_SECONDS = 5.0         # ...up to this (the fixed cadence)
+BACKOFF_BASE_SECONDS = 1.0         # First retry delay after a server error
+BACKOFF_MAX_SECONDS = 15.0
+EARLY_STOP_MIN_CAPTURES = 2        # Keep at least this many captures once new data shows up
+
+# --- Global request-rate budget (all policies) ---
+RATE_LIMIT_PER_SECOND = 3.0
+RATE_LIMIT_BURST = 5
+
+OUTCOME_OK = "ok"
+OUTCOME_ERROR = "error"            # 5xx, 429, timeouts, connection errors
+
+# What the policy sees after an attempt
+PollState = namedtuple("PollState", "attempt elapsed attempt_seconds outcome consecutive_errors captures new_data")
+PollDecision = namedtuple("PollDecision", "delay reason stop")
+
+def is_retryable_status(status):
+    """Statuses that mean "the portal is struggling": back off instead of polling harder."""
+    return status is not None and (status >= 500 or status == 429)
+
+class FixedIntervalPolicy:
+    """The original cadence: attempts start on a fixed grid until the capture goal is met."""
+    name = "fixed"
+
+    def __init__(self, interval_seconds, min_captures):
+        self.interval_seconds = interval_seconds
+        self.min_captures = min_captures
+
+    def nominal_interval(self, elapsed):
+        """Target time between attempt starts (used to lay out coordinated workers' phases)."""
+        return self.interval_seconds
+
+    def decide(self, state):
+        if state.captures >= self.min_captures:
+            return PollDecision(0.0, f"capture goal of {self.min_captures} reached", True)
+        next_start = state.attempt * self.interval_seconds
+        return PollDecision(max(0.0, next_start - state.elapsed), f"fixed interval {self.interval_seconds:.2f} s", False)
+
+class AdaptivePolicy:
+    """Burst around the opening time, exponential decay afterwards, jittered backoff on errors."""
+    name = "adaptive"
+
+    def __init__(self, burst_interval=BURST_INTERVAL_SECONDS, burst_duration=BURST_DURATION_SECONDS,
+                 half_life=DECAY_HALF_LIFE_SECONDS, max_interval=MAX_INTERVAL_SECONDS,
+                 backoff_base=BACKOFF_BASE_SECONDS, backoff_max=BACKOFF_MAX_SECONDS,
+                 early_stop_min_captures=EARLY_STOP_MIN_CAPTURES, rng=None):
+        self.burst_interval = burst_interval
+        self.burst_duration = burst_duration
+        self.half_life = half_life
+        self.max_interval = max_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.early_stop_min_captures = early_stop_min_captures
+        self.rng = rng or random.Random()
+
+    def interval_at(self, elapsed):
+        """Target time between attempt starts, elapsed seconds after the opening time."""
+        if elapsed <= self.burst_duration:
+            return self.burst_interval
+        decayed = self.burst_interval * 2 ** ((elapsed - self.burst_duration) / self.half_life)
+        return min(self.max_interval, decayed)
+
+    def nominal_interval(self, elapsed):
+        return self.interval_at(elapsed)
+
+    def decide(self, state):
+        if state.new_data and state.captures >= self.early_stop_min_captures:
+            return PollDecision(0.0, "new data detected", True)
+        if state.consecutive_errors:
+            # Equal jitter: half the exponential delay is fixed, half random, so clients do not sync up
+            ceiling = min(self.backoff_max, self.backoff_base * 2 ** (state.consecutive_errors - 1))
+            delay = ceiling / 2 + self.rng.uniform(0, ceiling / 2)
+            return PollDecision(delay, f"backoff after {state.consecutive_errors} error(s), ceiling {ceiling:.2f} s", False)
+        interval = self.interval_at(state.elapsed)
+        phase = "burst" if state.elapsed <= self.burst_duration else "decay"
+        return PollDecision(max(0.0, interval - state.attempt_seconds), f"{phase} interval {interval:.2f} s", False)
+
+class TokenBucket:
+    """Global request-rate budget: `rate` requests per second on average, bursts of up to `capacity`."""
+
+    def __init__(self, rate=RATE_LIMIT_PER_SECOND, capacity=RATE_LIMIT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until_available(self):
+        with self.lock:
+            self._refill()
+            return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def available(self):
+        """Whole tokens that can be taken right now without waiting."""
+        with self.lock:
+            self._refill()
+            return max(0, int(self.tokens))
+
+    def consume(self):
+        with self.lock:
+            self._refill()
+            self.tokens -= 1  # May go negative if a caller skipped the wait; the debt is paid back by refills
+
+    def acquire(self):
+        """Blocks until a whole token is free and takes it (safe to call from several threads)."""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+def make_policy(name=None, interval_seconds=MAX_INTERVAL_SECONDS, min_captures=5):
+    """Policy for PIS_POLL_POLICY (or name); the fixed one is given the bot's own interval and goal."""
+    name = (name or POLL_POLICY).strip().lower()
+    if name == "fixed":
+        return FixedIntervalPolicy(interval_seconds, min_captures)
+    if name == "adaptive":
+        return AdaptivePolicy(max_interval=interval_seconds, early_stop_min_captures=min(min_captures, EARLY_STOP_MIN_CAPTURES))
+    raise ValueError(f"Unknown polling policy '{name}'. Choose 'fixed' or 'adaptive'.")
+
+class PollScheduler:
+    """Runs a policy over the Phase 3 loop, enforces the rate budget and logs every decision."""
+
+    def __init__(self, policy, budget=None, log_path=DECISION_LOG_FILE, coordinator=None):
+        self.policy = policy
+        self.budget = budget or TokenBucket()
+        self.coordinator = coordinator
+        self.log_path = log_path
+        self.decisions = []
+        self.consecutive_errors = 0
+        self.captures = 0
+        self.started = None
+        self._attempt_started = None
+
+    def start(self):
+        """
+        Marks the opening time; call right after the wait for the target time. A coordinated
+        worker then waits for its phase offset before the first poll.
+        """
+        self.started = time.monotonic()
+        if self.coordinator is not None:
+            self.coordinator.start_polling()
+            offset = self.coordinator.align(0.0, self.policy.nominal_interval(0.0))
+            if offset > 0:
+                rank, n = self.coordinator.phase()
+                print(f"  🔀 Worker {rank + 1} of {n}: first poll {offset * 1000:.0f} ms after the others' (phase offset)")
+                self.coordinator.sleep(offset)
+        return self
+
+    def before_attempt(self):
+        """Takes a token from the rate budget as the request goes out."""
+        self.budget.consume()
+        self._attempt_started = time.monotonic()
+
+    def spare(self, limit):
+        """How many requests (up to limit) the rate budget can take right now besides the attempt's own, e.g. for hedges."""
+        return min(limit, max(0, self.budget.available() - 1))
+
+    def charge(self, requests):
+        """Takes tokens for extra requests an attempt sent (hedges), so they count against the rate budget too."""
+        for _ in range(requests):
+            self.budget.consume()
+
+    def after_attempt(self, attempt, outcome, new_data=False):
+        """Records one attempt's outcome and returns the PollDecision for the next one."""
+        now = time.monotonic()
+        if outcome == OUTCOME_OK:
+            self.captures += 1
+            self.consecutive_errors = 0
+        elif outcome == OUTCOME_ERROR:
+            self.consecutive_errors += 1
+        attempt_seconds = now - self._attempt_started if self._attempt_started else 0.0
+        state = PollState(attempt, now - self.started, attempt_seconds, outcome,
+                          self.consecutive_errors, self.captures, new_data)
+        decision = self.policy.decide(state)
+
+        if self.coordinator is not None and not decision.stop:
+            found_by = self.coordinator.found_elsewhere()
+            if found_by:
+                decision = PollDecision(0.0, f"new data found by worker {found_by}", True)
+            elif not self.consecutive_errors:  # Backoff stays jittered; only regular polls keep to the lane
+                rank, n = self.coordinator.phase()
+                delay = self.coordinator.align(decision.delay, self.policy.nominal_interval(state.elapsed))
+                decision = PollDecision(delay, decision.reason + f" (phase {rank + 1}/{n})", False)
+
+        if not decision.stop:
+            wait_for_budget = self.budget.time_until_available()
+            if wait_for_budget > decision.delay:
+                decision = PollDecision(wait_for_budget, decision.reason + " (rate budget)", False)
+
+        self.decisions.append({
+            "attempt": attempt,
+            "elapsed_s": round(state.elapsed, 3),
+            "attempt_s": round(attempt_seconds, 3),
+            "outcome": outcome,
+            "new_data": new_data,
+            "delay_s": round(decision.delay, 3),
+            "reason": decision.reason,
+            "stop": decision.stop,
+        })
+        print(f"  ⏱️ Policy ({self.policy.name}): {'stop' if decision.stop else f'next poll in {decision.delay:.2f} s'} — {decision.reason}")
+        return decision
+
+    def wait(self, decision):
+        """Sleeps until the next poll. Returns False if the loop should stop instead (another worker found new data)."""
+        if self.coordinator is not None:
+            if self.coordinator.sleep(decision.delay):
+                return True
+            print(f"  🔀 Stopping: worker {self.coordinator.found_elsewhere()} found new data.")
+            return False
+        if decision.delay > 0:
+            time.sleep(decision.delay)
+        return True
+
+    def close(self):
+        """Appends this run's decisions to the decision log."""
+        if not self.decisions:
+            return
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            for row in self.decisions:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        print(f"  Polling decisions written to {self.log_path} ({len(self.decisions)} attempts, policy '{self.policy.name}')")
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Greek wall-clock helpers and a precise event trigger.
+
+ServerClock estimates how far the portal's clock is from ours using the HTTP
+`Date` header. The header only has 1 s resolution, so each sample just bounds
+the offset to an interval; intersecting the intervals of samples taken at
+different sub-second phases narrows it down to tens of milliseconds.
+
+fire_at() then sleeps coarsely, switches to short sleeps and finally spins so
+the first request leaves at T0 minus the measured one-way latency. A keepalive
+(session_keepalive.SessionKeepalive) can use the idle time before calibration and
+check the session one last time shortly before firing, and an interrupt event
+(standby.py's manual trigger) can end the wait early.
+"""
+import statistics
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from zoneinfo import ZoneInfo
+
+import requests
+
+GREEK_TZ = ZoneInfo("Europe/Athens")  # EET in winter, EEST (UTC+3) in summer
+
+CLOCK_SAMPLES = 8                 # HTTP Date samples taken during calibration
+CLOCK_SAMPLE_TIMEOUT_SECONDS = 5
+COARSE_SLEEP_MAX_SECONDS = 30     # Re-check the time at least this often while far away
+FINE_SLEEP_WINDOW_SECONDS = 2.0   # Below this, stop printing and sleep in short slices
+SPIN_WINDOW_SECONDS = 0.002       # Below this, busy-wait for the last couple of milliseconds
+
+ClockSample = namedtuple("ClockSample", "sent received server_second")
+FireReport = namedtuple("FireReport", "target fired_at error_ms offset_ms latency_ms triggered", defaults=(False,))
+
+def greek_now():
+    """Current time in the Europe/Athens zone (DST-aware)."""
+    return datetime.now(GREEK_TZ)
+
+def greek_datetime(year, month, day, hour=0, minute=0, second=0, microsecond=0):
+    """A timezone-aware datetime for a Greek wall-clock time."""
+    return datetime(year, month, day, hour, minute, second, microsecond, tzinfo=GREEK_TZ)
+
+class ServerClock:
+    """Tracks the offset between the portal's clock and the local clock."""
+
+    def __init__(self, probe_url, session=None, timeout=CLOCK_SAMPLE_TIMEOUT_SECONDS):
+        self.probe_url = probe_url
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.samples = []
+        self.offset = 0.0            # server time - local time, in seconds
+        self.one_way_latency = 0.0   # estimated request transit time, in seconds
+        self.uncertainty = None      # half-width of the offset interval, in seconds
+
+    @property
+    def calibrated(self):
+        return bool(self.samples)
+
+    def take_sample(self):
+        """Sends one request and records the local send/receive times and the server's Date second."""
+        sent = time.time()
+        response = self.session.get(self.probe_url, timeout=self.timeout, stream=True)
+        received = time.time()  # Headers are in: the Date is all we need, so the body is not timed
+        # Drain the body so the connection goes back to the pool; closing a streamed response
+        # unread drops it, and every sample would then pay the TCP (and TLS) handshake again
+        response.content
+        date_header = response.headers.get("Date")
+        if not date_header:
+            raise ValueError(f"No Date header in response from {self.probe_url}")
+        server_second = parsedate_to_datetime(date_header).timestamp()
+        sample = ClockSample(sent, received, server_second)
+        self.samples.append(sample)
+        return sample
+
+    def calibrate(self, samples=CLOCK_SAMPLES):
+        """
+        Takes several samples spaced 1 + 1/samples seconds apart so their sub-second phases
+        sweep the whole second, then intersects the offset bounds of all samples.
+        """
+        print(f"⏱️ Calibrating portal clock offset with {samples} samples...")
+        spacing = 1.0 + 1.0 / samples
+        for i in range(samples):
+            try:
+                self.take_sample()
+            except (requests.RequestException, ValueError) as e:
+                print(f"  Clock sample {i + 1} failed: {e}")
+            if i < samples - 1:
+                time.sleep(spacing)
+        self._update_estimate()
+        if self.calibrated:
+            print(
+                f"  Server clock offset: {self.offset * 1000:+.0f} ms "
+                f"(±{self.uncertainty * 1000:.0f} ms), one-way latency: {self.one_way_latency * 1000:.0f} ms"
+            )
+        else:
+            print("  ⚠️ No usable clock samples; assuming the local clock is correct.")
+        return self.offset
+
+    def _update_estimate(self):
+        if not self.samples:
+            return
+        # The server stamped its Date somewhere between our send and receive times,
+        # and its true time was within [server_second, server_second + 1).
+        lower = max(s.server_second - s.received for s in self.samples)
+        upper = min(s.server_second + 1.0 - s.sent for s in self.samples)
+        if lower <= upper:
+            self.offset = (lower + upper) / 2
+            self.uncertainty = (upper - lower) / 2
+        else:
+            # Inconsistent bounds (server clock jitter or a load balancer with several clocks):
+            # fall back to the median of the per-sample midpoints.
+            self.offset = statistics.median(
+                s.server_second + 0.5 - (s.sent + s.received) / 2 for s in self.samples
+            )
+            self.uncertainty = 0.5
+        self.one_way_latency = statistics.median(s.received - s.sent for s in self.samples) / 2
+
+    def server_time(self):
+        """Current portal time as a POSIX timestamp."""
+        return time.time() + self.offset
+
+def pause(seconds, interrupt=None):
+    """time.sleep that ends early, returning True, once interrupt (a threading.Event) is set."""
+    if interrupt is None:
+        time.sleep(seconds)
+        return False
+    return interrupt.wait(seconds)
+
+def _sleep_until_local(deadline_local, target_dt, announce=True, interrupt=None):
+    """
+    Coarse sleep → short sleeps → spin, until time.time() reaches deadline_local.
+    Returns True if the interrupt ended the coarse sleep early; the last seconds are never interrupted.
+    """
+    while True:
+        remaining = deadline_local - time.time()
+        if remaining <= FINE_SLEEP_WINDOW_SECONDS:
+            break
+        if announce:
+            print(f"Waiting {remaining:.1f} seconds until {target_dt.strftime('%Y-%m-%d %H:%M:%S')} Greek time...")
+        if pause(min(remaining - FINE_SLEEP_WINDOW_SECONDS, COARSE_SLEEP_MAX_SECONDS), interrupt):
+            return True
+
+    while True:
+        remaining = deadline_local - time.time()
+        if remaining <= SPIN_WINDOW_SECONDS:
+            break
+        time.sleep(remaining / 2)  # Halving keeps oversleep bounded by the OS timer slack
+
+    while time.time() < deadline_local:
+        pass
+    return False
+
+def _fired_by_trigger(target_dt, offset, latency):
+    fired_at = time.time()
+    error_ms = (fired_at + offset + latency - target_dt.timestamp()) * 1000
+    print(f"⚡ Fired by trigger, {-error_ms / 1000:.1f} s before the scheduled time.")
+    return FireReport(target_dt, fired_at, error_ms, offset * 1000, latency * 1000, True)
+
+def fire_at(target_dt, clock=None, calibrate_lead_seconds=60, keepalive=None, interrupt=None):
+    """
+    Blocks until a request sent now would reach the portal at target_dt (portal clock).
+    If a ServerClock is given it is calibrated calibrate_lead_seconds before the target.
+    A keepalive runs its checks during the wait before calibration and a handover check just before firing.
+    Setting interrupt (a threading.Event) fires early; the report then has triggered=True.
+    Returns a FireReport; error_ms is how far the estimated arrival landed from the target.
+    """
+    target_ts = target_dt.timestamp()
+    print(f"🎯 Target event time (Greek): {target_dt.strftime('%Y-%m-%d %H:%M:%S.%f %Z')}")
+
+    if clock is not None:
+        calibration_duration = CLOCK_SAMPLES * (1.0 + 1.0 / CLOCK_SAMPLES)
+        calibration_start = target_ts - calibrate_lead_seconds - calibration_duration
+        if calibration_start > time.time():
+            if keepalive is not None:
+                keepalive.run_until(calibration_start, interrupt)
+            if _sleep_until_local(calibration_start, target_dt, interrupt=interrupt):
+                return _fired_by_trigger(target_dt, clock.offset, clock.one_way_latency)
+        if target_ts - time.time() > calibration_duration + FINE_SLEEP_WINDOW_SECONDS:
+            clock.calibrate()
+        else:
+            print("  ⚠️ Too close to the target to calibrate; using the previous clock estimate.")
+        offset, latency = clock.offset, clock.one_way_latency
+    else:
+        offset, latency = 0.0, 0.0
+
+    deadline_local = target_ts - offset - latency
+    if keepalive is not None:
+        if clock is None:
+            keepalive.run_until(deadline_local - keepalive.handover_lead_seconds, interrupt)
+        keepalive.handover(deadline_local, interrupt)
+    if _sleep_until_local(deadline_local, target_dt, interrupt=interrupt):
+        return _fired_by_trigger(target_dt, offset, latency)
+
+    fired_at = time.time()
+    error_ms = (fired_at + offset + latency - target_ts) * 1000
+    fired_dt = datetime.fromtimestamp(fired_at + offset, timezone.utc).astimezone(GREEK_TZ)
+    print(
+        f"✅ Fired at {fired_dt.strftime('%H:%M:%S.%f')} portal time "
+        f"(estimated arrival {error_ms:+.2f} ms from target, lead {latency * 1000:.0f} ms)"
+    )
+    return FireReport(target_dt, fired_at, error_ms, offset * 1000, latency * 1000)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for reading the PIS portal's server-rendered ASP.NET WebForms pages
+without a browser: hidden form fields, login state and asset links.
+"""
+import os
+import re
+from urllib.parse import urljoin
+
+from html_extractors import get_extractor, parse_tag_attrs
+
+# PIS_PORTAL_BASE_URL points every backend at another host, e.g. fake_portal.py on localhost
+PORTAL_BASE_URL = os.environ.get("PIS_PORTAL_BASE_URL", "https://myrequests.pis.gr").rstrip("/")
+
+# Hidden fields ASP.NET WebForms expects to be posted back with every form submit
+ASPNET_HIDDEN_FIELDS = (
+    "__EVENTTARGET",
+    "__EVENTARGUMENT",
+    "__VIEWSTATE",
+    "__VIEWSTATEGENERATOR",
+    "__EVENTVALIDATION",
+)
+
+LOGIN_FIELD_PREFIX = "ctl00$MainContent$LoginUser$"
+LOGIN_USERNAME_FIELD = LOGIN_FIELD_PREFIX + "UserName"
+LOGIN_PASSWORD_FIELD = LOGIN_FIELD_PREFIX + "Password"
+LOGIN_BUTTON_FIELD = LOGIN_FIELD_PREFIX + "LoginButton"
+
+# Text that only appears once the applications have opened (report_new_data, hedged polls, reprocess_snapshots)
+NEW_DATA_MARKER = "ΝΕΑ ΑΙΤΗΣΗ"
+
+LOGGED_IN_MARKER = 'id="HeadLoginView_HeadLoginName"'
+LOGOUT_TEXT = "Έξοδος"
+_LOGGED_IN_MARKER_BYTES = LOGGED_IN_MARKER.encode("utf-8")
+_LOGOUT_TEXT_BYTES = LOGOUT_TEXT.encode("utf-8")
+
+_INPUT_TAG_RE = re.compile(r"<input\b[^>]*>", re.IGNORECASE)
+_FORM_TAG_RE = re.compile(r"<form\b[^>]*>", re.IGNORECASE)
+
+# --- Form fields ---
+
+def parse_form_fields(page_html):
+    """
+    Returns {name: value} for every named <input> on the page.
+    Unchecked checkboxes/radios are left out, like a browser would on submit.
+    """
+    fields = {}
+    for tag in _INPUT_TAG_RE.findall(page_html):
+        attrs = parse_tag_attrs(tag)
+        name = attrs.get("name")
+        if not name:
+            continue
+        if attrs.get("type", "text").lower() in ("checkbox", "radio") and "checked" not in attrs:
+            continue
+        fields[name] = attrs.get("value", "")
+    return fields
+
+def parse_hidden_fields(page_html):
+    """Returns the ASP.NET hidden state fields (__VIEWSTATE, __EVENTVALIDATION, ...) found on the page."""
+    fields = parse_form_fields(page_html)
+    return {name: fields[name] for name in ASPNET_HIDDEN_FIELDS if name in fields}
+
+def login_form_data(page_html):
+    """
+    The fields to post back from a Login.aspx page: its ASP.NET hidden state plus the login
+    button, still without username and password. None if the page has no __VIEWSTATE.
+    """
+    all_fields = parse_form_fields(page_html)
+    form_data = {name: all_fields[name] for name in ASPNET_HIDDEN_FIELDS if name in all_fields}
+    if "__VIEWSTATE" not in form_data:
+        return None
+    # The button's name must be posted for the server-side click handler to fire
+    form_data[LOGIN_BUTTON_FIELD] = all_fields.get(LOGIN_BUTTON_FIELD, "Log In")
+    return form_data
+
+def parse_form_action(page_html, page_url):
+    """Returns the absolute URL the page's (single) WebForms <form> posts to."""
+    match = _FORM_TAG_RE.search(page_html)
+    if match:
+        action = parse_tag_attrs(match.group(0)).get("action")
+        if action:
+            return urljoin(page_url, action)
+    return page_url
+
+# --- Login state ---
+
+def is_logged_in(page_html):
+    """
+    True if the page shows the logged-in header (welcome name or the 'Έξοδος' logout link).
+    Accepts the decoded page or the raw UTF-8 response body.
+    """
+    if isinstance(page_html, (bytes, bytearray)):
+        return _LOGGED_IN_MARKER_BYTES in page_html or _LOGOUT_TEXT_BYTES in page_html
+    return LOGGED_IN_MARKER in page_html or LOGOUT_TEXT in page_html
+
+# --- Asset links ---
+
+def asset_urls_from_extract(extract, page_url):
+    """Absolute URLs of the PDF links and images in an extractor's PageExtract."""
+    asset_urls = set()
+
+    # Collect PDF links
+    for href in extract.links:
+        if href.lower().endswith(".pdf"):
+            asset_urls.add(urljoin(page_url, href))
+
+    # Collect image links (header.png, calendar.gif etc.)
+    for src in extract.images:
+        asset_urls.add(urljoin(page_url, src))
+
+    return asset_urls
+
+def collect_asset_urls(page_html, page_url, extractor=None):
+    """
+    Finds assets worth archiving (PDF links and images) and returns their absolute
+    URLs resolved against page_url. Uses the configured HTML extractor (see html_extractors).
+    """
+    return asset_urls_from_extract((extractor or get_extractor()).extract(page_html), page_url)
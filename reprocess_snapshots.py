@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Batch re-analysis of saved pages, spread over a process pool.
+
+After an event there are hundreds of application_view_*.html, error_page_*.html and
+login_failed_response.html files, snapshot archives (snapshots/archive.bin) and
+application_assets/ caches, across runs and accounts. This walks all of them and writes one
+JSON line per page to reprocessed.jsonl:
+
+    {"source": "runs/acc1/snapshots/archive.bin#12", "kind": "snapshot", "sha256": "...", "bytes": 191234,
+     "captured_at": "...", "logged_in": true, "new_data": true, "applications": [{"number": 1234, ...}],
+     "asset_refs": ["https://.../Reports/x.pdf"], "assets_cached": 1, "read_ms": 0.4, "parse_ms": 2.1, "error": null}
+
+Inputs (any mix):
+  - directories, searched recursively for *.html files, snapshot archives and artifact zips;
+  - snapshot archive directories (archive.bin + index.jsonl). They are replayed in order on the
+    main process, because every delta needs the previous snapshot, and only the parsing is farmed out;
+  - the zip parts made by send_artifact_email.py (their *.html members).
+Asset references are resolved against --base-url and checked against every
+application_assets/manifest.json found under the inputs.
+
+Pages are parsed on --workers processes (default: all cores) with the configured HTML extractor.
+At most a few pages per worker are in flight, so memory stays flat for any corpus size.
+
+Resuming: the output doubles as the index. A file whose path, size and mtime are already in it
+is skipped without being read, and so is any archive entry already listed. A page whose
+sha256 was processed before is not parsed again: its row copies the first copy's analysis and
+names it in "duplicate_of".
+
+Usage:  python reprocess_snapshots.py [paths ...] [--out reprocessed.jsonl] [--workers N] [--base-url URL]
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from urllib.parse import urljoin
+
+from applications_timeseries import parse_application_row
+from asset_cache import MANIFEST_NAME
+from html_extractors import get_extractor
+from portal_html import NEW_DATA_MARKER, PORTAL_BASE_URL, asset_urls_from_extract, is_logged_in
+from snapshot_store import ARCHIVE_NAME, INDEX_NAME, SnapshotReader, read_index
+
+OUTPUT_FILE = "reprocessed.jsonl"
+IN_FLIGHT_PER_WORKER = 4
+ARTIFACT_ZIP_GLOB = "*.zip"
+# Page-content fields a duplicate shares with the first copy; everything else is per source
+ANALYSIS_FIELDS = ("logged_in", "new_data", "applications", "asset_refs", "assets_cached")
+
+# name: unique source id; stamp: what tells an unchanged source ([size, mtime_ns], zip CRC, archive index hash);
+# path: a file a worker reads itself; body: page bytes/str already read on the main process
+Source = namedtuple("Source", "name kind stamp path body captured_at")
+
+# --- Sources ---
+
+def page_kind(filename):
+    base = os.path.basename(filename)
+    if base.startswith("application_view_"):
+        return "snapshot"
+    if base.startswith("error_page_"):
+        return "error_page"
+    if base.startswith("login_failed_response"):
+        return "login_failed"
+    return "page"
+
+def is_snapshot_archive(directory):
+    return os.path.exists(os.path.join(directory, ARCHIVE_NAME)) and os.path.exists(os.path.join(directory, INDEX_NAME))
+
+def iter_sources(paths, done):
+    """
+    Yields a Source per page under paths, lazily. done maps source name → stamp from earlier
+    runs; matching sources are skipped here, before anything is read.
+    """
+    for root in paths:
+        if os.path.isfile(root):
+            candidates = [root]
+        else:
+            candidates = sorted(glob.glob(os.path.join(root, "**", "*.html"), recursive=True)
+                                + glob.glob(os.path.join(root, "**", ARTIFACT_ZIP_GLOB), recursive=True)
+                                + [os.path.dirname(p) for p in glob.glob(os.path.join(root, "**", ARCHIVE_NAME), recursive=True)])
+        for candidate in candidates:
+            if os.path.isdir(candidate) and is_snapshot_archive(candidate):
+                yield from _archive_sources(candidate, done)
+            elif candidate.endswith(".zip"):
+                yield from _zip_sources(candidate, done)
+            elif candidate.endswith(".html"):
+                name = os.path.normpath(candidate)
+                stat = os.stat(candidate)
+                stamp = [stat.st_size, stat.st_mtime_ns]
+                if done.get(name) != stamp:
+                    yield Source(name, page_kind(candidate), stamp, candidate, None, None)
+
+def _archive_sources(directory, done):
+    base = os.path.normpath(os.path.join(directory, ARCHIVE_NAME))
+    # An archive is append-only: entries listed before never change
+    if all(f"{base}#{entry['seq']}" in done for entry in read_index(directory)):
+        return
+    for entry, body in SnapshotReader(directory).iter_snapshots():
+        name = f"{base}#{entry['seq']}"
+        if name not in done:
+            yield Source(name, "snapshot", entry["sha256"], None, body, entry.get("captured_at"))
+
+def _zip_sources(zip_path, done):
+    try:
+        archive = zipfile.ZipFile(zip_path)
+    except zipfile.BadZipFile:
+        print(f"⚠️ {zip_path} is not a zip file; skipping it.")
+        return
+    with archive:
+        for info in archive.infolist():
+            if not info.filename.endswith(".html"):
+                continue
+            name = f"{os.path.normpath(zip_path)}!{info.filename}"
+            if done.get(name) != info.CRC:
+                yield Source(name, page_kind(info.filename), info.CRC, None, archive.read(info), None)
+
+def load_asset_manifests(paths):
+    """URLs with a cached body in any application_assets/manifest.json under paths."""
+    cached = set()
+    for root in paths:
+        pattern = os.path.join(root, "**", MANIFEST_NAME) if os.path.isdir(root) else None
+        for manifest_path in glob.glob(pattern, recursive=True) if pattern else []:
+            cache_dir = os.path.dirname(manifest_path)
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not read {manifest_path}: {e}")
+                continue
+            for url, entry in entries.items():
+                if isinstance(entry, dict) and os.path.exists(os.path.join(cache_dir, entry.get("object", ""))):
+                    cached.add(url)
+    return cached
+
+# --- Worker side ---
+
+_worker = {}
+
+def _init_worker(known_hashes, cached_urls, page_url):
+    _worker["extractor"] = get_extractor()
+    _worker["known_hashes"] = known_hashes
+    _worker["cached_urls"] = cached_urls
+    _worker["page_url"] = page_url
+
+def process_source(source):
+    """Reads (if needed) and analyses one page. Runs in a worker process; returns the output row."""
+    row = {"source": source.name, "kind": source.kind, "stamp": source.stamp, "sha256": None, "bytes": None,
+           "captured_at": source.captured_at, "duplicate_of": None, "error": None}
+    started = time.perf_counter()
+    try:
+        if source.path is not None:
+            with open(source.path, "rb") as f:
+                body = f.read()
+        else:
+            body = source.body if isinstance(source.body, bytes) else source.body.encode("utf-8")
+        row["read_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        row["bytes"] = len(body)
+        row["sha256"] = hashlib.sha256(body).hexdigest()
+        if row["sha256"] in _worker["known_hashes"]:
+            row["duplicate_of"] = _worker["known_hashes"][row["sha256"]]
+            return row
+
+        parse_started = time.perf_counter()
+        page_html = body.decode("utf-8", errors="replace")
+        extract = _worker["extractor"].extract(page_html)
+        asset_refs = sorted(asset_urls_from_extract(extract, _worker["page_url"]))
+        row.update({
+            "logged_in": is_logged_in(body),
+            "new_data": NEW_DATA_MARKER.encode("utf-8") in body,
+            "applications": None if extract.applications is None else [parse_application_row(r) for r in extract.applications],
+            "asset_refs": asset_refs,
+            "assets_cached": sum(1 for url in asset_refs if url in _worker["cached_urls"]),
+            "parse_ms": round((time.perf_counter() - parse_started) * 1000, 2),
+        })
+    except Exception as e:  # Any failure (a parser bug on one odd page too) is this source's error row, not the run's end
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+# --- Main process ---
+
+def load_done(output_path):
+    """
+    The resume index from an earlier output: {source: stamp} and {sha256: (first source, analysis fields)}.
+    """
+    done, hashes = {}, {}
+    if not os.path.exists(output_path):
+        return done, hashes
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # A torn last line from an interrupted run
+            if row.get("error"):
+                continue  # Try failed sources again
+            done[row["source"]] = row.get("stamp")
+            if row.get("sha256") and not row.get("duplicate_of"):
+                hashes.setdefault(row["sha256"], (row["source"], {key: row.get(key) for key in ANALYSIS_FIELDS}))
+    return done, hashes
+
+def reprocess(paths, output_path=OUTPUT_FILE, workers=None, base_url=PORTAL_BASE_URL):
+    """Processes every new page under paths into output_path. Returns the rows written."""
+    workers = workers or os.cpu_count() or 1
+    done, known_hashes = load_done(output_path)
+    cached_urls = load_asset_manifests(paths)
+    page_url = urljoin(base_url.rstrip("/") + "/", "Applications.aspx")
+    print(f"Reprocessing {', '.join(paths)} on {workers} worker(s); {len(done)} source(s) already done, "
+          f"{len(cached_urls)} cached asset URL(s).")
+
+    rows = []
+    started = time.perf_counter()
+    first_sources = {sha256: source for sha256, (source, _) in known_hashes.items()}
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(first_sources, cached_urls, page_url)) as pool:
+
+        def write(row):
+            if row["sha256"] and not row["error"]:
+                # Duplicates within this run are only known here, after both copies were hashed
+                first, analysis = known_hashes.setdefault(row["sha256"], (row["source"], {key: row.get(key) for key in ANALYSIS_FIELDS}))
+                if first != row["source"]:
+                    row.update(analysis, duplicate_of=first, parse_ms=None)
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            rows.append(row)
+
+        pending = set()
+        for source in iter_sources(paths, done):
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    write(future.result())
+            pending.add(pool.submit(process_source, source))
+        for future in pending:
+            write(future.result())
+
+    report(rows, time.perf_counter() - started, workers)
+    return rows
+
+def report(rows, elapsed, workers):
+    parsed = [r for r in rows if r.get("parse_ms") is not None]
+    analysed = [r for r in rows if not r.get("error")]
+    duplicates = sum(1 for r in rows if r.get("duplicate_of"))
+    print("\n--- Reprocessing ---")
+    print(f"  Sources: {len(rows)} ({len(parsed)} parsed, {duplicates} duplicates, {len(rows) - len(analysed)} errors) "
+          f"in {elapsed:.2f} s on {workers} worker(s), {len(rows) / elapsed if elapsed else 0:.0f} pages/s")
+    if parsed:
+        parse_ms = [r["parse_ms"] for r in parsed]
+        print(f"  Parse time per page: median {statistics.median(parse_ms):.1f} ms, max {max(parse_ms):.1f} ms")
+    if analysed:
+        with_new_data = [r for r in analysed if r.get("new_data")]
+        print(f"  Pages logged in: {sum(1 for r in analysed if r.get('logged_in'))}/{len(analysed)}, "
+              f"with new data: {len(with_new_data)}")
+        first = min((r for r in with_new_data if r.get("captured_at")), key=lambda r: r["captured_at"], default=None)
+        if first:
+            print(f"  First capture with new data: {first['source']} ({first['captured_at']})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-analyse saved snapshots, error pages and archives in parallel.")
+    parser.add_argument("paths", nargs="*", default=["."], help="directories, snapshot archive directories or zip files")
+    parser.add_argument("--out", default=OUTPUT_FILE, help=f"JSONL output, also the resume index (default {OUTPUT_FILE})")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--base-url", default=PORTAL_BASE_URL, help="portal the pages came from, for asset URLs")
+    args = parser.parse_args()
+
+    missing = [p for p in args.paths if not os.path.exists(p)]
+    if missing:
+        print(f"❌ Not found: {', '.join(missing)}")
+        sys.exit(1)
+    reprocess(args.paths, args.out, args.workers, args.base_url)
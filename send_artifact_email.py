@@ -1,58 +1,284 @@
-import os
+# -*- coding: utf-8 -*-
+"""
+Packages the run's artifacts and mails them, one email per archive part.
+
+- Collects snapshots, error pages, the snapshot archive, time series and the asset cache.
+- Skips byte-identical files, and HTML snapshots that only differ in __VIEWSTATE/__EVENTVALIDATION.
+- Streams files into deflate (or, on request, zstd) archives; images and PDFs are stored as-is.
+- Starts a new part before one would pass ATTACHMENT_LIMIT_BYTES, so every email stays under the mail size limit.
+- Sends each part with a hand-written SMTP DATA stream, base64-encoding the zip in chunks,
+  so memory use does not grow with the size of the run.
+
+Environment: SMTP_USERNAME/SMTP_PASSWORD (or smtp.json), SMTP_SECURITY=ssl|starttls|plain (default ssl),
+PIS_ATTACHMENT_LIMIT_MB (default 18), PIS_ARTIFACT_COMPRESSION=deflate|zstd (default deflate; zstd needs
+Python 3.14+ to write and an unzip tool that knows method 93 to open).
+"""
+import base64
+import glob
+import hashlib
 import json
+import os
 import smtplib
+import sys
+import uuid
 import zipfile
-from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+
+from snapshot_store import normalize_snapshot
 
-ARTIFACTS_GLOB = '*.html'
-ZIP_NAME = 'pis-gr-scraper-html.zip'
+ARTIFACT_PATTERNS = [
+    'application_view_*.html',     # Snapshots (files mode); not *.html, which takes the home_page.html fixture too
+    'error_page_*.html',           # Error pages from runs before the flight recorder
+    'login_failed_response.html',
+    'flight_*.har',                # Flight recorder dumps (only written on failures)
+    '*.jsonl',                     # applications_timeseries.jsonl
+    'snapshots/*',                 # Snapshot archive + index
+    'trace_spans.*',               # Per-phase trace (JSON + CSV)
+    'application_assets/**/*',     # Asset cache objects + manifest
+    'runs/**/*',                   # Multi-account output
+    'crawl/**/*',                  # Crawled pages + index (PIS_CRAWL=1)
+]
+PARTS_DIR = 'artifact_parts'
+PART_NAME = 'pis-gr-scraper-artifacts'
+MANIFEST_NAME = 'artifacts_manifest.json'
 SMTP_ENV_VARS = ['SMTP_USERNAME', 'SMTP_PASSWORD']
 SMTP_JSON = 'smtp.json'
+SMTP_SECURITY = os.environ.get('SMTP_SECURITY', 'ssl').strip().lower()
+SMTP_TIMEOUT_SECONDS = 20
+
+# Gmail rejects messages over 25 MB and base64 adds a third, so 18 MB of zip is a safe default
+ATTACHMENT_LIMIT_BYTES = int(float(os.environ.get('PIS_ATTACHMENT_LIMIT_MB', '18')) * 1024 * 1024)
+HASH_CHUNK_SIZE = 1024 * 1024
+BASE64_CHUNK_SIZE = 57 * 1024     # Multiple of 57 bytes → whole 76-character base64 lines
+ZIP_END_RECORD_SIZE = 22
+ZIP_CENTRAL_ENTRY_SIZE = 46       # Plus the file name, per entry
+ALREADY_COMPRESSED = ('.png', '.gif', '.jpg', '.jpeg', '.pdf', '.zip', '.gz', '.zst')
+
+# --- Packaging ---
+
+def _compression_method():
+    # Deflate by default: the recipient opens the parts with whatever unzip they have, and few read zstd yet
+    requested = os.environ.get('PIS_ARTIFACT_COMPRESSION', 'deflate').strip().lower()
+    zstd = getattr(zipfile, 'ZIP_ZSTANDARD', None)  # Python 3.14+
+    if requested == 'zstd' and zstd is not None:
+        return zstd, 'zstd'
+    return zipfile.ZIP_DEFLATED, 'deflate'
+
+def collect_artifacts():
+    """Sorted, de-duplicated list of artifact files (the parts directory itself is never included)."""
+    paths = set()
+    for pattern in ARTIFACT_PATTERNS:
+        for path in glob.glob(pattern, recursive=True):
+            if os.path.isfile(path) and not path.startswith(PARTS_DIR + os.sep):
+                paths.add(os.path.normpath(path))
+    return sorted(paths)
+
+def content_key(path):
+    """
+    Hash used to spot duplicates. HTML snapshots are hashed with their volatile ASP.NET
+    state blanked (one page at a time in memory); everything else is hashed in chunks.
+    """
+    digest = hashlib.sha256()
+    if path.endswith('.html') and os.path.basename(path).startswith('application_view_'):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            digest.update(normalize_snapshot(f.read()).encode('utf-8'))
+        return 'snapshot:' + digest.hexdigest()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return 'file:' + digest.hexdigest()
+
+class PartWriter:
+    """Writes zip parts that each stay under limit_bytes (a single larger file gets a part of its own)."""
+
+    def __init__(self, parts_dir=PARTS_DIR, limit_bytes=ATTACHMENT_LIMIT_BYTES):
+        self.parts_dir = parts_dir
+        self.limit_bytes = limit_bytes
+        self.compression, self.compression_name = _compression_method()
+        self.parts = []          # [(zip path, [arcnames])]
+        self._zip = None
+        self._central_bytes = 0
+
+    def _open_part(self):
+        self.close_part()
+        path = os.path.join(self.parts_dir, f'{PART_NAME}_part{len(self.parts) + 1:02d}.zip')
+        self._zip = zipfile.ZipFile(path, 'w')
+        self._central_bytes = ZIP_END_RECORD_SIZE
+        self.parts.append((path, []))
+
+    def _projected_size(self, arcname, size):
+        """Worst case part size if a file of this size were added stored (compression only shrinks it)."""
+        local_header = 30 + len(arcname.encode('utf-8'))
+        central = ZIP_CENTRAL_ENTRY_SIZE + len(arcname.encode('utf-8'))
+        return self._zip.fp.tell() + local_header + size + self._central_bytes + central
+
+    def add(self, path, arcname):
+        size = os.path.getsize(path)
+        if self._zip is None or (self.parts[-1][1] and self._projected_size(arcname, size) > self.limit_bytes):
+            self._open_part()
+        if size > self.limit_bytes:
+            print(f'⚠️ {path} alone is larger than the attachment limit ({size / 1024 / 1024:.1f} MB).')
+        compress_type = zipfile.ZIP_STORED if path.lower().endswith(ALREADY_COMPRESSED) else self.compression
+        self._zip.write(path, arcname, compress_type=compress_type)  # zipfile copies in chunks
+        self._central_bytes += ZIP_CENTRAL_ENTRY_SIZE + len(arcname.encode('utf-8'))
+        self.parts[-1][1].append(arcname)
 
-# Find SMTP credentials
-smtp_username = os.environ.get('SMTP_USERNAME')
-smtp_password = os.environ.get('SMTP_PASSWORD')
-if smtp_username and smtp_password:
-    print('SMTP credentials loaded from environment variables.')
-    smtp_server = os.environ.get('SMTP_SERVER', 'smtp.gmail.com')
-    smtp_port = int(os.environ.get('SMTP_PORT', 465))
-    receiver = os.environ.get('SMTP_RECEIVER')
-else:
+    def add_bytes(self, arcname, data):
+        if self._zip is None or (self.parts[-1][1] and self._projected_size(arcname, len(data)) > self.limit_bytes):
+            self._open_part()
+        self._zip.writestr(arcname, data, compress_type=self.compression)
+        self.parts[-1][1].append(arcname)
+
+    def close_part(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+def package_artifacts(parts_dir=PARTS_DIR, limit_bytes=ATTACHMENT_LIMIT_BYTES):
+    """Builds fresh archive parts from the current artifacts. Returns [(zip path, [arcnames])]."""
+    os.makedirs(parts_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(parts_dir, f'{PART_NAME}_part*.zip')):
+        os.remove(stale)  # Never reuse parts from an earlier run
+
+    artifact_files = collect_artifacts()
+    if not artifact_files:
+        return []
+
+    writer = PartWriter(parts_dir, limit_bytes)
+    seen = {}
+    duplicates = {}
+    input_bytes = 0
+    for path in artifact_files:
+        arcname = path.replace(os.sep, '/')
+        key = content_key(path)
+        if key in seen:
+            duplicates[arcname] = seen[key]
+            continue
+        seen[key] = arcname
+        input_bytes += os.path.getsize(path)
+        writer.add(path, arcname)
+
+    # Lists which part holds each file and which skipped files duplicate which kept one
+    manifest = {
+        'parts': {os.path.basename(p): names for p, names in writer.parts},
+        'duplicates': duplicates,
+        'compression': writer.compression_name,
+    }
+    writer.add_bytes(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+    writer.close_part()
+
+    output_bytes = sum(os.path.getsize(p) for p, _ in writer.parts)
+    print(f'Packaged {len(seen)} files ({len(duplicates)} duplicates skipped), {input_bytes / 1024:.0f} KiB → '
+          f'{output_bytes / 1024:.0f} KiB in {len(writer.parts)} part(s) ({writer.compression_name}).')
+    return writer.parts
+
+# --- Sending ---
+
+def load_smtp_settings():
+    smtp_username = os.environ.get('SMTP_USERNAME')
+    smtp_password = os.environ.get('SMTP_PASSWORD')
+    if smtp_username and smtp_password:
+        print('SMTP credentials loaded from environment variables.')
+        return {
+            'smtp_server': os.environ.get('SMTP_SERVER', 'smtp.gmail.com'),
+            'smtp_port': int(os.environ.get('SMTP_PORT', 465)),
+            'smtp_username': smtp_username,
+            'smtp_password': smtp_password,
+            'receiver': os.environ.get('SMTP_RECEIVER'),
+        }
     with open(SMTP_JSON, 'r', encoding='utf-8') as f:
         smtp_conf = json.load(f)
-    smtp_server = smtp_conf['smtp_server']
-    smtp_port = int(smtp_conf['smtp_port'])
-    smtp_username = smtp_conf['smtp_username']
-    smtp_password = smtp_conf['smtp_password']
+    smtp_conf['smtp_port'] = int(smtp_conf['smtp_port'])
+    return smtp_conf
+
+def connect_smtp(smtp_conf, security=SMTP_SECURITY, timeout=SMTP_TIMEOUT_SECONDS):
+    """
+    A logged-in SMTP connection. security is 'ssl' (implicit TLS, port 465), 'starttls' (port 587)
+    or 'plain' (no TLS, for a local stand-in such as fake_smtp.py).
+    """
+    host, port = smtp_conf['smtp_server'], smtp_conf['smtp_port']
+    if security == 'ssl':
+        server = smtplib.SMTP_SSL(host, port, timeout=timeout)
+    else:
+        server = smtplib.SMTP(host, port, timeout=timeout)
+        if security == 'starttls':
+            server.starttls()
+    try:
+        server.login(smtp_conf['smtp_username'], smtp_conf['smtp_password'])
+    except BaseException:
+        server.close()
+        raise
+    return server
+
+def _message_head(sender, receiver, subject, body_text, boundary, filename):
+    return (
+        f'From: {sender}\r\n'
+        f'To: {receiver}\r\n'
+        f'Subject: {subject}\r\n'
+        f'Date: {formatdate(localtime=True)}\r\n'
+        f'Message-ID: {make_msgid()}\r\n'
+        'MIME-Version: 1.0\r\n'
+        f'Content-Type: multipart/mixed; boundary="{boundary}"\r\n'
+        '\r\n'
+        f'--{boundary}\r\n'
+        'Content-Type: text/plain; charset="utf-8"\r\n'
+        'Content-Transfer-Encoding: base64\r\n'
+        '\r\n'
+        + base64.encodebytes(body_text.encode('utf-8')).decode('ascii').replace('\n', '\r\n')
+        + f'\r\n--{boundary}\r\n'
+        'Content-Type: application/zip\r\n'
+        'Content-Transfer-Encoding: base64\r\n'
+        f'Content-Disposition: attachment; filename="{filename}"\r\n'
+        '\r\n'
+    )
+
+def send_part_streaming(server, sender, receiver, subject, body_text, zip_path):
+    """
+    Sends one message with zip_path attached, base64-encoding it chunk by chunk straight
+    into the SMTP DATA stream. Base64 lines and our own headers never start with '.',
+    so no dot-stuffing is needed.
+    """
+    boundary = f'=={uuid.uuid4().hex}'
+    server.ehlo_or_helo_if_needed()
+    server.mail(sender)
+    code, resp = server.rcpt(receiver)
+    if code not in (250, 251):
+        raise smtplib.SMTPRecipientsRefused({receiver: (code, resp)})
+    code, resp = server.docmd('DATA')
+    if code != 354:
+        raise smtplib.SMTPDataError(code, resp)
+
+    server.send(_message_head(sender, receiver, subject, body_text, boundary, os.path.basename(zip_path)))
+    with open(zip_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(BASE64_CHUNK_SIZE), b''):
+            server.send(base64.encodebytes(chunk).replace(b'\n', b'\r\n'))
+    server.send(f'\r\n--{boundary}--\r\n.\r\n')
+
+    code, resp = server.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, resp)
+
+def send_parts(parts, smtp_conf):
+    sender = smtp_conf['smtp_username']
     receiver = smtp_conf['receiver']
+    total = len(parts)
+    with connect_smtp(smtp_conf) as server:
+        for number, (zip_path, names) in enumerate(parts, start=1):
+            subject = 'PIS-GR Scraper Artifacts' if total == 1 else f'PIS-GR Scraper Artifacts (part {number}/{total})'
+            body_text = (f'See attached artifacts from PIS-GR scraper: {len(names)} files, '
+                         f'{os.path.getsize(zip_path) / 1024:.0f} KiB. {MANIFEST_NAME} in the last part lists every file.')
+            send_part_streaming(server, sender, receiver, subject, body_text, zip_path)
+            print(f'Email {number}/{total} sent ({os.path.basename(zip_path)}).')
 
-# Zip artifacts
-import glob
-artifact_files = glob.glob(ARTIFACTS_GLOB)
-if not artifact_files:
-    print('No HTML artifacts found to send.')
-    exit(0)
-if not os.path.exists(ZIP_NAME):
-    with zipfile.ZipFile(ZIP_NAME, 'w') as zipf:
-        for fname in artifact_files:
-            zipf.write(fname)
-    print(f'Artifacts zipped to {ZIP_NAME}')
-else:
-    print(f'Using existing zip: {ZIP_NAME}')
-
-# Send email
-msg = EmailMessage()
-msg['Subject'] = 'PIS-GR Scraper Artifacts'
-msg['From'] = smtp_username
-msg['To'] = receiver
-msg.set_content('See attached HTML artifacts from PIS-GR scraper.')
-with open(ZIP_NAME, 'rb') as f:
-    msg.add_attachment(f.read(), maintype='application', subtype='zip', filename=ZIP_NAME)
-
-try:
-    with smtplib.SMTP_SSL(smtp_server, smtp_port) as server:
-        server.login(smtp_username, smtp_password)
-        server.send_message(msg)
-    print('Email sent successfully.')
-except Exception as e:
-    print(f'Failed to send email: {e}')
+if __name__ == '__main__':
+    parts = package_artifacts()
+    if not parts:
+        print('No artifacts found to send.')
+        sys.exit(0)
+
+    smtp_conf = load_smtp_settings()
+    try:
+        send_parts(parts, smtp_conf)
+        print('Email sent successfully.')
+    except Exception as e:
+        print(f'Failed to send email: {e}')
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Encrypted cache of the authenticated portal session, so a run can skip the login.
+
+After a successful login the bot saves the session's storage_state (Playwright's
+{"cookies": [...], "origins": [...]} format, also used for the HTTP backend's cookies)
+to session_cache.bin. The next run restores it, checks it with one cheap authenticated
+GET of Applications.aspx and only falls back to a full login when the session is dead.
+
+The file is encrypted with Fernet (AES-128-CBC + HMAC-SHA256, from the `cryptography`
+package). The key is derived with PBKDF2 from PIS_SESSION_CACHE_KEY, or from the
+account's own username + password when that is not set, and a random per-file salt.
+A file written for another account, or with another key, simply fails to decrypt.
+The key is derived once per SessionCache (on load or on the first save) and reused for
+later saves, so re-saving after a mid-run re-login costs one Fernet encryption, not 200k
+PBKDF2 rounds.
+
+Every restore attempt is appended to session_cache.jsonl with how long the check took
+and how much startup time it saved compared to the last full login:
+
+    {"at": "...", "username": "demo", "result": "hit", "validate_ms": 61.2, "login_ms": 742.9, "saved_ms": 681.7}
+
+Disable with PIS_SESSION_CACHE=0.
+"""
+import base64
+import hashlib
+import json
+import os
+import time
+
+from http_backend import browser_cookies_from_jar
+from portal_clock import greek_now
+
+SESSION_CACHE_ENABLED = os.environ.get("PIS_SESSION_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+SESSION_CACHE_KEY = os.environ.get("PIS_SESSION_CACHE_KEY", "")
+SESSION_CACHE_FILE = "session_cache.bin"
+SESSION_CACHE_LOG_FILE = "session_cache.jsonl"
+SESSION_CACHE_MAX_AGE_SECONDS = 12 * 3600  # Older sessions are not even tried
+
+FILE_MAGIC = b"PISSC1"
+SALT_BYTES = 16
+PBKDF2_ITERATIONS = 200_000
+
+# Restore results, as logged
+RESULT_HIT = "hit"            # Cached session was still valid: login skipped
+RESULT_MISS = "miss"          # No usable cache file
+RESULT_EXPIRED = "expired"    # Cache file was fine but the portal no longer accepted the session
+
+def _derive_key(passphrase, salt):
+    raw = hashlib.pbkdf2_hmac("sha256", passphrase.encode("utf-8"), salt, PBKDF2_ITERATIONS)
+    return base64.urlsafe_b64encode(raw)
+
+def storage_state_from_session(session):
+    """The cookies of a requests.Session in Playwright's storage_state format."""
+    return {"cookies": browser_cookies_from_jar(session.cookies), "origins": []}
+
+class SessionCache:
+    """One account's encrypted storage_state file, plus the restore log."""
+
+    def __init__(self, username, password, path=SESSION_CACHE_FILE, log_path=SESSION_CACHE_LOG_FILE,
+                 passphrase=None, max_age_seconds=SESSION_CACHE_MAX_AGE_SECONDS):
+        from cryptography.fernet import Fernet  # Imported here so a missing package only disables the cache
+        self._fernet_class = Fernet
+        self.username = username
+        self.passphrase = passphrase or SESSION_CACHE_KEY or f"{username}\0{password}"
+        self.path = path
+        self.log_path = log_path
+        self.max_age_seconds = max_age_seconds
+        self.last_login_ms = None  # Duration of the last full login, carried across runs in the file
+        self._salt = None          # Salt and derived key of the file, kept after the first derivation
+        self._key = None
+
+    def load(self):
+        """The cached storage_state, or None if there is no usable file (missing, foreign, corrupt or too old)."""
+        try:
+            with open(self.path, "rb") as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return None
+        if not blob.startswith(FILE_MAGIC):
+            print(f"⚠️ {self.path} is not a session cache file; ignoring it.")
+            return None
+        salt = blob[len(FILE_MAGIC):len(FILE_MAGIC) + SALT_BYTES]
+        token = blob[len(FILE_MAGIC) + SALT_BYTES:]
+        key = _derive_key(self.passphrase, salt)
+        try:
+            payload = json.loads(self._fernet_class(key).decrypt(token))
+        except Exception:
+            print(f"⚠️ Could not decrypt {self.path} (other account or key); a full login is needed.")
+            return None
+        self._salt, self._key = salt, key
+        if payload.get("username") != self.username:
+            return None
+        self.last_login_ms = payload.get("login_ms")
+        age = time.time() - payload.get("saved_at", 0)
+        if age > self.max_age_seconds:
+            print(f"  Cached session is {age / 3600:.1f} h old; not trying it.")
+            return None
+        return payload.get("storage_state")
+
+    def save(self, storage_state, login_ms=None):
+        """Encrypts and writes the storage_state; login_ms is the full login it came from (kept if None)."""
+        if login_ms is not None:
+            self.last_login_ms = login_ms
+        payload = json.dumps({
+            "username": self.username,
+            "saved_at": time.time(),
+            "login_ms": self.last_login_ms,
+            "storage_state": storage_state,
+        }, ensure_ascii=False).encode("utf-8")
+        if self._key is None:
+            self._salt = os.urandom(SALT_BYTES)
+            self._key = _derive_key(self.passphrase, self._salt)
+        token = self._fernet_class(self._key).encrypt(payload)  # Fresh random IV on every save
+        tmp_path = self.path + ".tmp"
+        with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+            f.write(FILE_MAGIC + self._salt + token)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def record(self, result, validate_ms=None, login_ms=None):
+        """Logs one restore attempt; on a hit, the saving is the last full login minus the validation request."""
+        login_ms = login_ms if login_ms is not None else self.last_login_ms
+        saved_ms = login_ms - (validate_ms or 0) if result == RESULT_HIT and login_ms is not None else None
+        row = {
+            "at": greek_now().isoformat(timespec="milliseconds"),
+            "username": self.username,
+            "result": result,
+            "validate_ms": round(validate_ms, 1) if validate_ms is not None else None,
+            "login_ms": round(login_ms, 1) if login_ms is not None else None,
+            "saved_ms": round(saved_ms, 1) if saved_ms is not None else None,
+        }
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        if result == RESULT_HIT:
+            saving = f", saved ~{saved_ms:.0f} ms of startup" if saved_ms is not None else ""
+            print(f"✅ Reused cached session (checked in {validate_ms:.0f} ms{saving}).")
+
+def restore_or_login(cache, restored_state, is_valid, login, clear, storage_state):
+    """
+    Phase 1 with a session cache: keeps the restored session if is_valid() confirms it,
+    otherwise clear()s it and runs the full login(). A fresh login's storage_state() is saved
+    for the next run. Works for either backend; returns True once logged in.
+    """
+    if cache is None:
+        return login()
+    result, validate_ms = RESULT_MISS, None
+    if restored_state is not None:
+        started = time.perf_counter()
+        valid = is_valid()
+        validate_ms = (time.perf_counter() - started) * 1000
+        if valid:
+            cache.record(RESULT_HIT, validate_ms)
+            return True
+        print(f"⚠️ Cached session is no longer valid (checked in {validate_ms:.0f} ms); logging in.")
+        result = RESULT_EXPIRED
+        clear()
+
+    started = time.perf_counter()
+    if not login():
+        return False
+    login_ms = (time.perf_counter() - started) * 1000
+    cache.save(storage_state(), login_ms)
+    cache.record(result, validate_ms, login_ms)
+    return True
+
+def open_session_cache(username, password, **kwargs):
+    """A SessionCache for the account, or None when disabled or `cryptography` is not installed."""
+    if not SESSION_CACHE_ENABLED:
+        return None
+    try:
+        return SessionCache(username, password, **kwargs)
+    except ImportError:
+        print("⚠️ Session cache needs the 'cryptography' package; logging in every run.")
+        return None
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Keeps the portal session alive while the bot waits for the target time.
+
+Between Phase 2 and T0 the bot can sit idle for minutes, long enough for the ASP.NET
+session to time out. Without a keepalive the Phase 3 loop only finds out on its first
+poll and re-logs in at the worst possible moment. SessionKeepalive:
+
+  - sends one cheap authenticated request every KEEPALIVE_INTERVAL_SECONDS during the wait
+    (which also renews the sliding forms-authentication ticket),
+  - re-authenticates as soon as a check shows the session has expired,
+  - makes a final "handover" check KEEPALIVE_HANDOVER_LEAD_SECONDS before the first request,
+    so Phase 3 starts on a known-fresh session over a connection that was just used.
+
+The checks run on the waiting thread (fire_at() calls run_until() and handover()), because
+Playwright's sync objects may only be used from the thread that created them.
+
+Interval: PIS_KEEPALIVE_INTERVAL seconds (default 120; 0 disables the keepalive).
+"""
+import os
+import statistics
+import time
+
+from portal_clock import pause
+from tracing import TRACER
+
+KEEPALIVE_INTERVAL_SECONDS = float(os.environ.get("PIS_KEEPALIVE_INTERVAL", "120"))
+KEEPALIVE_HANDOVER_LEAD_SECONDS = 5.0  # Last check this long before the first Phase 3 request
+
+class SessionKeepalive:
+    """
+    ping() returns True while the session is still authenticated (and raises on network errors);
+    relogin() performs a full login and returns True on success.
+    """
+
+    def __init__(self, ping, relogin, interval_seconds=KEEPALIVE_INTERVAL_SECONDS,
+                 handover_lead_seconds=KEEPALIVE_HANDOVER_LEAD_SECONDS):
+        self.ping = ping
+        self.relogin = relogin
+        self.interval_seconds = interval_seconds
+        self.handover_lead_seconds = handover_lead_seconds
+        self.checks = 0
+        self.expired = 0
+        self.relogins = 0
+        self.errors = 0
+        self.check_ms = []
+        self.session_fresh = True
+
+    def check(self, reason="keepalive"):
+        """One keepalive round: ping, and re-login if the session turned out to be dead."""
+        self.checks += 1
+        started = time.perf_counter()
+        try:
+            with TRACER.span("keepalive", reason=reason):
+                valid = self.ping()
+        except Exception as e:
+            # A network error says nothing about the session; try again at the next tick
+            self.errors += 1
+            print(f"  ⚠️ Keepalive check failed ({reason}): {e}")
+            return
+        self.check_ms.append((time.perf_counter() - started) * 1000)
+        if valid:
+            self.session_fresh = True
+            print(f"  Keepalive ({reason}): session alive ({self.check_ms[-1]:.0f} ms)")
+            return
+
+        self.expired += 1
+        print(f"  ⚠️ Keepalive ({reason}): session expired; re-authenticating before the target time...")
+        with TRACER.span("login", reason=reason):
+            self.session_fresh = self.relogin()
+        if self.session_fresh:
+            self.relogins += 1
+            print("  ✅ Re-authenticated during the wait.")
+        else:
+            print("  ❌ Re-authentication during the wait failed; Phase 3 will retry.")
+
+    def run_until(self, deadline_ts, interrupt=None):
+        """
+        Checks the session every interval until the next check would fall after deadline_ts (local time)
+        or interrupt (a threading.Event) is set.
+        """
+        if self.interval_seconds <= 0:
+            return
+        while time.time() + self.interval_seconds < deadline_ts:
+            if deadline_ts != float("inf"):
+                print(f"Waiting {deadline_ts - time.time():.1f} seconds (keepalive every {self.interval_seconds:.0f} s)...")
+            if pause(self.interval_seconds, interrupt):
+                return
+            self.check()
+
+    def handover(self, fire_ts, interrupt=None):
+        """Final check shortly before fire_ts, so Phase 3 starts on a session verified seconds ago."""
+        if self.interval_seconds <= 0:
+            return
+        handover_ts = fire_ts - self.handover_lead_seconds
+        if handover_ts < time.time():
+            print("  Too close to the target for a handover check; keeping the session as is.")
+            return
+        if pause(handover_ts - time.time(), interrupt):
+            return
+        self.check("handover")
+
+    def report(self):
+        if not self.checks:
+            return
+        median = f", median {statistics.median(self.check_ms):.0f} ms" if self.check_ms else ""
+        print("\n--- Session keepalive ---")
+        print(f"  Checks: {self.checks}{median}; expired: {self.expired}, re-logins: {self.relogins}, errors: {self.errors}")
+        print(f"  Session handed to Phase 3: {'fresh' if self.session_fresh else 'NOT verified'}")
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Change-detecting snapshot store.
+
+Consecutive captures of Applications.aspx are nearly identical; what changes every
+time is the ASP.NET hidden state (__VIEWSTATE, __EVENTVALIDATION). The store blanks
+those volatile values only to hash what is left; what it writes is the raw response body:
+
+  - nothing but an index line when the content hash did not change ("same"),
+  - a zlib-compressed line delta against the previous stored raw body ("delta"),
+  - a full zlib-compressed copy every KEYFRAME_INTERVAL stored snapshots ("full"),
+    so rebuilding one snapshot never replays an unbounded delta chain.
+
+SnapshotReader gives back the exact bytes the portal sent for every stored capture (bytes
+that are not valid UTF-8 survive too); a "same" capture rebuilds to the body it matched.
+
+Everything goes into one append-only archive plus an append-only JSONL index:
+
+    snapshots/archive.bin     records: kind (1 byte) | seq (4 bytes) | length (4 bytes) | payload
+    snapshots/index.jsonl     {"seq", "captured_at", "sha256", "kind", "offset", "length", "base_seq"}
+
+Usage:  python snapshot_store.py list [snapshots]
+        python snapshot_store.py extract [snapshots] [output_dir]
+"""
+import difflib
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import threading
+import zlib
+
+from portal_clock import greek_now
+
+SNAPSHOT_DIR = "snapshots"
+ARCHIVE_NAME = "archive.bin"
+INDEX_NAME = "index.jsonl"
+KEYFRAME_INTERVAL = 50          # Stored (changed) snapshots between two full copies
+COMPRESSION_LEVEL = 6
+
+KIND_FULL = "full"
+KIND_DELTA = "delta"
+KIND_SAME = "same"
+_KIND_CODES = {KIND_FULL: 0, KIND_DELTA: 1}
+_KIND_NAMES = {code: kind for kind, code in _KIND_CODES.items()}
+_RECORD_HEADER = struct.Struct(">BII")
+
+# value="..." of the hidden state inputs; it changes on every response and carries no page content
+_VOLATILE_INPUT_RE = re.compile(
+    r'(<input\b[^>]*\bname="(?:__VIEWSTATE|__EVENTVALIDATION|__PREVIOUSPAGE|__EVENTTARGET|__EVENTARGUMENT)"[^>]*\bvalue=")[^"]*(")',
+    re.IGNORECASE,
+)
+
+def normalize_snapshot(page_html):
+    """Blanks the volatile ASP.NET hidden field values so identical pages hash identically."""
+    return _VOLATILE_INPUT_RE.sub(r"\1\2", page_html)
+
+def _text(raw):
+    """Lossless str form of a body for line deltas: undecodable bytes become surrogates, not U+FFFD."""
+    return raw.decode("utf-8", errors="surrogateescape")
+
+def _raw(text):
+    return text.encode("utf-8", errors="surrogateescape")
+
+def _make_delta(previous_lines, lines):
+    """Line delta as a compact op list: ["=", start, end] copies old lines, ["+", [...]] inserts new ones."""
+    ops = []
+    matcher = difflib.SequenceMatcher(None, previous_lines, lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["=", i1, i2])
+        elif j2 > j1:  # replace / insert; plain deletes need no op
+            ops.append(["+", lines[j1:j2]])
+    return ops
+
+def _apply_delta(previous_lines, ops):
+    lines = []
+    for op in ops:
+        if op[0] == "=":
+            lines.extend(previous_lines[op[1]:op[2]])
+        else:
+            lines.extend(op[1])
+    return lines
+
+class SnapshotStore:
+    """Append-only, delta-compressed store of raw page snapshots, de-duplicated by normalised content. Thread-safe."""
+
+    def __init__(self, directory=SNAPSHOT_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.archive_path = os.path.join(directory, ARCHIVE_NAME)
+        self.index_path = os.path.join(directory, INDEX_NAME)
+        self._lock = threading.Lock()
+        self._archive = open(self.archive_path, "ab")
+        self._index = open(self.index_path, "a", encoding="utf-8")
+        self._next_seq = 0
+        self._last_sha = None
+        self._last_stored_seq = None
+        self._last_lines = None
+        self._since_keyframe = 0
+        self.bytes_in = 0
+        self.bytes_written = 0
+        self._resume()
+
+    def _resume(self):
+        """Continues an existing store: sequence numbers and the delta base pick up where they left off."""
+        entries = list(read_index(self.directory)) if os.path.getsize(self.index_path) else []
+        if not entries:
+            return
+        self._next_seq = entries[-1]["seq"] + 1
+        self._last_sha = entries[-1]["sha256"]
+        stored = [e for e in entries if e["kind"] != KIND_SAME]
+        if stored:
+            self._last_stored_seq = stored[-1]["seq"]
+            self._last_lines = _text(SnapshotReader(self.directory).get(self._last_stored_seq)).splitlines(keepends=True)
+            self._since_keyframe = len(stored) - 1 - max(
+                (i for i, e in enumerate(stored) if e["kind"] == KIND_FULL), default=0
+            )
+
+    def add(self, page_html, captured_at=None):
+        """
+        Stores one capture (str, or the raw UTF-8 response body as bytes).
+        Returns its index entry (kind tells whether anything was written).
+        """
+        raw = page_html if isinstance(page_html, bytes) else page_html.encode("utf-8")
+        text = _text(raw)
+        # The normalised text only decides whether the page changed; the raw body is what gets stored
+        sha = hashlib.sha256(_raw(normalize_snapshot(text))).hexdigest()
+        captured_at = captured_at or greek_now().isoformat(timespec="milliseconds")
+
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self.bytes_in += len(raw)
+            entry = {"seq": seq, "captured_at": captured_at, "sha256": sha,
+                     "kind": KIND_SAME, "offset": None, "length": 0, "base_seq": self._last_stored_seq}
+
+            if sha != self._last_sha or self._last_stored_seq is None:
+                lines = text.splitlines(keepends=True)
+                if self._last_lines is None or self._since_keyframe >= KEYFRAME_INTERVAL:
+                    kind, payload, base_seq = KIND_FULL, raw, None
+                    self._since_keyframe = 0
+                else:
+                    ops = _make_delta(self._last_lines, lines)
+                    kind, payload, base_seq = KIND_DELTA, _raw(json.dumps(ops, ensure_ascii=False)), self._last_stored_seq
+                    self._since_keyframe += 1
+                compressed = zlib.compress(payload, COMPRESSION_LEVEL)
+
+                offset = self._archive.tell()
+                self._archive.write(_RECORD_HEADER.pack(_KIND_CODES[kind], seq, len(compressed)))
+                self._archive.write(compressed)
+                self._archive.flush()
+                self.bytes_written += _RECORD_HEADER.size + len(compressed)
+
+                entry.update(kind=kind, offset=offset, length=len(compressed), base_seq=base_seq)
+                self._last_stored_seq = seq
+                self._last_lines = lines
+                self._last_sha = sha
+
+            self._index.write(json.dumps(entry) + "\n")
+            self._index.flush()
+            return entry
+
+    def save_snapshot(self, page_html, output_dir="", captured_at=None):
+        """Same contract as test_bot.save_snapshot (output_dir is unused). Returns a short description."""
+        entry = self.add(page_html, captured_at)
+        return f"{self.archive_path}#{entry['seq']} ({entry['kind']}, {entry['length'] / 1024:.1f} KiB)"
+
+    def report(self):
+        ratio = self.bytes_in / self.bytes_written if self.bytes_written else float("inf")
+        print(f"  Snapshot store: {self.bytes_in / 1024:.0f} KiB captured → {self.bytes_written / 1024:.1f} KiB written "
+              f"to {self.archive_path} (x{ratio:.0f})")
+
+    def close(self):
+        with self._lock:
+            self._archive.close()
+            self._index.close()
+
+def read_index(directory=SNAPSHOT_DIR):
+    """Yields index entries in capture order (a torn last line is ignored)."""
+    with open(os.path.join(directory, INDEX_NAME), "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+class SnapshotReader:
+    """Rebuilds snapshots from an archive, holding only the previous stored snapshot in memory."""
+
+    def __init__(self, directory=SNAPSHOT_DIR):
+        self.directory = directory
+        self.archive_path = os.path.join(directory, ARCHIVE_NAME)
+
+    def _read_payload(self, archive, entry):
+        archive.seek(entry["offset"])
+        kind_code, seq, length = _RECORD_HEADER.unpack(archive.read(_RECORD_HEADER.size))
+        if seq != entry["seq"] or _KIND_NAMES[kind_code] != entry["kind"]:
+            raise ValueError(f"Archive record at offset {entry['offset']} does not match index entry {entry['seq']}")
+        return zlib.decompress(archive.read(length))
+
+    def iter_snapshots(self):
+        """Yields (entry, page_bytes) for every capture, in order, streaming through the archive once."""
+        lines = None
+        body = None
+        with open(self.archive_path, "rb") as archive:
+            for entry in read_index(self.directory):
+                if entry["kind"] == KIND_FULL:
+                    body = self._read_payload(archive, entry)
+                    lines = _text(body).splitlines(keepends=True)
+                elif entry["kind"] == KIND_DELTA:
+                    ops = json.loads(_text(self._read_payload(archive, entry)))
+                    lines = _apply_delta(lines, ops)
+                    body = _raw("".join(lines))
+                yield entry, body
+
+    def get(self, seq):
+        """Rebuilds one snapshot (as bytes) by replaying from the nearest keyframe before it."""
+        entries = {}
+        for entry in read_index(self.directory):
+            entries[entry["seq"]] = entry
+            if entry["seq"] == seq:
+                break
+        if seq not in entries:
+            raise KeyError(f"No snapshot {seq} in {self.directory}")
+
+        stored_seq = seq if entries[seq]["kind"] != KIND_SAME else entries[seq]["base_seq"]
+        chain = []
+        while stored_seq is not None:
+            chain.append(entries[stored_seq])
+            if entries[stored_seq]["kind"] == KIND_FULL:
+                break
+            stored_seq = entries[stored_seq]["base_seq"]
+
+        lines = None
+        with open(self.archive_path, "rb") as archive:
+            for entry in reversed(chain):
+                payload = self._read_payload(archive, entry)
+                if entry["kind"] == KIND_FULL:
+                    lines = _text(payload).splitlines(keepends=True)
+                else:
+                    lines = _apply_delta(lines, json.loads(_text(payload)))
+        return _raw("".join(lines))
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    store_dir = sys.argv[2] if len(sys.argv) > 2 else SNAPSHOT_DIR
+    if command == "list":
+        for index_entry in read_index(store_dir):
+            print(f"{index_entry['seq']:5d}  {index_entry['captured_at']}  {index_entry['kind']:<5}  "
+                  f"{index_entry['length']:7d} B  {index_entry['sha256'][:12]}")
+    elif command == "extract":
+        out_dir = sys.argv[3] if len(sys.argv) > 3 else "snapshots_extracted"
+        os.makedirs(out_dir, exist_ok=True)
+        count = 0
+        for index_entry, snapshot_bytes in SnapshotReader(store_dir).iter_snapshots():
+            stamp = index_entry["captured_at"].replace(":", "").replace("-", "").replace("T", "_")[:22]
+            with open(os.path.join(out_dir, f"application_view_{index_entry['seq']:05d}_{stamp}.html"), "wb") as f:
+                f.write(snapshot_bytes)
+            count += 1
+        print(f"✅ Extracted {count} snapshots to {out_dir}/")
+    else:
+        print(f"Unknown command '{command}'. Use 'list' or 'extract'.")
+        sys.exit(1)
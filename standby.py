@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Warm standby mode: start early, get everything ready, then fire on schedule or on command.
+
+    python standby.py
+
+A cron-started run pays for the Python start-up, the browser launch and the login right
+before the event, and cron start times drift. The daemon does all of that once, well ahead:
+it launches the browser (or opens the HTTP session), logs in and pre-loads Applications.aspx,
+then works through the upcoming events in events.json (see events_config.py). For each
+event it sits armed with a warm, kept-alive session and starts Phase 3 at the event's time,
+or as soon as it is triggered:
+
+    curl -X POST http://127.0.0.1:8765/fire     # fire the armed event now
+    curl http://127.0.0.1:8765/status           # armed event, seconds left, finished events
+    curl -X POST http://127.0.0.1:8765/stop     # stop after the current event
+
+With PIS_TRIGGER_SOCKET=/path/to.sock the same commands ("fire", "status", "stop") are also
+accepted one per line on a Unix socket:  echo fire | nc -U /path/to.sock
+
+Events with "at": null have no scheduled time and wait for a trigger. Without an events file
+the daemon arms a single event at test_bot.get_target_event_time().
+Every fired event is appended to standby_events.jsonl.
+"""
+import json
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from playwright.sync_api import sync_playwright
+
+from events_config import EVENTS_FILE, Event, load_events, upcoming_events
+from portal_clock import greek_now
+from test_bot import (
+    FETCH_BACKEND,
+    BotRun,
+    close_run,
+    get_target_event_time,
+    load_credentials,
+    make_keepalive,
+    prepare_browser_run,
+    prepare_http_run,
+    scrape_run,
+    wait_for_event,
+)
+from tracing import TRACER
+
+TRIGGER_HOST = "127.0.0.1"  # Local trigger only: never listen on a public interface
+TRIGGER_PORT = int(os.environ.get("PIS_TRIGGER_PORT", "8765"))  # 0 disables the HTTP trigger
+TRIGGER_SOCKET = os.environ.get("PIS_TRIGGER_SOCKET", "").strip()
+RESULTS_FILE = "standby_events.jsonl"
+
+# Daemon states, as reported by "status"
+STATE_STARTING = "starting"
+STATE_ARMED = "armed"
+STATE_FIRING = "firing"
+STATE_DONE = "done"
+
+class StandbyDaemon:
+    """Prepares one logged-in session, then arms and fires each event in turn."""
+
+    def __init__(self, events, backend=FETCH_BACKEND, results_path=RESULTS_FILE):
+        self.events = events
+        self.backend = backend
+        self.results_path = results_path
+        self.wake = threading.Event()            # Set by "fire" (and by "stop", to end the wait)
+        self.stop_requested = threading.Event()
+        self.state = STATE_STARTING
+        self.armed_event = None
+        self.finished = []
+        self._servers = []
+
+    # --- Local triggers ---
+
+    def handle_command(self, command):
+        """Runs one trigger command and returns the JSON-serialisable reply."""
+        command = command.strip().lower()
+        if command == "fire":
+            if self.state != STATE_ARMED:
+                return {"ok": False, "error": f"not armed (state: {self.state})"}
+            print(f"⚡ Trigger received: firing '{self.armed_event.name}' now.")
+            self.wake.set()
+            return {"ok": True, "fired": self.armed_event.name}
+        if command == "stop":
+            print("Stop requested: finishing after the current event.")
+            self.stop_requested.set()
+            if self.state == STATE_ARMED:
+                self.wake.set()
+            return {"ok": True, "state": self.state}
+        if command == "status":
+            return {"ok": True, **self.status()}
+        return {"ok": False, "error": f"unknown command '{command}' (use fire, status or stop)"}
+
+    def status(self):
+        event = self.armed_event
+        seconds_left = round(event.at.timestamp() - time.time(), 1) if event and event.at else None
+        return {
+            "state": self.state,
+            "backend": self.backend,
+            "armed_event": event.name if event else None,
+            "scheduled_at": event.at.isoformat() if event and event.at else None,
+            "seconds_left": seconds_left,
+            "finished": self.finished,
+        }
+
+    def start_triggers(self):
+        daemon = self
+
+        class HttpTrigger(BaseHTTPRequestHandler):
+            def _reply(self, body):
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(200 if body.get("ok") else 409)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._reply(daemon.handle_command("status") if self.path == "/status" else
+                            {"ok": False, "error": "GET /status, POST /fire or POST /stop"})
+
+            def do_POST(self):
+                self._reply(daemon.handle_command(self.path.strip("/")))
+
+            def log_message(self, format, *args):
+                pass  # Commands are printed by handle_command
+
+        class SocketTrigger(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if line.strip():
+                        reply = daemon.handle_command(line.decode("utf-8", errors="replace"))
+                        self.wfile.write((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+
+        if TRIGGER_PORT:
+            server = ThreadingHTTPServer((TRIGGER_HOST, TRIGGER_PORT), HttpTrigger)
+            self._servers.append(server)
+            print(f"Trigger listening on http://{TRIGGER_HOST}:{server.server_address[1]} (POST /fire, GET /status, POST /stop)")
+        if TRIGGER_SOCKET:
+            if os.path.exists(TRIGGER_SOCKET):
+                os.remove(TRIGGER_SOCKET)  # Left over from a previous daemon
+            server = socketserver.ThreadingUnixStreamServer(TRIGGER_SOCKET, SocketTrigger)
+            os.chmod(TRIGGER_SOCKET, 0o600)
+            self._servers.append(server)
+            print(f"Trigger listening on Unix socket {TRIGGER_SOCKET} (fire, status, stop)")
+        for server in self._servers:
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def stop_triggers(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        if TRIGGER_SOCKET and os.path.exists(TRIGGER_SOCKET):
+            os.remove(TRIGGER_SOCKET)
+
+    # --- Events ---
+
+    def fire_event(self, run, event):
+        """Arms one event, waits for its time or a trigger, then runs Phase 3."""
+        self.wake.clear()
+        self.armed_event = event
+        self.state = STATE_ARMED
+        when = event.at.strftime("%Y-%m-%d %H:%M:%S %Z") if event.at else "manual trigger only"
+        print(f"\n=== Armed for '{event.name}' ({when}) ===")
+
+        if event.at is not None:
+            report = wait_for_event(run, event.at, interrupt=self.wake)
+            triggered, error_ms = report.triggered, report.error_ms
+        else:
+            keepalive = make_keepalive(run)
+            keepalive.run_until(float("inf"), self.wake)
+            self.wake.wait()
+            keepalive.report()
+            triggered, error_ms = True, None
+
+        if self.stop_requested.is_set():
+            print(f"Stopped before firing '{event.name}'.")
+            return
+
+        self.state = STATE_FIRING
+        fired_at = greek_now().isoformat(timespec="milliseconds")
+        captures = scrape_run(run)
+        result = {
+            "event": event.name,
+            "scheduled_at": event.at.isoformat() if event.at else None,
+            "fired_at": fired_at,
+            "triggered": triggered,
+            "error_ms": round(error_ms, 2) if error_ms is not None else None,
+            "captures": captures,
+        }
+        self.finished.append(result)
+        with open(self.results_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    def serve(self, run, prepare):
+        try:
+            if not prepare():
+                print("❌ Could not prepare a logged-in session; standby aborted.")
+                run.dump_history("prepare_failed")
+                return
+            for event in self.events:
+                if self.stop_requested.is_set():
+                    break
+                if not upcoming_events([event]):
+                    print(f"Skipping '{event.name}': it is already over.")
+                    continue
+                self.fire_event(run, event)
+        except Exception as e:
+            print(f"❌ An unhandled error occurred in standby mode: {e}")
+            run.dump_history("unhandled_error", e)
+        finally:
+            self.state = STATE_DONE
+            self.armed_event = None
+            close_run(run)
+
+    def run(self):
+        start_overall_time = time.time()
+        username, password = load_credentials()
+        self.start_triggers()
+        print(f"Standby: {len(self.events)} event(s) on the {self.backend} backend; preparing a warm session...")
+        run = BotRun(username, password)
+        try:
+            if self.backend == "http":
+                self.serve(run, lambda: prepare_http_run(run))
+            else:
+                with sync_playwright() as p:
+                    self.serve(run, lambda: prepare_browser_run(p, run))
+        finally:
+            self.stop_triggers()
+            TRACER.export()
+        print(f"⏱️ Standby finished after {time.time() - start_overall_time:.2f} seconds "
+              f"({len(self.finished)} event(s) fired).")
+
+def standby_events(path=EVENTS_FILE):
+    """Upcoming events from the events file, or the single configured target time."""
+    events = upcoming_events(load_events(path))
+    if events:
+        return events
+    return [Event("configured event", get_target_event_time())]
+
+if __name__ == "__main__":
+    StandbyDaemon(standby_events()).run()
@@ -4,18 +4,22 @@ from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 from playwright.sync_api import sync_playwright
 
-# Removed credentials and time/datetime utilities for public asset parsing
+from fake_portal import FakePortal
+
+# Runs against the local fake portal (fake_portal.py): its public login page links the same
+# kind of assets as the real one, so no external site is needed
 
 def run_asset_parser():
     """
-    Navigates to a test URL, parses for assets, downloads them, and verifies results.
+    Navigates to the fake portal's login page, parses for assets, downloads them, and verifies results.
     No time-based scheduling or delays.
     """
-    test_url = "https://science.umd.edu/labs/delwiche/bsci348s/lec/Markov.htm"
+    portal = FakePortal().start()
+    test_url = portal.base_url + "/Account/Login.aspx"
     expected_files = [
-        "ModelPlane1.jpg",
-        "ModelPlane2.jpg",
-        "main.html"
+        "header.png",
+        "calendar.gif",
+        "odigies.pdf"
     ]
     asset_dir = "test_assets"
 
@@ -48,7 +52,7 @@ def run_asset_parser():
                 
                 absolute_url = urljoin(test_url, relative_url)
 
-                if absolute_url.endswith(("main.html", ".jpg", ".pdf")):
+                if absolute_url.endswith((".png", ".gif", ".pdf")):
                     download_urls.add(absolute_url)
 
             # Download assets
@@ -59,16 +63,13 @@ def run_asset_parser():
                 asset_page = context.new_page()
                 response = asset_page.goto(url)
                 
-                if asset_name.endswith((".jpg", ".pdf")):
-                    with open(asset_path, "wb") as f:
-                        f.write(response.body())
-                elif asset_name == "main.html":
-                    with open(asset_path, "w", encoding="utf-8") as f:
-                        f.write(response.text())
-                        
+                with open(asset_path, "wb") as f:
+                    f.write(response.body())
+
                 asset_page.close()
         finally:
             browser.close()
+            portal.stop()
 
     # --- Assertions ---
     print("--- Verifying downloaded files ---")
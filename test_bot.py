@@ -3,12 +3,32 @@ import os
 import base64
 import json
 import time
-from datetime import datetime, timedelta, timezone
+import requests
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError, Error as PlaywrightError
-from bs4 import BeautifulSoup
+
+from applications_timeseries import ApplicationTimeSeries
+from capture_pipeline import CapturePipeline
+from coordination import SharedCaptureStore, open_coordinator
+from crawler import CRAWL_ENABLED, crawl_portal
+from events_config import next_scheduled_event, parse_event_time
+from fast_login import open_fast_login
+from flight_recorder import open_flight_recorder
+from hedging import HEDGE_COUNT, HedgeStats, describe, hedged_fetch_browser, hedged_get, hedging_active, requests_sent
+from fast_reload import (
+    RELOAD_MODE, ReloadTimings, fast_mode_enabled, goto_until_usable, install_resource_blocking, reload_until_usable,
+)
+from http_backend import HttpPortalSession, session_from_browser_cookies, sync_browser_cookies
+from notifier import open_notifier
+from polling_policy import OUTCOME_ERROR, OUTCOME_OK, PollScheduler, is_retryable_status, make_policy
+from portal_html import NEW_DATA_MARKER, PORTAL_BASE_URL, is_logged_in
+from portal_clock import ServerClock, greek_now, greek_datetime, fire_at
+from session_cache import SESSION_CACHE_FILE, SESSION_CACHE_LOG_FILE, open_session_cache, restore_or_login, storage_state_from_session
+from session_keepalive import SessionKeepalive
+from snapshot_store import SNAPSHOT_DIR, SnapshotStore
+from tracing import TRACER
 
 # --- Configuration ---
-# Define the exact date and time of the event in Greek time (UTC+3)
+# Define the exact date and time of the event in Greek time (Europe/Athens)
 # IMPORTANT: Adjust these values to the actual event date and time
 EVENT_YEAR = 2025
 EVENT_MONTH = 7  # July (based on your cron schedule)
@@ -18,8 +38,12 @@ EVENT_MINUTE = 0
 EVENT_SECOND = 0
 EVENT_MICROSECOND = 0 # Aim for the very start of the second
 
-LOGIN_URL = "https://myrequests.pis.gr/Account/Login.aspx"
-APPLICATIONS_URL = "https://myrequests.pis.gr/Applications.aspx"
+# The next scheduled event in events.json (PIS_EVENTS_FILE, see events_config.py) takes precedence over the EVENT_* values,
+# and PIS_EVENT_TIME (ISO, Greek time unless an offset is given) over both, e.g. for benchmark_portal.py
+EVENT_TIME_OVERRIDE = os.environ.get("PIS_EVENT_TIME", "").strip()
+
+LOGIN_URL = PORTAL_BASE_URL + "/Account/Login.aspx"
+APPLICATIONS_URL = PORTAL_BASE_URL + "/Applications.aspx"
 
 MIN_SUCCESS_SAVES = 5  # Goal: save the applications page at least this many times
 MAX_SCRAPE_LOOP_ATTEMPTS = 200 # Safety net: stop after this many attempts if MIN_SUCCESS_SAVES not met
@@ -28,6 +52,20 @@ SCRAPE_INTERVAL_SECONDS = 5 # How often to try refreshing the page
 
 PAGE_OPERATION_TIMEOUT_MS = 15000 # 15 seconds for page operations (goto, reload, wait_for_load_state)
 
+# Align the trigger to the portal's clock (HTTP Date headers) instead of trusting the local clock
+CALIBRATE_SERVER_CLOCK = True
+CLOCK_CALIBRATION_LEAD_SECONDS = 60 # Calibrate this long before the event so the estimate is fresh
+
+# Which fetch backend drives login and polling:
+#   "playwright" - headless Chromium (default, closest to a real user)
+#   "http"       - plain HTTP requests against the WebForms pages, no browser (one round-trip per poll)
+FETCH_BACKEND = os.environ.get("PIS_FETCH_BACKEND", "playwright").strip().lower()
+
+# Where Phase 3 snapshots go:
+#   "archive" - snapshots/ : one append-only archive, unchanged pages stored once, changes as deltas (default)
+#   "files"   - one application_view_<timestamp>.html per capture
+SNAPSHOT_STORAGE = os.environ.get("PIS_SNAPSHOT_STORAGE", "archive").strip().lower()
+
 # --- Helper Functions ---
 
 def load_credentials():
@@ -51,21 +89,58 @@ def load_credentials():
     except FileNotFoundError:
         raise Exception("Credentials not found. Please set PIS_USERNAME/PIS_PASSWORD env vars or create credentials.json.")
 
+def load_accounts():
+    """
+    Read several credential pairs for a batch run. Sources, in order:
+      - PIS_ACCOUNTS env var holding a JSON list of {"username", "password"[, "label"]}
+      - numbered env vars PIS_USERNAME_1/PIS_PASSWORD_1, PIS_USERNAME_2/PIS_PASSWORD_2, ...
+      - accounts.json file with the same JSON list
+      - the single account from load_credentials()
+    Returns a list of dicts with username, password and label.
+    """
+    accounts = None
+    accounts_json = os.environ.get("PIS_ACCOUNTS")
+    if accounts_json:
+        accounts = json.loads(accounts_json)
+        print(f"Loaded {len(accounts)} accounts from PIS_ACCOUNTS.")
+    else:
+        numbered = []
+        index = 1
+        while os.environ.get(f"PIS_USERNAME_{index}") and os.environ.get(f"PIS_PASSWORD_{index}"):
+            numbered.append({
+                "username": os.environ[f"PIS_USERNAME_{index}"],
+                "password": os.environ[f"PIS_PASSWORD_{index}"],
+            })
+            index += 1
+        if numbered:
+            accounts = numbered
+            print(f"Loaded {len(accounts)} accounts from numbered PIS_USERNAME_n/PIS_PASSWORD_n variables.")
+        elif os.path.exists("accounts.json"):
+            with open("accounts.json", "r", encoding="utf-8") as f:
+                accounts = json.load(f)
+            print(f"Loaded {len(accounts)} accounts from accounts.json file.")
+
+    if not accounts:
+        username, password = load_credentials()
+        accounts = [{"username": username, "password": password}]
+
+    for i, account in enumerate(accounts, start=1):
+        account.setdefault("label", f"account_{i:02d}")
+    return accounts
+
 def get_current_greek_time():
-    """Get the current time in Greek timezone (UTC+3)."""
-    return datetime.now(timezone.utc) + timedelta(hours=3)
-
-def wait_until_absolute(target_dt_greece):
-    """Wait until the target datetime (Greek time)."""
-    print(f"🎯 Target event time (Greek): {target_dt_greece.strftime('%Y-%m-%d %H:%M:%S.%f')} EEST")
-    while True:
-        now = get_current_greek_time()
-        if now >= target_dt_greece:
-            print(f"✅ Target time reached: {now.strftime('%Y-%m-%d %H:%M:%S.%f')} EEST")
-            break
-        wait_sec = (target_dt_greece - now).total_seconds()
-        print(f"Waiting {wait_sec:.1f} seconds until {target_dt_greece.strftime('%Y-%m-%d %H:%M:%S')} Greek time...")
-        time.sleep(min(wait_sec, 30)) # Sleep max 30 seconds to re-check time regularly
+    """Get the current time in the Greek timezone (Europe/Athens, DST-aware)."""
+    return greek_now()
+
+def wait_until_absolute(target_dt_greece, clock=None, keepalive=None, interrupt=None):
+    """
+    Wait until the target datetime (Greek time). With a ServerClock the wait is aligned to the
+    portal's clock and ends one one-way latency early, so the first request arrives at T0.
+    A SessionKeepalive keeps the session alive meanwhile and re-checks it just before T0;
+    setting interrupt (a threading.Event) ends the wait early.
+    """
+    return fire_at(target_dt_greece, clock=clock, calibrate_lead_seconds=CLOCK_CALIBRATION_LEAD_SECONDS,
+                   keepalive=keepalive, interrupt=interrupt)
 
 def perform_login(page, username, password):
     """Performs the login steps and verifies success."""
@@ -126,79 +201,625 @@ def perform_login(page, username, password):
         print(f"❌ Unexpected error during login: {e}")
         return False
 
-def download_assets(page, page_html, asset_dir):
+def cached_session_is_valid(context):
+    """One authenticated GET of Applications.aspx over the context's cookies, without rendering a page."""
+    try:
+        response = context.request.get(APPLICATIONS_URL, timeout=PAGE_OPERATION_TIMEOUT_MS)
+        return response.ok and not response.url.startswith(LOGIN_URL) and is_logged_in(response.body())
+    except PlaywrightError as e:
+        print(f"  Could not check cached session: {e}")
+        return False
+
+def http_session_is_valid(portal):
+    """The HTTP backend's cached-session check: one GET of Applications.aspx."""
+    try:
+        response = portal.fetch_applications()
+        return response.ok and portal.is_session_valid(response)
+    except requests.RequestException as e:
+        print(f"  Could not check cached session: {e}")
+        return False
+
+def make_browser_keepalive(context, page, login, session_cache=None):
+    """
+    SessionKeepalive for the Playwright backend. Each check reloads the pre-loaded applications page,
+    so the browser's own connection stays warm and the page is current when Phase 3 starts.
+    login() re-authenticates and returns True on success (see browser_login).
+    """
+    def ping():
+        response = reload_until_usable(page, PAGE_OPERATION_TIMEOUT_MS).response
+        if response is not None and is_retryable_status(response.status):
+            raise PlaywrightError(f"Server returned HTTP {response.status}")
+        return not page.url.startswith(LOGIN_URL) and is_logged_in(response_bytes(page, response))
+
+    def relogin():
+        if not login():
+            return False
+        if session_cache:
+            session_cache.save(context.storage_state())
+        goto_until_usable(page, APPLICATIONS_URL, PAGE_OPERATION_TIMEOUT_MS)
+        return True
+
+    return SessionKeepalive(ping, relogin)
+
+def make_http_keepalive(portal, session_cache=None):
+    """SessionKeepalive for the HTTP backend: one GET of Applications.aspx per check over the polling session."""
+    def ping():
+        response = portal.fetch_applications()
+        if is_retryable_status(response.status_code):
+            response.raise_for_status()
+        return portal.is_session_valid(response)
+
+    def relogin():
+        if not portal.login():
+            return False
+        if session_cache:
+            session_cache.save(storage_state_from_session(portal.session))
+        return True
+
+    return SessionKeepalive(ping, relogin)
+
+def get_target_event_time():
+    """
+    The absolute target event time in Greek timezone: PIS_EVENT_TIME, else the next scheduled
+    event in events.json, else the EVENT_* settings.
+    """
+    if EVENT_TIME_OVERRIDE:
+        return parse_event_time(EVENT_TIME_OVERRIDE)
+    event = next_scheduled_event()
+    if event is not None:
+        print(f"Next event from the events file: {event.name}")
+        return event.at
+    return greek_datetime(
+        EVENT_YEAR, EVENT_MONTH, EVENT_DAY, EVENT_HOUR, EVENT_MINUTE, EVENT_SECOND, EVENT_MICROSECOND
+    )
+
+def save_snapshot(page_html, prefix="application_view", output_dir=""):
+    """
+    Writes one captured page to [output_dir/]<prefix>_<greek timestamp>.html and returns the file name.
+    Raw response bytes are written as they are, without a decode/encode round-trip.
+    """
+    ts = get_current_greek_time().strftime("%Y%m%d_%H%M%S_%f") # Add microseconds for uniqueness
+    fname = os.path.join(output_dir, f"{prefix}_{ts}.html")
+    if isinstance(page_html, bytes):
+        with open(fname, "wb") as f:
+            f.write(page_html)
+    else:
+        with open(fname, "w", encoding="utf-8") as f:
+            f.write(page_html)
+    return fname
+
+def response_bytes(page, response):
+    """
+    Body of the navigation response that produced the page. Falls back to serialising
+    the DOM only when Playwright returned no response (e.g. a same-document reload).
+    """
+    if response is not None:
+        return response.body()
+    return page.content().encode("utf-8")
+
+def open_snapshot_store(directory=SNAPSHOT_DIR):
+    """The SnapshotStore for this run, or None when snapshots are written as separate HTML files."""
+    return SnapshotStore(directory) if SNAPSHOT_STORAGE == "archive" else None
+
+def report_new_data(page_html):
+    """
+    New Data Detection (Customize this part!)
+    You need to define what "new info" looks like.
+    Example: looking for a specific text, a new table row, or a new PDF link timestamp.
+    For now, a placeholder check.
+    """
+    marker = NEW_DATA_MARKER
+    if isinstance(page_html, bytes):
+        marker = marker.encode("utf-8") # Search the raw response body directly
+    if marker in page_html: # Example: check for a specific new text
+        print("  🎉 'ΝΕΑ ΑΙΤΗΣΗ' (New Application) text found in this saved page!")
+        return True
+    print("  New data not detected in this saved page yet.")
+    return False
+
+# --- Main Scraper Function ---
+
+class BotRun:
+    """
+    One account's logged-in session and its per-run helpers, kept from Phase 1 to Phase 3
+    (and, in standby.py, across several events).
+    """
+
+    def __init__(self, username, password):
+        self.username = username
+        self.password = password
+        # Slot, phase offset and shared stop when several workers poll together (see coordination.py)
+        self.coordinator = open_coordinator()
+        # A session saved by an earlier run (see session_cache.py) lets Phase 1 skip the login form
+        self.session_cache = open_session_cache(username, password, **self.session_cache_paths())
+        self.restored_state = self.session_cache.load() if self.session_cache else None
+        self.browser = None
+        self.context = None
+        self.page = None
+        self.blocker = None      # ResourceBlocker in PIS_RELOAD_MODE=fast
+        self.fast_login = None   # FastLogin: one-POST logins from a prefetched form (see fast_login.py)
+        self.reload_timings = ReloadTimings()
+        self.portal = None       # HttpPortalSession on the HTTP backend
+        self.logged_in = False
+        # Mails the new application number from inside the run; connects now, well before T0
+        self.notifier = open_notifier()
+        # The last requests and responses, kept in memory and written out only on failure
+        self.recorder = open_flight_recorder()
+
+    def session_cache_paths(self):
+        """Coordinated workers past slot 0 get their own cache file, so no two share an ASP.NET session."""
+        if self.coordinator is None or self.coordinator.slot == 0:
+            return {}
+        slot = self.coordinator.slot
+        return {"path": f"{os.path.splitext(SESSION_CACHE_FILE)[0]}_{slot}.bin",
+                "log_path": f"{os.path.splitext(SESSION_CACHE_LOG_FILE)[0]}_{slot}.jsonl"}
+
+    def new_data_handler(self):
+        """The pipeline's on_new_data callback: the notifier's and the coordinator's (None without either)."""
+        handlers = []
+        if self.notifier:
+            handlers.append(self.notifier.new_data_handler(NEW_DATA_MARKER))
+        if self.coordinator:
+            handlers.append(self.coordinator.new_data_handler())
+        if not handlers:
+            return None
+        def on_new_data(attempt, fetched_at, applications):
+            for handler in handlers:
+                handler(attempt, fetched_at, applications)
+        return on_new_data
+
+    def open_snapshot_store(self):
+        """Coordinated workers share one deduplicating store; otherwise the usual snapshot store (or None)."""
+        if self.coordinator is not None and SNAPSHOT_STORAGE == "archive":
+            return SharedCaptureStore(self.coordinator)
+        return open_snapshot_store()
+
+    def make_scheduler(self):
+        return PollScheduler(make_policy(None, SCRAPE_INTERVAL_SECONDS, MIN_SUCCESS_SAVES), coordinator=self.coordinator)
+
+    def start_attempt(self, attempt):
+        if self.recorder is not None:
+            self.recorder.attempt = attempt
+
+    def record_response(self, response, body, latency_ms=None, url=None, note=None):
+        """Puts a Playwright response the loop already holds into the flight recorder."""
+        if self.recorder is not None:
+            self.recorder.record_page_response(response, body, latency_ms, url, note)
+
+    def dump_history(self, reason, error=None):
+        """Writes the flight recorder's ring to a .har file (see flight_recorder.py)."""
+        if self.recorder is not None:
+            self.recorder.dump(reason, error)
+
+def browser_login(run):
     """
-    Parses HTML for assets (PDFs, images) and downloads them.
-    Uses page.request.get for binary content.
+    Logs the run's browser context in: one form POST when FastLogin has a prefetched form,
+    else the full perform_login() on the page. Returns (logged_in, landing), where landing is the
+    fast path's APIResponse for the page the portal redirected to (None after a full login).
     """
+    if run.fast_login is not None:
+        landing = run.fast_login.login(run.username, run.password)
+        if landing is not None:
+            return True, landing
+    return perform_login(run.page, run.username, run.password), None
+
+def prepare_browser_run(p, run):
+    """Browser launch, Phase 1 (login) and Phase 2 (pre-load the applications page). Returns True once armed."""
+    with TRACER.span("launch"):
+        run.browser = p.chromium.launch(headless=True)
+        run.context = run.browser.new_context(storage_state=run.restored_state)
+        # Fast mode: skip CSS, fonts, images and CDN scripts in the browser (see fast_reload.py)
+        run.blocker = install_resource_blocking(run.context) if fast_mode_enabled() else None
+        run.page = run.context.new_page()
+        # The login form is prefetched in the background while the cached session is checked
+        run.fast_login = open_fast_login(run.context)
+    context, page = run.context, run.page
+
+    # --- Phase 1: Initial Login ---
+    print("\n--- Phase 1: Initial Login ---")
+    with TRACER.span("login", cached=run.restored_state is not None):
+        run.logged_in = restore_or_login(
+            run.session_cache, run.restored_state,
+            is_valid=lambda: cached_session_is_valid(context),
+            login=lambda: browser_login(run)[0],
+            clear=context.clear_cookies,
+            storage_state=context.storage_state,
+        )
+    if not run.logged_in:
+        print("Initial login failed. Exiting bot.")
+        return False
+
+    # --- Phase 2: Navigate to Applications Page and Wait for Event Time ---
+    print("\n--- Phase 2: Navigating to Applications Page & Waiting for Event ---")
     try:
-        soup = BeautifulSoup(page_html, "html.parser")
-        os.makedirs(asset_dir, exist_ok=True)
-        
-        asset_urls_to_download = set() 
-        
-        # Collect PDF links
-        for a_tag in soup.find_all("a", href=True):
-            if a_tag["href"].lower().endswith(".pdf"):
-                asset_urls_to_download.add(a_tag["href"])
-        
-        # Collect image links (header.png, calendar.gif etc.)
-        for img_tag in soup.find_all("img", src=True):
-            asset_urls_to_download.add(img_tag["src"])
+        with TRACER.span("navigate"):
+            page.goto(APPLICATIONS_URL, timeout=PAGE_OPERATION_TIMEOUT_MS)
+            page.wait_for_load_state("networkidle", timeout=PAGE_OPERATION_TIMEOUT_MS)
+        print(f"Pre-loaded applications page: {page.url}")
+    except PlaywrightTimeoutError as e:
+        print(f"❌ Timeout navigating to applications page after login: {e}")
+        print("Attempting to re-login and retry navigation...")
+        if browser_login(run)[0]: # Try re-login
+            page.goto(APPLICATIONS_URL, timeout=PAGE_OPERATION_TIMEOUT_MS) # Retry navigation
+            page.wait_for_load_state("networkidle", timeout=PAGE_OPERATION_TIMEOUT_MS)
+            print("Re-login and navigation successful.")
+        else:
+            print("Re-login and navigation failed. Exiting bot.")
+            return False
+    except PlaywrightError as e:
+        print(f"❌ Playwright error navigating to applications page: {e}. Exiting bot.")
+        return False
+    return True
+
+def prepare_http_run(run):
+    """Phase 1 (login) and Phase 2 (pre-load the applications page) on the HTTP backend. Returns True once armed."""
+    run.portal = portal = HttpPortalSession(run.username, run.password)
+    if run.recorder is not None:
+        run.recorder.attach(portal.session)  # Every response on the session, login and redirects included
+    if run.restored_state:
+        sync_browser_cookies(portal.session, run.restored_state.get("cookies", []))
+
+    # --- Phase 1: Initial Login ---
+    print("\n--- Phase 1: Initial Login (HTTP backend) ---")
+    with TRACER.span("login", cached=run.restored_state is not None):
+        run.logged_in = restore_or_login(
+            run.session_cache, run.restored_state,
+            is_valid=lambda: http_session_is_valid(portal),
+            login=portal.login,
+            clear=portal.session.cookies.clear,
+            storage_state=lambda: storage_state_from_session(portal.session),
+        )
+    if not run.logged_in:
+        print("Initial login failed. Exiting bot.")
+        return False
 
-        if not asset_urls_to_download:
-            print("  No new assets (PDFs/images) found on this page.")
-            return
+    # --- Phase 2: Pre-load Applications Page and Wait for Event Time ---
+    print("\n--- Phase 2: Pre-loading Applications Page & Waiting for Event ---")
+    try:
+        with TRACER.span("navigate"):
+            response = portal.fetch_applications()
+        response.raise_for_status()
+        print(f"Pre-loaded applications page: {response.url}")
+    except requests.RequestException as e:
+        print(f"❌ HTTP error pre-loading applications page: {e}. Exiting bot.")
+        return False
+    return True
+
+def make_server_clock(run):
+    """The ServerClock for the run's backend, or None when calibration is off."""
+    if not CALIBRATE_SERVER_CLOCK:
+        return None
+    if run.portal is not None:
+        # Calibrate over the already-warm session so samples see the same connection as the polls
+        return ServerClock(run.portal.applications_url, session=run.portal.session)
+    return ServerClock(LOGIN_URL)
+
+def make_keepalive(run):
+    if run.portal is not None:
+        return make_http_keepalive(run.portal, run.session_cache)
+    return make_browser_keepalive(run.context, run.page, lambda: browser_login(run)[0], run.session_cache)
+
+def wait_for_event(run, target_event_time_greece, interrupt=None):
+    """
+    The armed wait between Phase 2 and Phase 3: session keepalive, clock calibration and the
+    precise trigger (calibrated against the portal's Date header). Returns the FireReport.
+    """
+    clock = make_server_clock(run)
+    keepalive = make_keepalive(run)
+    if run.coordinator is not None:
+        run.coordinator.arm(target_event_time_greece.isoformat())  # Workers agree on the event by its time
+    with TRACER.span("wait"):
+        report = wait_until_absolute(target_event_time_greece, clock, keepalive, interrupt)
+    keepalive.report()
+    TRACER.set_clock(clock)  # Exported span times are portal times from here on
+    return report
+
+def scrape_browser(run):
+    """
+    Phase 3 on the Playwright backend: reloads and captures the applications page until the
+    polling policy, MAX_SCRAPE_LOOP_ATTEMPTS or SCRAPE_WINDOW_DURATION_SECONDS stops it.
+    Returns the number of pages captured.
+    """
+    context, page = run.context, run.page
+    successful_saves_count = 0
+    scrape_attempt_counter = 0
+    pipeline = None
+    scheduler = None
+    hedge_stats = HedgeStats()
+    page_needs_navigation = False  # After a fast re-login the page itself still shows the login form
+
+    try:
+        # --- Phase 3: Aggressive Refreshing and Saving ---
+        print("\n--- Phase 3: Aggressive Refreshing and Saving ---")
+        # Persistence, new-data detection and assets run on worker threads; the browser
+        # cookies are copied into a requests.Session because Playwright objects stay on this thread
+        pipeline = CapturePipeline(
+            session_from_browser_cookies(context.cookies()), report_new_data, save_snapshot,
+            timeseries=ApplicationTimeSeries(), snapshot_store=run.open_snapshot_store(), on_new_data=run.new_data_handler(),
+        ).start()
+        # Cadence, backoff and early stop come from the polling policy (see polling_policy.py)
+        scheduler = run.make_scheduler().start()
+        loop_start_time = time.time() # Start timer for the scraping window
+
+        while scrape_attempt_counter < MAX_SCRAPE_LOOP_ATTEMPTS and \
+              (time.time() - loop_start_time) < SCRAPE_WINDOW_DURATION_SECONDS:
+
+            scrape_attempt_counter += 1
+            print(f"\n--- Scrape Attempt {scrape_attempt_counter} ---")
+            run.start_attempt(scrape_attempt_counter)
+            outcome = OUTCOME_ERROR
+            attempt_started = time.perf_counter()
+
+            try:
+                fetched_at = get_current_greek_time().isoformat(timespec="milliseconds")
+                # Hedges only use spare rate budget, so they never stretch the polling interval
+                hedges = 1 + scheduler.spare(HEDGE_COUNT - 1) if hedging_active(scheduler.started, pipeline.new_data_found.is_set()) else 1
+                if hedges > 1:
+                    # Right after T0: several staggered fetches from the page, first post-opening body wins
+                    print(f"Hedged poll for new data (attempt {scrape_attempt_counter}, {hedges} hedges)...")
+                    scheduler.before_attempt()
+                    with TRACER.span("hedge", attempt=scrape_attempt_counter, hedges=hedges):
+                        hedge = hedged_fetch_browser(page, APPLICATIONS_URL, NEW_DATA_MARKER, count=hedges,
+                                                     timeout_ms=PAGE_OPERATION_TIMEOUT_MS)
+                    scheduler.charge(requests_sent(hedge) - 1)
+                    hedge_stats.record(hedge)
+                    print(describe(hedge))
+                    status, page_url, server_date, latency_ms = hedge.status, hedge.url, hedge.headers.get("date"), hedge.latency_ms
+                    page_bytes = hedge.body
+                    if run.recorder is not None:
+                        run.recorder.record(page_url, status, page_bytes, latency_ms, response_headers=hedge.headers,
+                                            note=f"hedge {hedge.chosen + 1} of {hedges}")
+                else:
+                    # Reload the page to get the latest content
+                    print(f"Reloading page for new data (attempt {scrape_attempt_counter}, {RELOAD_MODE} mode)...")
+                    scheduler.before_attempt()
+                    if page_needs_navigation:
+                        navigate_started = time.perf_counter()
+                        with TRACER.span("navigate", attempt=scrape_attempt_counter):
+                            response = goto_until_usable(page, APPLICATIONS_URL, PAGE_OPERATION_TIMEOUT_MS)
+                        latency_ms = usable_ms = (time.perf_counter() - navigate_started) * 1000
+                        page_needs_navigation = False
+                    else:
+                        with TRACER.span("reload", attempt=scrape_attempt_counter):
+                            response, latency_ms, usable_ms = reload_until_usable(page, PAGE_OPERATION_TIMEOUT_MS, run.reload_timings)
+                    print(f"  Page usable after {usable_ms:.0f} ms (response after {latency_ms:.0f} ms)")
+                    status = response.status if response is not None else None
+                    server_date = response.headers.get("date") if response is not None else None
+                    page_url = page.url
+
+                    # The response body is the page as the server sent it: no DOM re-serialisation
+                    with TRACER.span("serialize", attempt=scrape_attempt_counter):
+                        page_bytes = response_bytes(page, response)
+                    run.record_response(response, page_bytes, latency_ms, page_url)
+
+                # A struggling portal (5xx/429) is not a logged-out session: back off instead of re-logging in
+                if is_retryable_status(status):
+                    raise PlaywrightError(f"Server returned HTTP {status}")
+
+                # Check for session invalidation (redirected back to login page) on the same bytes
+                if page_url.startswith(LOGIN_URL) or not is_logged_in(page_bytes):
+                    print("Session invalidated during scrape loop! Attempting to re-login...")
+                    with TRACER.span("login", attempt=scrape_attempt_counter):
+                        run.logged_in, landing = browser_login(run)
+                    if run.logged_in:
+                        # The session cache is updated by close_run(), off the polling path
+                        sync_browser_cookies(pipeline.asset_session, context.cookies())
+                        if landing is not None and landing.url.startswith(APPLICATIONS_URL):
+                            # The login POST was redirected to the applications page: capture that response,
+                            # and bring the page itself back there on the next attempt
+                            print("Re-login successful; capturing the applications page it landed on.")
+                            page_bytes, page_url = landing.body(), landing.url
+                            server_date = landing.headers.get("date")
+                            run.record_response(landing, page_bytes, note="fast login landing page")
+                            page_needs_navigation = True
+                        else:
+                            print("Re-login successful. Navigating back to applications page.")
+                            with TRACER.span("navigate", attempt=scrape_attempt_counter):
+                                response = goto_until_usable(page, APPLICATIONS_URL, PAGE_OPERATION_TIMEOUT_MS)
+                            page_bytes = response_bytes(page, response)
+                            page_url = page.url
+                            server_date = response.headers.get("date") if response is not None else None
+                            run.record_response(response, page_bytes, url=page_url, note="after re-login")
+                    else:
+                        print("Re-login failed. Cannot continue scraping. Breaking loop.")
+                        run.dump_history(f"attempt{scrape_attempt_counter}_relogin_failed")
+                        break # Critical failure, stop trying
+
+                # Hand the bytes off; saving, detection and assets happen in the background
+                pipeline.submit(scrape_attempt_counter, page_bytes, page_url, {
+                    "fetched_at": fetched_at,
+                    "server_date": server_date,
+                    "latency_ms": latency_ms,
+                })
+
+                successful_saves_count += 1 # Counted at capture; the pipeline report confirms what reached disk
+                outcome = OUTCOME_OK
+                print(f"  ✅ Captured page (attempt {scrape_attempt_counter}). Captures: {successful_saves_count}/{MIN_SUCCESS_SAVES}")
+
+            except (PlaywrightTimeoutError, PlaywrightError) as e:
+                print(f"❌ Playwright error during scrape attempt {scrape_attempt_counter}: {e}")
+                # The responses leading up to the error, from memory: no page.content() on a struggling browser
+                run.dump_history(f"attempt{scrape_attempt_counter}_playwright_error", e)
+            except Exception as e:
+                print(f"❌ Unexpected error during scrape attempt {scrape_attempt_counter}: {e}")
+                run.dump_history(f"attempt{scrape_attempt_counter}_unexpected_error", e)
+
+            TRACER.record("attempt", attempt_started, attempt=scrape_attempt_counter, outcome=outcome)
+
+            # Ask the policy when to poll next (or whether to stop)
+            decision = scheduler.after_attempt(scrape_attempt_counter, outcome, pipeline.new_data_found.is_set())
+            if decision.stop or not scheduler.wait(decision):
+                break
+
+        report_capture_goal(successful_saves_count)
+    finally:
+        if scheduler:
+            scheduler.close()
+        if pipeline:
+            pipeline.close()
+            run.reload_timings.report(run.blocker)
+        hedge_stats.report()
+    return successful_saves_count
+
+def scrape_http(run):
+    """Phase 3 on the HTTP backend: one GET of Applications.aspx per attempt. Returns the number of pages captured."""
+    portal = run.portal
+    successful_saves_count = 0
+    scrape_attempt_counter = 0
+    pipeline = None
+    scheduler = None
+    hedge_stats = HedgeStats()
+    new_data_marker = NEW_DATA_MARKER.encode("utf-8")
 
-        print(f"  Found {len(asset_urls_to_download)} potential assets to download.")
-
-        for asset_relative_url in asset_urls_to_download:
-            # Construct absolute URL
-            if asset_relative_url.startswith("/"):
-                asset_full_url = "https://myrequests.pis.gr" + asset_relative_url
-            elif not (asset_relative_url.startswith("http://") or asset_relative_url.startswith("https://")):
-                # Handle other relative paths (e.g., "Styles/Site.css")
-                # This might need more sophisticated base URL resolution if not directly in root
-                base_url_parsed = page.url.split('?')[0].rsplit('/', 1)[0] # Get base path of current URL
-                asset_full_url = f"{base_url_parsed}/{asset_relative_url}"
-            else:
-                asset_full_url = asset_relative_url # Already absolute
-
-            # Clean up asset name from URL (remove query params and fragments)
-            asset_name = os.path.basename(asset_full_url.split("?")[0].split('#')[0])
-            if not asset_name or asset_name == '/':
-                print(f"  Skipping asset with invalid name: {asset_full_url}")
-                continue
-
-            asset_path = os.path.join(asset_dir, asset_name)
-            
-            # Ensure unique file names if multiple assets have the same base name but different paths/timestamps
-            counter = 0
-            original_asset_path = asset_path
-            while os.path.exists(asset_path):
-                counter += 1
-                name, ext = os.path.splitext(original_asset_path)
-                asset_path = f"{name}_{counter}{ext}"
+    try:
+        # --- Phase 3: Aggressive Polling and Saving ---
+        print("\n--- Phase 3: Aggressive Polling and Saving (HTTP backend) ---")
+        # The asset worker gets its own session (and connection pool) with the portal cookies;
+        # re-logins copy the new cookies over
+        pipeline = CapturePipeline(
+            portal.detached_session(), report_new_data, save_snapshot,
+            timeseries=ApplicationTimeSeries(), snapshot_store=run.open_snapshot_store(), on_new_data=run.new_data_handler(),
+        ).start()
+        scheduler = run.make_scheduler().start()
+        loop_start_time = time.time()
+
+        while scrape_attempt_counter < MAX_SCRAPE_LOOP_ATTEMPTS and \
+              (time.time() - loop_start_time) < SCRAPE_WINDOW_DURATION_SECONDS:
+
+            scrape_attempt_counter += 1
+            print(f"\n--- Scrape Attempt {scrape_attempt_counter} ---")
+            run.start_attempt(scrape_attempt_counter)
+            outcome = OUTCOME_ERROR
+            attempt_started = time.perf_counter()
 
             try:
-                # Use Playwright's page.request.get() for efficient binary download
-                # This makes a direct HTTP request using the browser's session/cookies
-                response = page.request.get(asset_full_url, timeout=PAGE_OPERATION_TIMEOUT_MS)
-                if response.ok:
-                    with open(asset_path, "wb") as af: # Use "wb" for binary write
-                        af.write(response.body()) # Use response.body() for binary content
-                    print(f"  Downloaded asset: {asset_path}")
+                fetched_at = get_current_greek_time().isoformat(timespec="milliseconds")
+                request_started = time.time()
+                # Hedges only use spare rate budget, so they never stretch the polling interval
+                hedges = 1 + scheduler.spare(HEDGE_COUNT - 1) if hedging_active(scheduler.started, pipeline.new_data_found.is_set()) else 1
+                if hedges > 1:
+                    # Right after T0: several staggered GETs on the session, first post-opening response wins
+                    print(f"Hedged poll of applications page (attempt {scrape_attempt_counter}, {hedges} hedges)...")
+                    scheduler.before_attempt()
+                    with TRACER.span("hedge", attempt=scrape_attempt_counter, hedges=hedges):
+                        hedge = hedged_get(portal.session, portal.applications_url, lambda body: new_data_marker in body,
+                                           count=hedges, timeout=portal.timeout)
+                    scheduler.charge(requests_sent(hedge) - 1)
+                    hedge_stats.record(hedge)
+                    print(describe(hedge))
+                    response = portal.last_response = hedge.response
+                    portal.url = response.url
+                    if run.recorder is not None:
+                        # The hook only saw the streamed hedges' headers; keep the chosen body too
+                        run.recorder.record(response.url, response.status_code, hedge.body, hedge.latency_ms,
+                                            response_headers=response.headers, note=f"hedge {hedge.chosen + 1} of {hedges}")
                 else:
-                    print(f"  ❌ Failed to download asset {asset_full_url}: HTTP {response.status} {response.status_text}")
-            except (PlaywrightTimeoutError, PlaywrightError) as asset_dl_err:
-                print(f"  ❌ Playwright error downloading asset {asset_full_url}: {asset_dl_err}")
-            except Exception as asset_other_err:
-                print(f"  ❌ Other error downloading asset {asset_full_url}: {asset_other_err}")
+                    print(f"Polling applications page (attempt {scrape_attempt_counter})...")
+                    scheduler.before_attempt()
+                    with TRACER.span("reload", attempt=scrape_attempt_counter):
+                        response = portal.fetch_applications()
+
+                # A struggling portal (5xx/429) is not a logged-out session: back off instead of re-logging in
+                if is_retryable_status(response.status_code):
+                    response.raise_for_status()
+
+                # Session check runs on the response we already have: no extra round-trip
+                if not portal.is_session_valid(response):
+                    print("Session invalidated during scrape loop! Attempting to re-login...")
+                    with TRACER.span("login", attempt=scrape_attempt_counter):
+                        run.logged_in = portal.login()
+                    if not run.logged_in:
+                        print("Re-login failed. Cannot continue scraping. Breaking loop.")
+                        run.dump_history(f"attempt{scrape_attempt_counter}_relogin_failed")
+                        break
+                    print("Re-login successful. Polling applications page again.")  # close_run() caches the new session
+                    pipeline.asset_session.cookies.update(portal.session.cookies)
+                    with TRACER.span("reload", attempt=scrape_attempt_counter):
+                        response = portal.fetch_applications()
+
+                response.raise_for_status()
+                print(f"  Poll round-trip: {(time.time() - request_started) * 1000:.0f} ms")
+
+                pipeline.submit(scrape_attempt_counter, response.content, response.url, {
+                    "fetched_at": fetched_at,
+                    "server_date": response.headers.get("Date"),
+                    "latency_ms": response.elapsed.total_seconds() * 1000,
+                })
+
+                successful_saves_count += 1
+                outcome = OUTCOME_OK
+                print(f"  ✅ Captured page (attempt {scrape_attempt_counter}). Captures: {successful_saves_count}/{MIN_SUCCESS_SAVES}")
+
+            except requests.RequestException as e:
+                print(f"❌ HTTP error during scrape attempt {scrape_attempt_counter}: {e}")
+                run.dump_history(f"attempt{scrape_attempt_counter}_http_error", e)
+            except Exception as e:
+                print(f"❌ Unexpected error during scrape attempt {scrape_attempt_counter}: {e}")
+                run.dump_history(f"attempt{scrape_attempt_counter}_unexpected_error", e)
+
+            TRACER.record("attempt", attempt_started, attempt=scrape_attempt_counter, outcome=outcome)
+
+            decision = scheduler.after_attempt(scrape_attempt_counter, outcome, pipeline.new_data_found.is_set())
+            if decision.stop or not scheduler.wait(decision):
+                break
+
+        report_capture_goal(successful_saves_count)
+    finally:
+        if scheduler:
+            scheduler.close()
+        if pipeline:
+            pipeline.close()
+        hedge_stats.report()
+    return successful_saves_count
+
+def scrape_run(run):
+    """Phase 3 on whichever backend the run was prepared with."""
+    return scrape_http(run) if run.portal is not None else scrape_browser(run)
+
+def crawl_run(run):
+    """
+    After Phase 3: archives the rest of the logged-in portal (see crawler.py). The browser's
+    cookies are copied into a requests.Session, so the crawl never touches the page.
+    """
+    if not run.logged_in:
+        return
+    if run.portal is not None:
+        crawl_portal(run.portal.session, relogin=run.portal.login)
+    else:
+        session = session_from_browser_cookies(run.context.cookies())
+        try:
+            crawl_portal(session)
+        finally:
+            session.close()
 
-    except Exception as soup_err:
-        print(f"❌ Error processing HTML for assets: {soup_err}")
+def report_capture_goal(successful_saves_count):
+    if successful_saves_count >= MIN_SUCCESS_SAVES:
+        print(f"\n✅ Successfully captured {successful_saves_count} application pages (goal: {MIN_SUCCESS_SAVES}).")
+    else:
+        print(f"\n⚠️ Loop finished. Could not achieve {MIN_SUCCESS_SAVES} successful saves within limits. Total saved: {successful_saves_count}")
 
-# --- Main Scraper Function ---
+def close_run(run):
+    """Saves the freshest session for the next run, then closes the browser or HTTP session."""
+    if run.session_cache and run.logged_in:
+        try:
+            if run.portal is not None:
+                run.session_cache.save(storage_state_from_session(run.portal.session))
+            elif run.context is not None:
+                run.session_cache.save(run.context.storage_state())  # Keep the freshest cookies for the next run
+        except PlaywrightError as e:
+            print(f"  Could not update the session cache: {e}")
+    if run.fast_login is not None:
+        run.fast_login.report()
+    if run.notifier is not None:
+        run.notifier.close()
+    if run.coordinator is not None:
+        run.coordinator.report()
+        run.coordinator.leave()
+    if run.portal is not None:
+        run.portal.close()
+    if run.browser:
+        run.browser.close()
+        print("Browser closed.")
 
 def run_scraper():
     """
@@ -206,150 +827,66 @@ def run_scraper():
     for a set duration, saving each successful capture and associated assets.
     Continues until MIN_SUCCESS_SAVES are achieved or max attempts/duration reached.
     """
+    if FETCH_BACKEND == "http":
+        return run_scraper_http()
+
     start_overall_time = time.time()
     username, password = load_credentials()
 
     # Calculate the absolute target event time in Greek timezone
-    target_event_time_greece = datetime(
-        EVENT_YEAR, EVENT_MONTH, EVENT_DAY, EVENT_HOUR, EVENT_MINUTE, EVENT_SECOND, EVENT_MICROSECOND,
-        tzinfo=timezone.utc # Start with UTC and then add timedelta
-    ) + timedelta(hours=3)
-
-    successful_saves_count = 0
-    scrape_attempt_counter = 0
+    target_event_time_greece = get_target_event_time()
+    run = BotRun(username, password)
 
     with sync_playwright() as p:
-        browser = None # Initialize browser to None for finally block
         try:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context()
-            page = context.new_page()
-
-            # --- Phase 1: Initial Login ---
-            print("\n--- Phase 1: Initial Login ---")
-            if not perform_login(page, username, password):
-                print("Initial login failed. Exiting bot.")
-                return
-
-            # --- Phase 2: Navigate to Applications Page and Wait for Event Time ---
-            print("\n--- Phase 2: Navigating to Applications Page & Waiting for Event ---")
-            try:
-                page.goto(APPLICATIONS_URL, timeout=PAGE_OPERATION_TIMEOUT_MS)
-                page.wait_for_load_state("networkidle", timeout=PAGE_OPERATION_TIMEOUT_MS)
-                print(f"Pre-loaded applications page: {page.url}")
-            except PlaywrightTimeoutError as e:
-                print(f"❌ Timeout navigating to applications page after login: {e}")
-                print("Attempting to re-login and retry navigation...")
-                if perform_login(page, username, password): # Try re-login
-                    page.goto(APPLICATIONS_URL, timeout=PAGE_OPERATION_TIMEOUT_MS) # Retry navigation
-                    page.wait_for_load_state("networkidle", timeout=PAGE_OPERATION_TIMEOUT_MS)
-                    print("Re-login and navigation successful.")
-                else:
-                    print("Re-login and navigation failed. Exiting bot.")
-                    return
-            except PlaywrightError as e:
-                print(f"❌ Playwright error navigating to applications page: {e}. Exiting bot.")
+            if not prepare_browser_run(p, run):
+                run.dump_history("prepare_failed")
                 return
-
-            # Wait until the precise target time
-            wait_until_absolute(target_event_time_greece)
-
-            # --- Phase 3: Aggressive Refreshing and Saving ---
-            print("\n--- Phase 3: Aggressive Refreshing and Saving ---")
-            loop_start_time = time.time() # Start timer for the scraping window
-
-            while successful_saves_count < MIN_SUCCESS_SAVES and \
-                  scrape_attempt_counter < MAX_SCRAPE_LOOP_ATTEMPTS and \
-                  (time.time() - loop_start_time) < SCRAPE_WINDOW_DURATION_SECONDS:
-                
-                scrape_attempt_counter += 1
-                print(f"\n--- Scrape Attempt {scrape_attempt_counter} ---")
-                
-                try:
-                    # Check for session invalidation (redirected back to login page)
-                    if page.url == LOGIN_URL or "Έξοδος" not in page.content(timeout=5000): # Check for logout link absence
-                        print("Session invalidated during scrape loop! Attempting to re-login...")
-                        if perform_login(page, username, password):
-                            print("Re-login successful. Navigating back to applications page.")
-                            page.goto(APPLICATIONS_URL, timeout=PAGE_OPERATION_TIMEOUT_MS)
-                            page.wait_for_load_state("networkidle", timeout=PAGE_OPERATION_TIMEOUT_MS)
-                        else:
-                            print("Re-login failed. Cannot continue scraping. Breaking loop.")
-                            break # Critical failure, stop trying
-
-                    # Reload the page to get the latest content
-                    print(f"Reloading page for new data (attempt {scrape_attempt_counter})...")
-                    page.reload(timeout=PAGE_OPERATION_TIMEOUT_MS)
-                    page.wait_for_load_state("networkidle", timeout=PAGE_OPERATION_TIMEOUT_MS)
-
-                    # Get and save the HTML content
-                    page_html = page.content()
-                    current_greek_time = get_current_greek_time()
-                    ts = current_greek_time.strftime("%Y%m%d_%H%M%S_%f") # Add microseconds for uniqueness
-                    fname = f"application_view_{ts}.html"
-                    
-                    with open(fname, "w", encoding="utf-8") as f:
-                        f.write(page_html)
-                    
-                    successful_saves_count += 1 # Increment only after successful HTML save
-                    print(f"  ✅ Saved main HTML: {fname}. Successful HTML saves: {successful_saves_count}/{MIN_SUCCESS_SAVES}")
-
-                    # --- New Data Detection (Customize this part!) ---
-                    # You need to define what "new info" looks like.
-                    # Example: looking for a specific text, a new table row, or a new PDF link timestamp.
-                    # For now, a placeholder check:
-                    if "ΝΕΑ ΑΙΤΗΣΗ" in page_html: # Example: check for a specific new text
-                        print("  🎉 'ΝΕΑ ΑΙΤΗΣΗ' (New Application) text found in this saved page!")
-                    else:
-                        print("  New data not detected in this saved page yet.")
-
-                    # Download associated assets (PDFs, images)
-                    download_assets(page, page_html, "application_assets")
-
-                except (PlaywrightTimeoutError, PlaywrightError) as e:
-                    print(f"❌ Playwright error during scrape attempt {scrape_attempt_counter}: {e}")
-                    # Save a debug HTML if a Playwright error occurs during the loop
-                    try:
-                        debug_fname = f"error_page_{ts}_playwright_error.html"
-                        with open(debug_fname, "w", encoding="utf-8") as f:
-                            f.write(page.content())
-                        print(f"  Saved error page to {debug_fname} for inspection.")
-                    except Exception as debug_e:
-                        print(f"  Could not save debug page: {debug_e}")
-                except Exception as e:
-                    print(f"❌ Unexpected error during scrape attempt {scrape_attempt_counter}: {e}")
-                    # Save a debug HTML for other unexpected errors
-                    try:
-                        debug_fname = f"error_page_{ts}_unexpected_error.html"
-                        with open(debug_fname, "w", encoding="utf-8") as f:
-                            f.write(page.content())
-                        print(f"  Saved error page to {debug_fname} for inspection.")
-                    except Exception as debug_e:
-                        print(f"  Could not save debug page: {debug_e}")
-
-                # Calculate remaining time for this interval and sleep
-                time_elapsed_in_interval = time.time() - (loop_start_time + (scrape_attempt_counter - 1) * SCRAPE_INTERVAL_SECONDS)
-                sleep_duration = SCRAPE_INTERVAL_SECONDS - time_elapsed_in_interval
-                if sleep_duration > 0:
-                    time.sleep(sleep_duration)
-
-            if successful_saves_count >= MIN_SUCCESS_SAVES:
-                print(f"\n✅ Successfully saved {successful_saves_count} application pages (goal: {MIN_SUCCESS_SAVES}).")
-            else:
-                print(f"\n⚠️ Loop finished. Could not achieve {MIN_SUCCESS_SAVES} successful saves within limits. Total saved: {successful_saves_count}")
-
+            wait_for_event(run, target_event_time_greece)
+            scrape_browser(run)
+            if CRAWL_ENABLED:
+                crawl_run(run)
         except Exception as e:
             print(f"❌ An unhandled error occurred in the main scraper function: {e}")
+            run.dump_history("unhandled_error", e)
         finally:
-            if browser:
-                browser.close()
-                print("Browser closed.")
+            close_run(run)
+            TRACER.export()
+
+    end_overall_time = time.time()
+    elapsed_overall = end_overall_time - start_overall_time
+    print(f"⏱️ Total script execution time: {elapsed_overall:.2f} seconds.")
+
+def run_scraper_http():
+    """
+    Same flow as run_scraper, but on the browserless HTTP backend:
+    login is one GET + one form POST and every poll is a single GET of Applications.aspx.
+    """
+    start_overall_time = time.time()
+    username, password = load_credentials()
+    target_event_time_greece = get_target_event_time()
+    run = BotRun(username, password)
+
+    try:
+        if not prepare_http_run(run):
+            run.dump_history("prepare_failed")
+            return
+        wait_for_event(run, target_event_time_greece)
+        scrape_http(run)
+        if CRAWL_ENABLED:
+            crawl_run(run)
+    except Exception as e:
+        print(f"❌ An unhandled error occurred in the HTTP scraper: {e}")
+        run.dump_history("unhandled_error", e)
+    finally:
+        close_run(run)
+        TRACER.export()
 
     end_overall_time = time.time()
     elapsed_overall = end_overall_time - start_overall_time
     print(f"⏱️ Total script execution time: {elapsed_overall:.2f} seconds.")
 
 if __name__ == "__main__":
-    print("Starting the web scraping process with Playwright...")
+    print(f"Starting the web scraping process ({FETCH_BACKEND} backend)...")
     run_scraper()
     print("Scraping process finished.")
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+Shared fixtures. The modules live at the repository root, so it goes on sys.path here.
+
+Run with:  python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_portal import FakePortal  # noqa: E402
+
+@pytest.fixture(scope="session")
+def portal():
+    """A local fake portal (see fake_portal.py), already open, shared by the whole session."""
+    fake = FakePortal(seed=1).start()
+    yield fake
+    fake.stop()
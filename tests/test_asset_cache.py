@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import os
+
+import requests
+
+from asset_cache import AssetCache
+from asset_downloader import AssetDownloader
+from http_backend import DEFAULT_HEADERS
+
+CALENDAR_PATH = "/Styles/images/calendar.gif"
+PDF_PATH = "/Docs/odigies.pdf"
+
+def make_downloader(cache):
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    return AssetDownloader(session, cache.cache_dir, workers=2, cache=cache, own_pool=True)
+
+def test_conditional_get_round_trip(portal, tmp_path):
+    url = portal.base_url + CALENDAR_PATH
+    cache = AssetCache(str(tmp_path / "assets"))
+    assert cache.conditional_headers(url) == {}
+
+    downloader = make_downloader(cache)
+    [first] = downloader.download_all([url])
+    assert first.status == 200 and first.error is None and os.path.exists(first.path)
+    # Fetched once this run: no second request at all
+    [again] = downloader.download_all([url])
+    assert again.status == "cached"
+    downloader.close()
+
+    # A later run revalidates with the stored ETag and gets a 304
+    next_run = AssetCache(cache.cache_dir)
+    assert "If-None-Match" in next_run.conditional_headers(url)
+    downloader = make_downloader(next_run)
+    [revalidated] = downloader.download_all([url])
+    downloader.close()
+    assert revalidated.status == 304 and revalidated.path == first.path
+
+def test_missing_object_means_unconditional_get(portal, tmp_path):
+    url = portal.base_url + PDF_PATH
+    cache = AssetCache(str(tmp_path / "assets"))
+    downloader = make_downloader(cache)
+    [result] = downloader.download_all([url])
+    downloader.close()
+    os.remove(result.path)
+    assert AssetCache(cache.cache_dir).conditional_headers(url) == {}
+
+def test_identical_bodies_stored_once(tmp_path):
+    cache = AssetCache(str(tmp_path / "assets"))
+    first = cache.store_bytes("http://portal/a.pdf", b"%PDF-1.4 same", {"ETag": '"1"'})
+    second = cache.store_bytes("http://portal/b.pdf?x=1", b"%PDF-1.4 same", {})
+    assert first == second
+    assert os.listdir(cache.objects_dir) == [os.path.basename(first)]
+    assert cache.conditional_headers("http://portal/a.pdf") == {"If-None-Match": '"1"'}
+    assert cache.conditional_headers("http://portal/b.pdf?x=1") == {}
+
+def test_save_merges_other_processes_entries(tmp_path):
+    cache_dir = str(tmp_path / "assets")
+    one, two = AssetCache(cache_dir), AssetCache(cache_dir)
+    one.store_bytes("http://portal/one.png", b"one", {})
+    one.save()
+    two.store_bytes("http://portal/two.png", b"two", {})
+    two.save()
+    assert set(AssetCache(cache_dir).entries) == {"http://portal/one.png", "http://portal/two.png"}
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+import time as real_time
+from types import SimpleNamespace
+
+import pytest
+
+import coordination
+from coordination import Coordinator, SharedCaptureStore
+
+INTERVAL = 1.5
+
+class FakeClock:
+    def __init__(self):
+        self.now = real_time.time()
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    # Only wall-clock time is faked: heartbeats and sleeps stay real
+    monkeypatch.setattr(coordination, "time", SimpleNamespace(time=fake, monotonic=real_time.monotonic, sleep=real_time.sleep))
+    return fake
+
+@pytest.fixture
+def workers(tmp_path, clock):
+    path = str(tmp_path / "coordination.sqlite3")
+    joined = []
+    for i in range(3):
+        worker = Coordinator(path)
+        worker.worker_id = f"worker-{i}"
+        joined.append(worker.join())
+    for worker in joined:
+        worker.arm("event")
+        worker.start_polling()
+    yield joined
+    for worker in joined:
+        worker.leave()
+
+def test_slots_and_phases(workers):
+    assert [w.slot for w in workers] == [0, 1, 2]
+    assert [w.phase() for w in workers] == [(0, 3), (1, 3), (2, 3)]
+    assert len({w.epoch for w in workers}) == 1  # The first worker's epoch is everyone's
+
+def test_first_poll_offsets(workers, clock):
+    clock.now = workers[0].epoch
+    assert [w.align(0.0, INTERVAL) for w in workers] == pytest.approx([0.0, 0.5, 1.0])
+
+def test_steady_state_lanes_interleave(workers, clock):
+    epoch, attempt_seconds = workers[0].epoch, 0.08
+    polls = []
+    for worker in workers:
+        clock.now = epoch
+        t = epoch + worker.align(0.0, INTERVAL)
+        for _ in range(8):
+            polls.append(t)
+            clock.now = t + attempt_seconds
+            t = clock.now + worker.align(INTERVAL - attempt_seconds, INTERVAL)
+    polls.sort()
+    gaps = [b - a for a, b in zip(polls, polls[1:])]
+    assert gaps == pytest.approx([INTERVAL / 3] * len(gaps))
+
+def test_late_worker_does_not_poll_twice_per_interval(workers, clock):
+    worker = workers[1]
+    clock.now = worker.epoch + 0.55  # Just past its lane point
+    delay = worker.align(INTERVAL - 0.05, INTERVAL)
+    assert delay == pytest.approx(INTERVAL - 0.05)
+    assert delay >= INTERVAL / 2
+
+def test_dead_worker_respreads_lanes(workers, clock):
+    workers.pop(1).leave()
+    assert workers[1].phase() == (1, 2)
+    clock.now = workers[0].epoch
+    assert workers[1].align(0.0, INTERVAL) == pytest.approx(INTERVAL / 2)
+
+def test_single_worker_keeps_policy_delay(tmp_path, clock):
+    worker = Coordinator(str(tmp_path / "solo.sqlite3")).join()
+    worker.start_polling()
+    assert worker.align(0.37, INTERVAL) == 0.37
+    worker.leave()
+
+def test_new_data_signal_stops_others(workers):
+    workers[2].publish_new_data(4)
+    workers[1].publish_new_data(5)  # Only the first report counts
+    assert workers[0].found_elsewhere() == "worker-2"
+    assert workers[0].sleep(5.0) is False
+    assert workers[2].found_elsewhere() is None
+
+def test_restart_starts_a_new_run(workers, clock):
+    path, event_epoch = workers[0].path, workers[0].epoch
+    workers[0].publish_new_data(3)
+    for worker in workers:
+        worker.leave()
+    workers.clear()  # The fixture's teardown has nothing left to leave
+
+    clock.now += 60
+    restarted = []
+    for i in range(2):
+        worker = Coordinator(path)
+        worker.worker_id = f"worker-{i}"
+        restarted.append(worker.join())
+        worker.arm("event")
+        worker.start_polling()
+    assert restarted[0].run == restarted[1].run
+    # The same event polled again: a fresh epoch, and the last run's new data does not stop anyone
+    assert [w.epoch for w in restarted] == [clock.now, clock.now] != [event_epoch] * 2
+    assert [w.found_elsewhere() for w in restarted] == [None, None]
+    assert restarted[1].sleep(0.0) is True
+    restarted[1].publish_new_data(1)
+    assert restarted[0].found_elsewhere() == "worker-1"
+    for worker in restarted:
+        worker.leave()
+
+def test_shared_store_dedupes_and_keeps_raw_bytes(workers):
+    page = b'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="%s"><p>grid</p>'
+    stores = [SharedCaptureStore(w) for w in workers[:2]]
+    stores[0].save_snapshot(page % b"AAA")
+    stores[1].save_snapshot(page % b"BBB")
+    assert (stores[0].stored, stores[1].duplicates) == (1, 1)
+    conn = workers[0].conn
+    [(body,)] = conn.execute("SELECT body FROM pages").fetchall()
+    assert coordination.zlib.decompress(body) == page % b"AAA"
+    assert conn.execute("SELECT COUNT(*) FROM captures").fetchone()[0] == 2
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+from fake_portal import APPLICATION_NUMBER, render_applications
+from html_extractors import EXTRACTORS, get_extractor, is_applications_table
+
+EXTRACTOR_NAMES = sorted(EXTRACTORS)
+
+GRID = (
+    '<table class="grid" cellspacing="0" rules="all" border="1" id="MainContent_gvApplications">\n'
+    '<tr><th scope="col">Αριθμός Αίτησης</th><th scope="col">Κατάσταση</th></tr>\n'
+    '<tr><td>1234</td><td>ΝΕΑ &amp; ΑΙΤΗΣΗ</td></tr>\n'
+    '</table>'
+)
+
+def page(main_html):
+    return f"<html><body><form><div>{main_html}</div></form></body></html>"
+
+@pytest.fixture(params=EXTRACTOR_NAMES)
+def extractor(request):
+    return get_extractor(request.param)
+
+def test_grid_rows(extractor):
+    extract = extractor.extract(page(GRID))
+    assert extract.applications == [{"Αριθμός Αίτησης": "1234", "Κατάσταση": "ΝΕΑ & ΑΙΤΗΣΗ"}]
+
+def test_grid_nested_in_layout_table(extractor):
+    # The id-less layout table around the grid also "has" <th> cells; only the GridView counts
+    nested = (
+        '<table cellpadding="5" width="700px"><tr><td>Οι αιτήσεις μου</td></tr>\n'
+        f'<tr><td>{GRID}</td></tr>\n'
+        '<tr><td><a href="Default.aspx">Πίσω</a></td></tr></table>'
+    )
+    extract = extractor.extract(page(nested))
+    assert extract.applications == [{"Αριθμός Αίτησης": "1234", "Κατάσταση": "ΝΕΑ & ΑΙΤΗΣΗ"}]
+    assert extract.links == ["Default.aspx"]
+
+def test_layout_table_without_grid(extractor):
+    layout = '<table><tr><th>ΑΜΚΑ:</th><td><input name="ctl00$MainContent$txtAM"></td></tr></table>'
+    assert extractor.extract(page(layout)).applications is None
+
+def test_extractors_agree_on_fake_portal_page(portal):
+    html = render_applications(portal, time.time())
+    extracts = {name: get_extractor(name).extract(html) for name in EXTRACTOR_NAMES}
+    reference = extracts["soup"]
+    assert [row["Αριθμός Αίτησης"] for row in reference.applications] == [str(APPLICATION_NUMBER)]
+    for extract in extracts.values():
+        assert extract == reference
+
+def test_is_applications_table():
+    assert is_applications_table("MainContent_gvApplications", True)
+    assert not is_applications_table("MainContent_gvApplications", False)
+    assert not is_applications_table(None, True)
+    assert not is_applications_table("", True)
+    assert not is_applications_table("HeadLoginView", True)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import random
+
+import pytest
+
+import polling_policy
+from polling_policy import (
+    OUTCOME_ERROR, OUTCOME_OK, AdaptivePolicy, FixedIntervalPolicy, PollScheduler, PollState, TokenBucket,
+    is_retryable_status, make_policy,
+)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(polling_policy.time, "monotonic", fake)
+    return fake
+
+def state(attempt=1, elapsed=0.0, attempt_seconds=0.0, outcome=OUTCOME_OK, errors=0, captures=0, new_data=False):
+    return PollState(attempt, elapsed, attempt_seconds, outcome, errors, captures, new_data)
+
+def test_retryable_status():
+    assert [is_retryable_status(s) for s in (None, 200, 302, 404, 429, 500, 503)] == \
+        [False, False, False, False, True, True, True]
+
+def test_fixed_policy_keeps_a_grid_and_stops_at_the_goal():
+    policy = FixedIntervalPolicy(2.0, min_captures=3)
+    assert policy.decide(state(attempt=1, elapsed=0.3, captures=1)).delay == pytest.approx(1.7)
+    assert policy.decide(state(attempt=2, elapsed=4.5, captures=2)).delay == 0.0  # Late: no negative wait
+    assert policy.decide(state(attempt=3, elapsed=5.0, captures=3)).stop
+
+def test_adaptive_interval_schedule():
+    policy = AdaptivePolicy(burst_interval=0.5, burst_duration=5.0, half_life=8.0, max_interval=5.0)
+    assert policy.interval_at(0.0) == policy.interval_at(5.0) == 0.5
+    assert policy.interval_at(13.0) == pytest.approx(1.0)
+    assert policy.interval_at(21.0) == pytest.approx(2.0)
+    assert policy.interval_at(1000.0) == 5.0
+    intervals = [policy.interval_at(t) for t in range(0, 60)]
+    assert intervals == sorted(intervals)
+
+def test_adaptive_backoff_is_bounded_equal_jitter():
+    policy = AdaptivePolicy(backoff_base=1.0, backoff_max=15.0, rng=random.Random(7))
+    for errors in range(1, 8):
+        ceiling = min(15.0, 2 ** (errors - 1))
+        for _ in range(50):
+            delay = policy.decide(state(outcome=OUTCOME_ERROR, errors=errors)).delay
+            assert ceiling / 2 <= delay <= ceiling
+
+def test_adaptive_early_stop_needs_captures():
+    policy = AdaptivePolicy(early_stop_min_captures=2)
+    assert not policy.decide(state(captures=1, new_data=True)).stop
+    assert policy.decide(state(captures=2, new_data=True)).stop
+
+def test_make_policy():
+    assert make_policy("fixed", 3.0, 5).interval_seconds == 3.0
+    assert make_policy("adaptive", 4.0, 1).early_stop_min_captures == 1
+    with pytest.raises(ValueError):
+        make_policy("sometimes")
+
+def test_token_bucket_burst_then_rate(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    for _ in range(3):
+        assert bucket.time_until_available() == 0.0
+        bucket.consume()
+    assert bucket.available() == 0
+    assert bucket.time_until_available() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.available() == 1
+    clock.now += 100
+    assert bucket.available() == 3  # Never refills past capacity
+
+def test_token_bucket_debt_is_paid_back(clock):
+    bucket = TokenBucket(rate=1.0, capacity=1)
+    bucket.consume()
+    bucket.consume()  # A caller that skipped the wait
+    assert bucket.time_until_available() == pytest.approx(2.0)
+
+def test_scheduler_applies_rate_budget(clock, tmp_path):
+    scheduler = PollScheduler(FixedIntervalPolicy(0.0, 10), TokenBucket(rate=1.0, capacity=1),
+                              log_path=str(tmp_path / "decisions.jsonl")).start()
+    scheduler.before_attempt()
+    decision = scheduler.after_attempt(1, OUTCOME_OK)
+    assert decision.delay == pytest.approx(1.0) and decision.reason.endswith("(rate budget)")
+    scheduler.close()
+    assert (tmp_path / "decisions.jsonl").read_text(encoding="utf-8").count("\n") == 1
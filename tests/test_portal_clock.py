@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import pytest
+import requests
+
+from portal_clock import ClockSample, ServerClock
+
+def test_samples_reuse_the_pooled_connection(portal, monkeypatch):
+    accepted = []
+    server = portal._server
+    get_request = server.get_request
+    def counting_get_request():
+        accepted.append(1)
+        return get_request()
+    monkeypatch.setattr(server, "get_request", counting_get_request)
+
+    url = portal.base_url + "/Account/Login.aspx"
+    session = requests.Session()
+    session.get(url).close()  # Warm connection, as after the login
+    clock = ServerClock(url, session=session)
+    for _ in range(4):
+        clock.take_sample()
+    session.close()
+    assert len(clock.samples) == 4
+    assert len(accepted) == 1  # The warm-up connection, reused by every sample
+
+@pytest.mark.parametrize("true_offset", [0.0, 2.37, -41.6])
+def test_update_estimate_recovers_a_known_offset(true_offset):
+    clock = ServerClock("http://portal.invalid/")
+    rtt = 0.04
+    # Samples sent at phases sweeping the whole second, like calibrate() does
+    for i in range(8):
+        sent = 1_000_000.0 + i * (1 + 1 / 8)
+        stamped = sent + rtt / 2 + true_offset          # Server's clock when it wrote the Date header
+        clock.samples.append(ClockSample(sent, sent + rtt, float(int(stamped // 1))))
+    clock._update_estimate()
+    assert abs(clock.offset - true_offset) <= clock.uncertainty + 1e-9
+    assert clock.uncertainty <= 0.2
+    assert clock.one_way_latency == pytest.approx(rtt / 2)
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+import reprocess_snapshots
+from reprocess_snapshots import Source, process_source, reprocess
+from snapshot_store import SnapshotStore
+
+def page(number):
+    return (f'<span id="HeadLoginView_HeadLoginName">demo</span><table id="MainContent_gvApplications">'
+            f'<tr><td>{number}</td><td>ΝΕΑ ΑΙΤΗΣΗ</td></tr></table>').encode("utf-8")
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+def read_rows(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return {row["source"]: row for row in map(json.loads, f)}
+
+def test_resume_skips_done_sources_and_marks_duplicates(tmp_path):
+    pages, out = tmp_path / "pages", str(tmp_path / "reprocessed.jsonl")
+    write(str(pages / "application_view_1.html"), page(1234))
+    write(str(pages / "application_view_2.html"), page(1234))
+    write(str(pages / "error_page_1.html"), page(1235))
+    store = SnapshotStore(str(pages / "snapshots"))
+    store.add(page(1234))
+    store.add(page(1236))
+    store.close()
+
+    first = reprocess([str(pages)], out, workers=1)
+    assert len(first) == 5 and not any(row["error"] for row in first)
+    rows = read_rows(out)
+    view_1, view_2 = (os.path.normpath(str(pages / f"application_view_{i}.html")) for i in (1, 2))
+    kept = rows[view_1] if rows[view_1]["duplicate_of"] is None else rows[view_2]
+    copies = [row for row in rows.values() if row["duplicate_of"]]
+    # The archive's first snapshot is byte-identical to both view files
+    assert len(copies) == 2 and {row["duplicate_of"] for row in copies} == {kept["source"]}
+    assert all(row["applications"] == kept["applications"] for row in copies)
+
+    assert reprocess([str(pages)], out, workers=1) == []  # Everything is done: nothing is read again
+
+    write(view_2, page(1237))
+    again = reprocess([str(pages)], out, workers=1)
+    assert [(row["source"], row["duplicate_of"]) for row in again] == [(view_2, None)]
+
+def test_failure_is_recorded_on_the_row(monkeypatch):
+    class BrokenExtractor:
+        def extract(self, page_html):
+            raise KeyError("gvApplications")
+
+    monkeypatch.setattr(reprocess_snapshots, "_worker",
+                        {"extractor": BrokenExtractor(), "known_hashes": {}, "cached_urls": set(), "page_url": ""})
+    row = process_source(Source("odd.html", "page", [1, 2], None, page(1), None))
+    assert row["error"] == "KeyError: 'gvApplications'"
+    assert row["sha256"] is not None
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import zipfile
+
+import pytest
+
+import send_artifact_email
+from send_artifact_email import MANIFEST_NAME, package_artifacts
+
+LIMIT = 8 * 1024
+
+def snapshot(viewstate, rows="<tr><td>1234</td></tr>"):
+    return (f'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}" />'
+            f'<table>{rows}</table>').encode("utf-8")
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+@pytest.fixture
+def run_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # Artifacts are collected from the working directory
+    monkeypatch.delenv("PIS_ARTIFACT_COMPRESSION", raising=False)
+    return tmp_path
+
+def read_parts(parts):
+    contents = {}
+    for path, names in parts:
+        with zipfile.ZipFile(path) as archive:
+            assert archive.namelist() == names
+            for info in archive.infolist():
+                contents[info.filename] = (archive.read(info), info.compress_type)
+    return contents
+
+def test_deflate_is_the_default(monkeypatch):
+    monkeypatch.delenv("PIS_ARTIFACT_COMPRESSION", raising=False)
+    assert send_artifact_email._compression_method() == (zipfile.ZIP_DEFLATED, "deflate")
+    monkeypatch.setenv("PIS_ARTIFACT_COMPRESSION", "zstd")
+    zstd = getattr(zipfile, "ZIP_ZSTANDARD", None)
+    expected = (zstd, "zstd") if zstd is not None else (zipfile.ZIP_DEFLATED, "deflate")
+    assert send_artifact_email._compression_method() == expected
+
+def test_duplicates_are_packed_once(run_dir):
+    write("application_view_1.html", snapshot("AAAA"))
+    write("application_view_2.html", snapshot("BBBB"))  # Differs only in view state
+    write("application_view_3.html", snapshot("CCCC", rows="<tr><td>1235</td></tr>"))
+    write("application_assets/objects/a.pdf", b"%PDF same bytes")
+    write("application_assets/objects/b.pdf", b"%PDF same bytes")
+
+    parts = package_artifacts("parts", LIMIT)
+    contents = read_parts(parts)
+    manifest = json.loads(contents.pop(MANIFEST_NAME)[0])
+    assert sorted(contents) == ["application_assets/objects/a.pdf", "application_view_1.html", "application_view_3.html"]
+    assert manifest["duplicates"] == {
+        "application_assets/objects/b.pdf": "application_assets/objects/a.pdf",
+        "application_view_2.html": "application_view_1.html",
+    }
+    assert manifest["compression"] == "deflate"
+    assert contents["application_view_1.html"] == (snapshot("AAAA"), zipfile.ZIP_DEFLATED)
+    assert contents["application_assets/objects/a.pdf"][1] == zipfile.ZIP_STORED
+
+def test_parts_split_under_the_limit(run_dir):
+    files = {f"application_assets/objects/{i}.pdf": os.urandom(3000) for i in range(6)}
+    for path, data in files.items():
+        write(path, data)
+
+    parts = package_artifacts("parts", LIMIT)
+    assert len(parts) > 1
+    assert all(os.path.getsize(path) <= LIMIT for path, _ in parts)
+    contents = read_parts(parts)
+    assert {name: data for name, (data, _) in contents.items() if name != MANIFEST_NAME} == files
+    # A second run starts from fresh parts
+    os.remove("application_assets/objects/5.pdf")
+    assert len(package_artifacts("parts", LIMIT)) <= len(parts)
+    assert sorted(os.listdir("parts")) == sorted(os.path.basename(path) for path, _ in package_artifacts("parts", LIMIT))
+
+def test_oversized_file_gets_a_part_of_its_own(run_dir):
+    write("application_assets/objects/small.pdf", os.urandom(1000))
+    write("application_assets/objects/zbig.pdf", os.urandom(LIMIT * 2))
+
+    parts = package_artifacts("parts", LIMIT)
+    big = [names for _, names in parts if "application_assets/objects/zbig.pdf" in names]
+    assert big == [["application_assets/objects/zbig.pdf"]]
+    assert all(os.path.getsize(path) <= LIMIT for path, names in parts if big[0] != names)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import snapshot_store
+from snapshot_store import KIND_DELTA, KIND_FULL, KIND_SAME, SnapshotReader, SnapshotStore, normalize_snapshot, read_index
+
+def page(rows, viewstate="AAAA"):
+    body = "".join(f"<tr><td>{number}</td><td>ΝΕΑ ΑΙΤΗΣΗ</td></tr>\n" for number in rows)
+    return (
+        '<html><body><form>\n'
+        f'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}" />\n'
+        f'<table id="MainContent_gvApplications">\n{body}</table>\n'
+        '</form></body></html>\n'
+    )
+
+@pytest.fixture
+def store_dir(tmp_path):
+    return str(tmp_path / "snapshots")
+
+def test_normalize_blanks_only_volatile_fields():
+    assert normalize_snapshot(page([1], "AAAA")) == normalize_snapshot(page([1], "BBBB"))
+    assert normalize_snapshot(page([1])) != normalize_snapshot(page([2]))
+    assert 'value=""' in normalize_snapshot(page([1]))
+
+def test_same_delta_full_and_round_trip(store_dir):
+    captures = [page([]), page([], "BBBB"), page([1234]), page([1234, 1235]).encode("utf-8"), page([1235])]
+    store = SnapshotStore(store_dir)
+    kinds = [store.add(capture, captured_at=f"t{i}")["kind"] for i, capture in enumerate(captures)]
+    store.close()
+    assert kinds == [KIND_FULL, KIND_SAME, KIND_DELTA, KIND_DELTA, KIND_DELTA]
+
+    raw = [c if isinstance(c, bytes) else c.encode("utf-8") for c in captures]
+    expected = [raw[0], raw[0], raw[2], raw[3], raw[4]]  # A "same" capture rebuilds to the body it matched
+    rebuilt = [body for _, body in SnapshotReader(store_dir).iter_snapshots()]
+    assert rebuilt == expected
+    reader = SnapshotReader(store_dir)
+    assert [reader.get(seq) for seq in range(len(captures))] == expected
+
+def test_keyframe_interval(store_dir, monkeypatch):
+    monkeypatch.setattr(snapshot_store, "KEYFRAME_INTERVAL", 2)
+    store = SnapshotStore(store_dir)
+    kinds = [store.add(page(range(n)))["kind"] for n in range(7)]
+    store.close()
+    assert kinds == [KIND_FULL, KIND_DELTA, KIND_DELTA, KIND_FULL, KIND_DELTA, KIND_DELTA, KIND_FULL]
+    assert SnapshotReader(store_dir).get(5) == page(range(5)).encode("utf-8")
+
+def test_raw_body_is_kept_exactly(store_dir):
+    # Distinct view states and bytes that are not valid UTF-8 must come back untouched
+    captures = [
+        page([1], "AAAA").encode("utf-8"),
+        page([1, 2], "BBBB").encode("utf-8") + b"<!-- \xff\xfe -->\r\n",
+        page([1, 2, 3], "CCCC").encode("cp1253"),
+    ]
+    store = SnapshotStore(store_dir)
+    kinds = [store.add(capture)["kind"] for capture in captures]
+    store.close()
+    assert kinds == [KIND_FULL, KIND_DELTA, KIND_DELTA]
+    assert [body for _, body in SnapshotReader(store_dir).iter_snapshots()] == captures
+    assert SnapshotReader(store_dir).get(2) == captures[2]
+
+def test_resume_continues_sequence_and_delta_base(store_dir):
+    store = SnapshotStore(store_dir)
+    store.add(page([1]))
+    store.add(page([1, 2]))
+    store.close()
+
+    store = SnapshotStore(store_dir)
+    assert store.add(page([1, 2], "CCCC"))["kind"] == KIND_SAME
+    entry = store.add(page([1, 2, 3]))
+    store.close()
+    assert (entry["seq"], entry["kind"], entry["base_seq"]) == (3, KIND_DELTA, 1)
+    assert [e["seq"] for e in read_index(store_dir)] == [0, 1, 2, 3]
+    assert SnapshotReader(store_dir).get(3) == page([1, 2, 3]).encode("utf-8")
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Lightweight span tracing for the bot's phases and Phase 3 attempts.
+
+    from tracing import TRACER
+    with TRACER.span("reload", attempt=3):
+        ...
+
+A span costs two perf_counter() calls and one list append, so it is safe on the
+hot loop. Wall-clock times are only computed at export: every span is placed on the
+portal's clock (local time + the ServerClock offset, once calibrated) so traces
+line up with the server's Date headers and the time series.
+
+At the end of a run export() writes:
+  - trace_spans.json: every span plus per-name summaries and latency histograms
+  - trace_spans.csv:  one row per span, for spreadsheets
+
+Disable with PIS_TRACE=0.
+"""
+import csv
+import json
+import os
+import statistics
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from portal_clock import GREEK_TZ
+
+TRACE_ENABLED = os.environ.get("PIS_TRACE", "1").strip().lower() not in ("0", "false", "no", "off")
+TRACE_JSON_FILE = "trace_spans.json"
+TRACE_CSV_FILE = "trace_spans.csv"
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open-ended
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+Span = namedtuple("Span", "name start end thread attrs")
+
+class Tracer:
+    """Collects spans from any thread; list.append is atomic, so recording takes no lock."""
+
+    def __init__(self, enabled=TRACE_ENABLED):
+        self.enabled = enabled
+        self.spans = []
+        self.clock_offset = 0.0
+        self.clock_calibrated = False
+        # One wall/perf anchor pair converts every perf_counter() reading to wall time at export
+        self._anchor_wall = time.time()
+        self._anchor_perf = time.perf_counter()
+        self._export_lock = threading.Lock()
+
+    def set_clock(self, clock):
+        """Uses a calibrated ServerClock's offset so exported times are portal times."""
+        if clock is not None and clock.calibrated:
+            self.clock_offset = clock.offset
+            self.clock_calibrated = True
+
+    @contextmanager
+    def span(self, name, **attrs):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append(Span(name, start, time.perf_counter(), threading.current_thread().name, attrs))
+
+    def record(self, name, start, end=None, **attrs):
+        """Adds a span measured by the caller with perf_counter() (for code that can't use a with block)."""
+        if self.enabled:
+            self.spans.append(Span(name, start, end if end is not None else time.perf_counter(),
+                                   threading.current_thread().name, attrs))
+
+    # --- Export ---
+
+    def _portal_time(self, perf):
+        return self._anchor_wall + (perf - self._anchor_perf) + self.clock_offset
+
+    def summary(self):
+        """{name: {count, total_ms, mean_ms, p50_ms, p95_ms, max_ms, histogram}} over the recorded spans."""
+        durations = {}
+        for s in list(self.spans):
+            durations.setdefault(s.name, []).append((s.end - s.start) * 1000)
+        result = {}
+        for name, values in durations.items():
+            ordered = sorted(values)
+            histogram = {}
+            for value in ordered:
+                bucket = next((f"<={b}ms" for b in HISTOGRAM_BUCKETS_MS if value <= b), f">{HISTOGRAM_BUCKETS_MS[-1]}ms")
+                histogram[bucket] = histogram.get(bucket, 0) + 1
+            result[name] = {
+                "count": len(ordered),
+                "total_ms": round(sum(ordered), 3),
+                "mean_ms": round(statistics.mean(ordered), 3),
+                "p50_ms": round(statistics.median(ordered), 3),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))], 3),
+                "max_ms": round(ordered[-1], 3),
+                "histogram": histogram,
+            }
+        return result
+
+    def _rows(self):
+        for s in sorted(self.spans, key=lambda span: span.start):
+            start_ts = self._portal_time(s.start)
+            yield {
+                "name": s.name,
+                "start": datetime.fromtimestamp(start_ts, timezone.utc).astimezone(GREEK_TZ).isoformat(timespec="microseconds"),
+                "offset_ms": round((s.start - self._anchor_perf) * 1000, 3),
+                "duration_ms": round((s.end - s.start) * 1000, 3),
+                "thread": s.thread,
+                "attrs": s.attrs,
+            }
+
+    def export(self, json_path=TRACE_JSON_FILE, csv_path=TRACE_CSV_FILE):
+        """Writes the JSON and CSV exports and prints the per-span summary."""
+        if not self.enabled or not self.spans:
+            return
+        with self._export_lock:
+            rows = list(self._rows())
+            summary = self.summary()
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "clock": "portal (calibrated)" if self.clock_calibrated else "local",
+                    "clock_offset_ms": round(self.clock_offset * 1000, 3),
+                    "summary": summary,
+                    "spans": rows,
+                }, f, ensure_ascii=False, indent=1, default=str)
+            with open(csv_path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["name", "start", "offset_ms", "duration_ms", "thread", "attrs"])
+                for row in rows:
+                    writer.writerow([row["name"], row["start"], row["offset_ms"], row["duration_ms"], row["thread"],
+                                     json.dumps(row["attrs"], ensure_ascii=False, default=str)])
+        self.report(summary)
+        print(f"  Trace written to {json_path} and {csv_path} ({len(rows)} spans)")
+
+    def report(self, summary=None):
+        summary = summary or self.summary()
+        print("\n--- Trace summary (ms) ---")
+        print(f"  {'span':<14} {'count':>6} {'total':>10} {'mean':>9} {'p50':>9} {'p95':>9} {'max':>9}")
+        for name, s in sorted(summary.items(), key=lambda item: -item[1]["total_ms"]):
+            print(f"  {name:<14} {s['count']:>6} {s['total_ms']:>10.1f} {s['mean_ms']:>9.1f} "
+                  f"{s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['max_ms']:>9.1f}")
+
+# Process-wide tracer shared by the bot, the capture pipeline and the asset downloader
+TRACER = Tracer()